@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""ASR real-time factor benchmark.
+
+Transcribes one audio file on CPU with every requested backend, model size
+and compute type. For each run it reports:
+
+- the real-time factor (RTF): transcription seconds per second of audio, so
+  below 1.0 is faster than real time;
+- the model load time;
+- the output size.
+
+Backends that are not installed are skipped.
+
+Usage:
+    python bench_asr.py --audio talk.mp3 [--backends whisper,faster-whisper]
+        [--models tiny,base,small] [--compute-types int8,float32]
+        [--beam-size 5] [--batch-size 8] [--seconds 300] [--repeat 1] [--json out.json]
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# CPU only: hide GPUs from torch and CTranslate2 before either is imported
+os.environ["CUDA_VISIBLE_DEVICES"] = ""
+
+import yt_transcribe_and_summarize as yts  # noqa: E402
+
+
+def _list(value: str) -> List[str]:
+    return [v.strip() for v in value.split(",") if v.strip()]
+
+
+def run_one(
+    audio,
+    backend: str,
+    model: str,
+    compute_type: Optional[str],
+    beam_size: Optional[int],
+    batch_size: int,
+    repeat: int,
+) -> Dict[str, Any]:
+    yts.configure_asr(backend, compute_type, beam_size, batch_size)
+    engine = yts.asr_backend()
+    t0 = time.perf_counter()
+    engine.load(model, yts.ASR)
+    load_seconds = time.perf_counter() - t0
+    times = []
+    for _ in range(max(1, repeat)):
+        t0 = time.perf_counter()
+        segments = engine.transcribe(audio, model, yts.ASR)
+        times.append(time.perf_counter() - t0)
+    duration = len(audio) / yts.SAMPLE_RATE
+    # Free the model before the next (possibly larger) one loads
+    yts.MODEL_MANAGER.evict()
+    return {
+        "backend": backend,
+        "model": model,
+        "compute_type": yts.ASR.compute_type or "default",
+        "beam_size": beam_size,
+        "batch_size": batch_size,
+        "audio_seconds": round(duration, 2),
+        "load_seconds": round(load_seconds, 3),
+        "transcribe_seconds": round(min(times), 3),
+        "rtf": round(min(times) / duration, 4),
+        "segments": len(segments),
+        "words": sum(len(s.text.split()) for s in segments),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--audio", type=Path, required=True, help="Audio/video file")
+    parser.add_argument(
+        "--backends", type=_list, default=list(yts.ASR_BACKENDS), help="Comma-separated"
+    )
+    parser.add_argument("--models", type=_list, default=["tiny", "base", "small"])
+    parser.add_argument(
+        "--compute-types",
+        type=_list,
+        default=["int8", "float32"],
+        help="Compute types for faster-whisper (whisper always runs float32 on CPU)",
+    )
+    parser.add_argument("--beam-size", type=int, default=None)
+    parser.add_argument("--batch-size", type=int, default=1)
+    parser.add_argument(
+        "--seconds", type=float, default=300.0, help="Only use the first N seconds"
+    )
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--json", type=Path, help="Also write the results here")
+    args = parser.parse_args()
+
+    unknown = [b for b in args.backends if b not in yts.ASR_BACKENDS]
+    if unknown:
+        parser.error(f"unknown backend(s): {', '.join(unknown)}")
+    audio = yts.decode_audio(args.audio)
+    if audio is None:
+        sys.exit(f"Could not decode {args.audio} (needs numpy and ffmpeg)")
+    audio = audio[: int(args.seconds * yts.SAMPLE_RATE)]
+
+    results = []
+    for backend in args.backends:
+        if not yts.ASR_BACKENDS[backend].available():
+            print(f"{backend}: not installed, skipped")
+            continue
+        compute_types = args.compute_types if backend == "faster-whisper" else [None]
+        for model in args.models:
+            for compute_type in compute_types:
+                r = run_one(
+                    audio,
+                    backend,
+                    model,
+                    compute_type,
+                    args.beam_size,
+                    args.batch_size,
+                    args.repeat,
+                )
+                results.append(r)
+                print(
+                    f"{backend:15s} {model:8s} {r['compute_type']:8s} "
+                    f"RTF {r['rtf']:6.3f}  transcribe {r['transcribe_seconds']:7.1f}s  "
+                    f"load {r['load_seconds']:5.1f}s  {r['words']} words"
+                )
+    if args.json:
+        report = {
+            "cpu": platform.processor() or platform.machine(),
+            "cpu_count": os.cpu_count(),
+            "results": results,
+        }
+        args.json.write_text(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,641 @@
+#!/usr/bin/env python3
+"""Offline benchmark suite for the transcription/summarization pipeline.
+
+Every external dependency (YouTubeTranscriptApi, yt-dlp, Whisper, the Hugging
+Face summarization pipeline, pyannote and WeasyPrint) is replaced by a scripted
+stand-in that returns synthetic data instantly, so the numbers measure this
+project's own code: ID parsing, caption conversion, voice activity detection,
+chunking, summarization orchestration, speaker alignment, content generation
+and export. No network, GPU or model downloads are needed.
+
+Each stage runs against synthetic transcripts of the given lengths (in
+minutes). Results are printed as a table and can be saved as JSON; comparing
+against a saved run flags stages whose median time regressed.
+
+Usage:
+    python bench_pipeline.py [--durations 1,10,60,600] [--repeat 5]
+                             [--stages chunk_text,export_md] [--json results.json]
+    python bench_pipeline.py --compare baseline.json [--threshold 0.15]
+    python bench_pipeline.py --compare baseline.json --against results.json
+"""
+
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+import types
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+import numpy as np
+
+import yt_transcribe_and_summarize as yts
+
+SECONDS_PER_SEGMENT = 3.0
+WORDS = (
+    "the model audio speaker transcript summary video people really think "
+    "going data time know right actually chunk window token batch really "
+    "important question answer example because system would could should"
+).split()
+
+
+# ---------------------------------------------------------------------------
+# Synthetic data
+# ---------------------------------------------------------------------------
+
+
+def make_entries(minutes: float, seed: int = 0) -> List[Dict[str, Any]]:
+    """Caption-style entries (text/start/duration) covering ``minutes``."""
+    rng = random.Random(seed)
+    entries = []
+    t = 0.0
+    end = minutes * 60.0
+    while t < end:
+        words = rng.choices(WORDS, k=rng.randint(5, 14))
+        text = " ".join(words).capitalize() + rng.choice([".", ".", "?", ","])
+        duration = rng.uniform(0.6, 1.4) * SECONDS_PER_SEGMENT
+        entries.append({"text": text, "start": round(t, 2), "duration": duration})
+        t += duration
+    return entries
+
+
+def make_turns(minutes: float, seed: int = 1) -> List[Tuple[float, float, str]]:
+    """Diarization turns with a handful of speakers and small overlaps."""
+    rng = random.Random(seed)
+    turns = []
+    t = 0.0
+    end = minutes * 60.0
+    while t < end:
+        length = rng.uniform(2.0, 40.0)
+        turns.append((t, t + length, f"SPEAKER_{rng.randrange(4):02d}"))
+        t += length - rng.uniform(0.0, 0.5)
+    return turns
+
+
+# ---------------------------------------------------------------------------
+# Stand-in backends
+# ---------------------------------------------------------------------------
+
+
+class FakeTranscript:
+    language_code = "en"
+    is_generated = False
+
+    def __init__(self, entries):
+        self.entries = entries
+
+    def fetch(self):
+        return FakeFetchedTranscript(self.entries)
+
+
+class FakeFetchedTranscript:
+    def __init__(self, entries):
+        self.entries = entries
+
+    def to_raw_data(self):
+        return self.entries
+
+
+class FakeTranscriptList:
+    def __init__(self, entries):
+        self.transcript = FakeTranscript(entries)
+
+    def find_transcript(self, langs):
+        return self.transcript
+
+    def __iter__(self):
+        return iter([self.transcript])
+
+
+class FakeTranscriptApi:
+    """youtube-transcript-api (>= 1.0 instance API) serving canned captions."""
+
+    entries: List[Dict[str, Any]] = []
+
+    def __init__(self, proxy_config=None, http_client=None):
+        self.http_client = http_client
+
+    def list(self, video_id):
+        return FakeTranscriptList(self.entries)
+
+
+class FakeYoutubeDL:
+    """yt_dlp.YoutubeDL that "downloads" a small placeholder file."""
+
+    def __init__(self, opts):
+        self.outtmpl = opts["outtmpl"]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def extract_info(self, url, download=True):
+        vid = yts.extract_video_id(url)
+        path = Path(self.outtmpl.replace("%(id)s", vid).replace("%(ext)s", "webm"))
+        path.write_bytes(b"\0" * 4096)
+        return {"id": vid}
+
+
+class FakeWhisperModel:
+    segments: List[Dict[str, Any]] = []
+
+    def transcribe(self, audio, verbose=False, **kwargs):
+        return {"segments": self.segments}
+
+
+class FakeFasterWhisperModel:
+    """faster_whisper.WhisperModel: lazy segment objects plus an info value."""
+
+    def __init__(self, model_name=None, **kwargs):
+        pass
+
+    def transcribe(self, audio, beam_size=5, **kwargs):
+        segments = (
+            types.SimpleNamespace(start=s["start"], end=s["end"], text=s["text"])
+            for s in FakeWhisperModel.segments
+        )
+        return segments, types.SimpleNamespace(language="en")
+
+
+class FakeBatchedInferencePipeline:
+    def __init__(self, model):
+        self.model = model
+
+    def transcribe(self, audio, batch_size=8, **kwargs):
+        return self.model.transcribe(audio, **kwargs)
+
+
+class FakeTokenizer:
+    """Whitespace tokenizer with the parts of the HF API the pipeline uses."""
+
+    model_max_length = 1024
+
+    def num_special_tokens_to_add(self, pair=False):
+        return 2
+
+    def __call__(self, texts, add_special_tokens=False, **kwargs):
+        return {"input_ids": [t.split() for t in texts]}
+
+
+def fake_summarization_pipeline(texts, batch_size=8, **kwargs):
+    return [{"summary_text": " ".join(t.split()[:40])} for t in texts]
+
+
+class FakeTurn:
+    __slots__ = ("start", "end")
+
+    def __init__(self, start, end):
+        self.start = start
+        self.end = end
+
+
+class FakeAnnotation:
+    def __init__(self, turns):
+        self.turns = turns
+
+    def itertracks(self, yield_label=False):
+        for start, end, label in self.turns:
+            yield FakeTurn(start, end), None, label
+
+
+class FakeDiarizationPipeline:
+    turns: List[Tuple[float, float, str]] = []
+
+    def __call__(self, audio):
+        return FakeAnnotation(self.turns)
+
+
+class FakePdf:
+    def __init__(self, filename=None, string=None):
+        self.filename = filename
+
+    def write_pdf(self, target=None):
+        if target is None:
+            return b"%PDF-1.4\n"
+        Path(target).write_bytes(b"%PDF-1.4\n")
+
+
+def install_fakes():
+    """Route every external backend in yt_transcribe_and_summarize to a stand-in."""
+    yts.YouTubeTranscriptApi = FakeTranscriptApi
+    # load_backend caches modules here; pre-seeding it skips the real imports
+    yts._backends.update(
+        {
+            "yt_dlp": types.SimpleNamespace(YoutubeDL=FakeYoutubeDL),
+            "whisper": types.SimpleNamespace(
+                load_model=lambda name, device=None: FakeWhisperModel()
+            ),
+            "transformers": types.SimpleNamespace(
+                AutoTokenizer=types.SimpleNamespace(
+                    from_pretrained=lambda name: FakeTokenizer()
+                ),
+                AutoModelForSeq2SeqLM=None,
+                pipeline=lambda task, **kwargs: fake_summarization_pipeline,
+            ),
+            "pyannote": types.SimpleNamespace(
+                Pipeline=types.SimpleNamespace(
+                    from_pretrained=lambda name, **kwargs: FakeDiarizationPipeline()
+                )
+            ),
+            "faster_whisper": types.SimpleNamespace(
+                WhisperModel=FakeFasterWhisperModel,
+                BatchedInferencePipeline=FakeBatchedInferencePipeline,
+            ),
+            "torch": None,
+            "weasyprint": types.SimpleNamespace(HTML=FakePdf),
+        }
+    )
+    # Measure the work itself, not disk cache hits
+    yts.configure_caches(enabled=False)
+
+
+# ---------------------------------------------------------------------------
+# Benchmarks
+# ---------------------------------------------------------------------------
+
+
+class Case:
+    """Synthetic inputs for one transcript length, built once and shared."""
+
+    def __init__(self, minutes: float, workdir: Path):
+        self.minutes = minutes
+        self.workdir = workdir
+        self.entries = make_entries(minutes)
+        self.segments = [
+            yts.Segment(
+                start=e["start"], end=e["start"] + e["duration"], text=e["text"]
+            )
+            for e in self.entries
+        ]
+        self.table = yts.to_segment_table(self.segments)
+        self.transcript = yts.transcript_text(self.segments)
+        self.turns = make_turns(minutes)
+        self.summary = yts.Summary(tldr="Short summary.", detailed="Longer summary.")
+        self.content = yts.generate_content(
+            "dQw4w9WgXcQ", "Title", self.summary, self.table
+        )
+
+
+URL_FORMS = (
+    "https://www.youtube.com/watch?v={}",
+    "https://youtu.be/{}",
+    "https://www.youtube.com/v/{}",
+    "https://www.youtube.com/embed/{}?start=10",
+    "https://m.youtube.com/watch?v={}&t=42s",
+    "{}",
+)
+
+
+def bench_extract_video_id(case: Case) -> Tuple[Callable[[], Any], int]:
+    rng = random.Random(2)
+    alphabet = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_-"
+    urls = [
+        rng.choice(URL_FORMS).format("".join(rng.choices(alphabet, k=11)))
+        for _ in range(int(case.minutes * 200))
+    ]
+    return lambda: [yts.extract_video_id(u) for u in urls], len(urls)
+
+
+def bench_fetch_captions(case: Case):
+    def run():
+        FakeTranscriptApi.entries = case.entries
+        return yts.fetch_captions("dQw4w9WgXcQ", "en")
+
+    return run, len(case.entries)
+
+
+def bench_download_audio(case: Case):
+    out_dir = case.workdir / "audio"
+    out_dir.mkdir(exist_ok=True)
+    return lambda: yts.download_audio("https://youtu.be/dQw4w9WgXcQ", out_dir), 1
+
+
+def bench_transcribe_with_whisper(case: Case):
+    whisper_segments = [
+        {"start": s.start, "end": s.end, "text": " " + s.text} for s in case.segments
+    ]
+
+    def run():
+        FakeWhisperModel.segments = whisper_segments
+        return yts.transcribe_with_whisper(case.workdir / "audio.webm", "bench")
+
+    return run, len(case.segments)
+
+
+def bench_transcribe_faster_whisper(case: Case):
+    run = bench_transcribe_with_whisper(case)[0]
+
+    def run_with_backend():
+        yts.configure_asr("faster-whisper", batch_size=8)
+        try:
+            return run()
+        finally:
+            yts.configure_asr()
+
+    return run_with_backend, len(case.segments)
+
+
+def bench_vad_trim(case: Case):
+    # Speech-like bursts with pauses, after a music-like tone; at most an hour
+    # of audio, to bound memory on the long cases
+    seconds = min(case.minutes, 60) * 60
+    rng = np.random.default_rng(3)
+    t = np.arange(int(seconds * yts.SAMPLE_RATE)) / yts.SAMPLE_RATE
+    bursts = np.clip(np.sin(2 * np.pi * 4 * t), 0, None) ** 2
+    audio = (0.3 * bursts * rng.standard_normal(len(t))).astype(np.float32)
+    audio[: len(t) // 10] = 0.2 * np.sin(2 * np.pi * 220 * t[: len(t) // 10])
+    settings = yts.VadSettings("energy")
+    return lambda: yts.trim_silence(audio, settings), int(seconds)
+
+
+def bench_chunk_text(case: Case):
+    return lambda: yts.chunk_text(case.transcript), len(case.transcript)
+
+
+def bench_chunk_segments(case: Case):
+    tok = FakeTokenizer()
+    window = yts._summary_window(tok)
+    return lambda: yts.chunk_segments(case.table, tok, window), len(case.segments)
+
+
+def bench_summarize_transcript(case: Case):
+    return lambda: yts.summarize_transcript(case.table, "bench"), len(case.segments)
+
+
+def bench_extractive_summary(case: Case):
+    return lambda: yts._extractive_summary(case.transcript), len(case.segments)
+
+
+def _bench_diarization(split: bool):
+    def bench(case: Case):
+        def run():
+            FakeDiarizationPipeline.turns = case.turns
+            return yts.add_diarization(
+                case.workdir / "audio.webm", case.table, split_speakers=split
+            )
+
+        return run, len(case.segments)
+
+    return bench
+
+
+def bench_generate_content(case: Case):
+    summary = case.summary
+    return (
+        lambda: yts.generate_content("dQw4w9WgXcQ", "Title", summary, case.table),
+        len(case.segments),
+    )
+
+
+def _bench_export(fmt: str):
+    def bench(case: Case):
+        path = case.workdir / f"out.{fmt}"
+        return lambda: yts.export_content(case.content, path, fmt), len(case.segments)
+
+    return bench
+
+
+def bench_index_add(case: Case):
+    runs = iter(range(10**9))
+
+    def run():
+        # A fresh index per call, so every run does the same work
+        index = yts.TranscriptIndex(case.workdir / f"index-add-{next(runs)}")
+        index.add(case.content)
+        index.flush()
+
+    return run, len(case.segments)
+
+
+def bench_index_search(case: Case):
+    index = yts.TranscriptIndex(case.workdir / "index-search", flush_every=100)
+    for i in range(100):
+        content = dict(case.content, url=f"https://www.youtube.com/watch?v=v{i:010d}")
+        index.add(content)
+    index.flush()
+    queries = ["model", '"important question"', "speaker window answer"]
+    return lambda: [index.search(q) for q in queries], len(queries)
+
+
+def bench_archive_add(case: Case):
+    runs = iter(range(10**9))
+
+    def run():
+        # A fresh archive per call, so every run does the same work
+        archive = yts.ArchiveWriter(case.workdir / f"archive-add-{next(runs)}")
+        archive.add(case.content)
+        archive.close()
+
+    return run, len(case.segments)
+
+
+def bench_archive_get(case: Case):
+    archive = yts.ArchiveWriter(case.workdir / "archive-get", flush_every=100)
+    for i in range(100):
+        archive.add(
+            dict(case.content, url=f"https://www.youtube.com/watch?v=v{i:010d}")
+        )
+    archive.close()
+    reader = yts.ArchiveReader(archive.root)
+    return lambda: reader.get("v0000000050"), len(case.segments)
+
+
+BENCHMARKS: Dict[str, Callable[[Case], Tuple[Callable[[], Any], int]]] = {
+    "extract_video_id": bench_extract_video_id,
+    "fetch_captions": bench_fetch_captions,
+    "download_audio": bench_download_audio,
+    "transcribe_with_whisper": bench_transcribe_with_whisper,
+    "transcribe_faster_whisper": bench_transcribe_faster_whisper,
+    "vad_trim": bench_vad_trim,
+    "chunk_text": bench_chunk_text,
+    "chunk_segments": bench_chunk_segments,
+    "summarize_transcript": bench_summarize_transcript,
+    "extractive_summary": bench_extractive_summary,
+    "add_diarization": _bench_diarization(split=False),
+    "add_diarization_split": _bench_diarization(split=True),
+    "generate_content": bench_generate_content,
+    **{f"export_{fmt}": _bench_export(fmt) for fmt in yts.EXPORT_FORMATS},
+    "index_add": bench_index_add,
+    "index_search": bench_index_search,
+    "archive_add": bench_archive_add,
+    "archive_get": bench_archive_get,
+}
+
+
+def time_call(fn: Callable[[], Any], repeat: int) -> List[float]:
+    fn()  # warm-up: model manager, lazy imports, first-touch allocations
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return times
+
+
+def run_suite(
+    durations: List[float], stages: List[str], repeat: int
+) -> List[Dict[str, Any]]:
+    results = []
+    with tempfile.TemporaryDirectory() as td:
+        for minutes in durations:
+            case = Case(minutes, Path(td))
+            for stage in stages:
+                fn, items = BENCHMARKS[stage](case)
+                times = time_call(fn, repeat)
+                median = statistics.median(times)
+                result = {
+                    "stage": stage,
+                    "minutes": minutes,
+                    "segments": len(case.segments),
+                    "items": items,
+                    "repeat": repeat,
+                    "min_s": min(times),
+                    "median_s": median,
+                    "mean_s": statistics.fmean(times),
+                    "items_per_s": items / median if median > 0 else None,
+                }
+                results.append(result)
+                print(
+                    f"{stage:<24} {minutes:>7g} min {len(case.segments):>7} seg "
+                    f"median {median * 1000:10.2f} ms  min {min(times) * 1000:10.2f} ms",
+                    flush=True,
+                )
+    return results
+
+
+def environment() -> Dict[str, Any]:
+    return {
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "numpy": getattr(yts.np, "__version__", None),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+
+# ---------------------------------------------------------------------------
+# Comparison
+# ---------------------------------------------------------------------------
+
+
+def compare(
+    baseline: Dict[str, Any],
+    current: Dict[str, Any],
+    threshold: float,
+    min_seconds: float,
+) -> List[Dict[str, Any]]:
+    """Stages whose median slowed down by more than ``threshold`` (a fraction).
+
+    Timings below ``min_seconds`` in both runs are treated as noise.
+    """
+    base = {(r["stage"], r["minutes"]): r for r in baseline["results"]}
+    regressions = []
+    for r in current["results"]:
+        b = base.get((r["stage"], r["minutes"]))
+        if b is None:
+            continue
+        ratio = r["median_s"] / b["median_s"] if b["median_s"] > 0 else float("inf")
+        status = "ok"
+        if max(r["median_s"], b["median_s"]) >= min_seconds:
+            if ratio > 1 + threshold:
+                status = "REGRESSION"
+                regressions.append(
+                    {**r, "baseline_median_s": b["median_s"], "ratio": ratio}
+                )
+            elif ratio < 1 - threshold:
+                status = "faster"
+        print(
+            f"{r['stage']:<24} {r['minutes']:>7g} min "
+            f"{b['median_s'] * 1000:10.2f} -> {r['median_s'] * 1000:10.2f} ms "
+            f"x{ratio:5.2f}  {status}"
+        )
+    return regressions
+
+
+def _float_list(value: str) -> List[float]:
+    try:
+        return [float(v) for v in value.split(",") if v.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected comma-separated numbers: {value}")
+
+
+def _stage_list(value: str) -> List[str]:
+    stages = [v.strip() for v in value.split(",") if v.strip()]
+    unknown = [s for s in stages if s not in BENCHMARKS]
+    if unknown:
+        raise argparse.ArgumentTypeError(
+            f"unknown stage(s) {', '.join(unknown)}; choose from {', '.join(BENCHMARKS)}"
+        )
+    return stages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--durations",
+        type=_float_list,
+        default=[1, 10, 60, 600],
+        help="Synthetic transcript lengths in minutes (default: 1,10,60,600)",
+    )
+    parser.add_argument(
+        "--stages",
+        type=_stage_list,
+        default=list(BENCHMARKS),
+        help="Comma-separated stages to run (default: all)",
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per stage")
+    parser.add_argument("--json", type=Path, help="Write results to this JSON file")
+    parser.add_argument(
+        "--compare", type=Path, help="Baseline results JSON to check for regressions"
+    )
+    parser.add_argument(
+        "--against",
+        type=Path,
+        help="With --compare: compare this saved run instead of running the suite",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.15,
+        help="Allowed median slowdown before flagging a regression (default: 0.15)",
+    )
+    parser.add_argument(
+        "--min-seconds",
+        type=float,
+        default=0.001,
+        help="Ignore stages faster than this in both runs (default: 0.001)",
+    )
+    args = parser.parse_args()
+
+    if args.against is not None:
+        if args.compare is None:
+            parser.error("--against requires --compare")
+        current = json.loads(args.against.read_text())
+    else:
+        install_fakes()
+        current = {
+            "environment": environment(),
+            "results": run_suite(args.durations, args.stages, max(1, args.repeat)),
+        }
+        if args.json:
+            args.json.write_text(json.dumps(current, indent=2))
+            print(f"Wrote {args.json}")
+
+    if args.compare is not None:
+        baseline = json.loads(args.compare.read_text())
+        print(f"\nComparing against {args.compare} (threshold {args.threshold:.0%})")
+        regressions = compare(baseline, current, args.threshold, args.min_seconds)
+        if regressions:
+            print(f"FAIL: {len(regressions)} regression(s)")
+            sys.exit(1)
+        print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""Startup benchmark for the caption-only path.
+
+Imports yt_transcribe_and_summarize in a fresh interpreter, runs the work a
+caption-only JSON export needs (ID parsing, content generation, export) with a
+canned transcript, and checks import time, peak RSS, and that none of the heavy
+backends (torch, whisper, faster-whisper, transformers, yt-dlp, weasyprint,
+pyannote) were imported along the way.
+
+Usage:
+    python bench_startup.py [--max-import-seconds 1.5] [--max-rss-mb 200] [--runs 3]
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+HEAVY_MODULES = [
+    "torch",
+    "whisper",
+    "faster_whisper",
+    "ctranslate2",
+    "pyarrow",
+    "transformers",
+    "yt_dlp",
+    "weasyprint",
+    "pyannote",
+]
+
+# Runs in the child interpreter; prints one JSON line with the measurements
+_CHILD = r"""
+import json, resource, sys, tempfile, time
+from pathlib import Path
+
+t0 = time.perf_counter()
+import yt_transcribe_and_summarize as yts
+import_seconds = time.perf_counter() - t0
+
+video_id = yts.extract_video_id("https://www.youtube.com/watch?v=dQw4w9WgXcQ")
+segments = [
+    yts.Segment(start=i * 2.0, end=i * 2.0 + 2.0, text=f"caption line {i}.")
+    for i in range(2000)
+]
+summary = yts.Summary(tldr="tldr", detailed="detailed")
+content = yts.generate_content(video_id, "Title", summary, segments)
+with tempfile.TemporaryDirectory() as td:
+    yts.export_content(content, Path(td) / "out.json", "json")
+total_seconds = time.perf_counter() - t0
+
+rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+if sys.platform == "darwin":  # bytes on macOS
+    rss_kb //= 1024
+heavy = sorted(
+    {name.split(".")[0] for name in sys.modules} & set(%(heavy)r)
+)
+print(json.dumps({
+    "import_seconds": import_seconds,
+    "total_seconds": total_seconds,
+    "rss_mb": rss_kb / 1024,
+    "heavy_modules": heavy,
+    "backends": yts.loaded_backends(),
+}))
+""" % {"heavy": HEAVY_MODULES}
+
+
+def run_once() -> dict:
+    out = subprocess.run(
+        [sys.executable, "-c", _CHILD],
+        cwd=Path(__file__).resolve().parent,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--max-import-seconds", type=float, default=1.5)
+    parser.add_argument("--max-rss-mb", type=float, default=200.0)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    runs = [run_once() for _ in range(max(1, args.runs))]
+    best = min(runs, key=lambda r: r["import_seconds"])
+    print(json.dumps(best, indent=2))
+
+    failures = []
+    if best["import_seconds"] > args.max_import_seconds:
+        failures.append(
+            f"import took {best['import_seconds']:.2f}s "
+            f"(limit {args.max_import_seconds:.2f}s)"
+        )
+    if best["rss_mb"] > args.max_rss_mb:
+        failures.append(
+            f"peak RSS {best['rss_mb']:.0f} MB (limit {args.max_rss_mb:.0f} MB)"
+        )
+    if best["heavy_modules"]:
+        failures.append("heavy backends imported: " + ", ".join(best["heavy_modules"]))
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,106 @@
 #!/usr/bin/env python3
 """Simple Streamlit GUI demo."""
 
+import os
+import time
+import requests
 import streamlit as st
-import tempfile
-import base64
-from pathlib import Path
 
 from yt_transcribe_and_summarize import (
-    extract_video_id,
-    fetch_video_title,
-    get_transcript,
-    summarize_transcript,
-    generate_content,
-    export_content,
+    JobClient,
+    JobQueue,
+    PipelineOptions,
+    format_timestamp,
+    render_bytes,
+    segment_rows,
 )
 
+# Pending jobs are polled this often (seconds)
+POLL_INTERVAL = 1.0
+# Most recent transcript lines shown while a job runs (keeps reruns cheap)
+LIVE_SEGMENTS = 20
+
+
+@st.cache_resource
+def get_job_queue() -> JobQueue:
+    """One background worker pool per process, shared by every session.
+
+    Models stay loaded between jobs, a video already being processed for
+    another user is not processed twice, and finished results are reused.
+    """
+    workers = int(os.getenv("YT_STREAMLIT_WORKERS", "2"))
+    return JobQueue(workers, PipelineOptions(formats=[]), reuse_done=True).start()
+
+
+@st.cache_resource
+def get_job_client(server_url: str) -> JobClient:
+    return JobClient(server_url)
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def fetch_remote_result(server_url: str, job_id: str) -> dict:
+    return get_job_client(server_url).result(job_id)
+
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def export_bytes(job_id: str, fmt: str, _content: dict) -> bytes:
+    # Keyed by job id; the content itself is not hashed
+    return render_bytes(_content, fmt)
+
+
+def submit(urls, options):
+    if server_url:
+        return [job["id"] for job in get_job_client(server_url).submit(urls, options)]
+    jobs = get_job_queue()
+    return [jobs.submit(url, options)[0].id for url in urls]
+
+
+def _expired(error):
+    # The server answers 404 for jobs it no longer keeps
+    return error.response is not None and error.response.status_code == 404
+
+
+def job_status(job_id):
+    # Includes the segments and partial summaries streamed so far
+    if server_url:
+        try:
+            return get_job_client(server_url).status(job_id, progress=LIVE_SEGMENTS)
+        except requests.HTTPError as e:
+            if _expired(e):
+                return None
+            raise
+    return get_job_queue().status(job_id, progress=LIVE_SEGMENTS)
+
+
+def job_content(job_id):
+    if server_url:
+        try:
+            return fetch_remote_result(server_url, job_id)
+        except requests.HTTPError as e:
+            if _expired(e):
+                return None
+            raise
+    # None once the queue has dropped the finished job
+    job = get_job_queue().get(job_id)
+    return job.content if job else None
+
+
+def show_progress(status):
+    """Live view of a queued or running job: stage, partial summaries, latest lines."""
+    stage = f" ({status['stage']})" if status.get("stage") else ""
+    progress = status.get("progress") or {}
+    count = progress.get("segment_count", 0)
+    segments = progress.get("segments") or []
+    if segments:
+        stage += f": {count} segments, up to {format_timestamp(segments[-1]['end'] or 0.0)}"
+    st.info(f"{status['title'] or status['url']}: {status['state']}{stage}…")
+    for partial in progress.get("partials") or []:
+        span = f"{format_timestamp(partial['start'])}–{format_timestamp(partial['end'])}"
+        st.markdown(f"**{span}:** {partial['text']}")
+    if segments:
+        st.text("\n".join(seg["text"] for seg in segments))
+
+
 st.title("🗣️ YouTube Transcript & Summary Demo")
 
 # Input
@@ -24,69 +110,93 @@ whisper_model = st.selectbox("Whisper Model", ["tiny", "base", "small", "medium"
 summary_model = st.text_input("Summary Model", "facebook/bart-large-cnn")
 use_diarization = st.checkbox("Enable Speaker Diarization (requires HF_TOKEN)")
 output_format = st.selectbox("Output Format", ["md", "pdf", "html", "json"])
+refresh_cache = st.checkbox("Ignore cached transcripts (re-fetch / re-transcribe)")
+# With a job server (yt_transcribe_and_summarize.py --serve) this app is only a client
+server_url = st.sidebar.text_input("Job server URL (optional)", os.getenv("YT_JOB_SERVER", ""))
+
+if "job_ids" not in st.session_state:
+    st.session_state.job_ids = []
+    st.session_state.submit_errors = []
 
 if st.button("Process", type="primary"):
     urls = [u.strip() for u in urls_input.split('\n') if u.strip()]
     if not urls:
         st.warning("Enter at least one URL")
         st.stop()
-
-    all_contents = []
+    options = {
+        "lang": lang,
+        "whisper_model": whisper_model,
+        "summary_model": summary_model,
+        "use_diarization": use_diarization,
+        "refresh": refresh_cache,
+    }
+    # Jobs run in the background; this handler only queues them
+    st.session_state.job_ids = []
+    st.session_state.submit_errors = []
     for url in urls:
-        with st.spinner(f"Processing {url}..."):
-            try:
-                video_id = extract_video_id(url)
-                title = fetch_video_title(video_id)
-                segments = get_transcript(url, lang, whisper_model, use_diarization)
-                if segments:
-                    summary = summarize_transcript(segments, summary_model)
-                    content = generate_content(video_id, title, summary, segments)
-                    all_contents.append(content)
-                    st.success(f"Processed: {title}")
-                else:
-                    st.error(f"No transcript for {url}")
-            except Exception as e:
-                st.error(f"Error with {url}: {e}")
-
-    if all_contents:
-        # Display results
-        for content in all_contents:
-            st.markdown(f"## {content['title']}")
-            st.markdown(f"Source: {content['url']}")
-            st.markdown("### TLTR")
-            st.markdown(content['tldr'])
-            st.markdown("### Detailed Summary")
-            st.markdown(content['detailed'])
-            with st.expander("Full Transcript"):
-                st.text(content['transcript'])
-            # Timestamped
-            segments = content.get('segments', [])
-            if segments:
-                with st.expander("Timestamped Transcript"):
-                    for seg in segments:
-                        start = seg.get('start', 0.0)
-                        start_str = f"{int(start // 60):02d}:{start % 60:05.2f}"
-                        speaker = f" [{seg.get('speaker')}]" if seg.get('speaker') else ""
-                        st.markdown(f"**{start_str}{speaker}:** {seg.get('text', '')}")
-
-        # Download buttons
-        for content in all_contents:
-            title = content['title']
-            safe_title = "".join(c for c in title if c.isalnum() or c in (' ', '-', '_')).rstrip()[:50]
-            filename = f"{safe_title}.{output_format}"
-            with tempfile.NamedTemporaryFile(suffix=f".{output_format}", delete=False) as tmp:
-                tmp_path = Path(tmp.name)
-                export_content(content, tmp_path, output_format)
-                with open(tmp_path, "rb") as f:
-                    data = f.read()
-                st.download_button(
-                    label=f"Download {title} ({output_format.upper()})",
-                    data=data,
-                    file_name=filename,
-                    mime="application/octet-stream" if output_format == "json" else f"application/{output_format}",
-                    key=f"download_{safe_title}"
-                )
-                try:
-                    tmp_path.unlink()
-                except PermissionError:
-                    print(f"Could not delete temp file {tmp_path} (likely downloading); will clean later.")
\ No newline at end of file
+        try:
+            st.session_state.job_ids += submit([url], options)
+        except Exception as e:
+            st.session_state.submit_errors.append(f"Error with {url}: {e}")
+
+for message in st.session_state.submit_errors:
+    st.error(message)
+
+pending = []
+for job_id in st.session_state.job_ids:
+    status = job_status(job_id)
+    if status is None:
+        st.warning(f"Job {job_id} has expired; process the video again.")
+        continue
+    if status["state"] in ("queued", "running"):
+        pending.append(status)
+        continue
+    if status["state"] != "done":
+        st.error(f"Error with {status['url']}: {status['error'] or status['state']}")
+        continue
+
+    # Display results
+    content = job_content(job_id)
+    if content is None:
+        st.warning(f"Results for {status['url']} have expired; process the video again.")
+        continue
+    st.markdown(f"## {content['title']}")
+    st.markdown(f"Source: {content['url']}")
+    st.markdown("### TLTR")
+    st.markdown(content['tldr'])
+    st.markdown("### Detailed Summary")
+    st.markdown(content['detailed'])
+    with st.expander("Full Transcript"):
+        st.text(content['transcript'])
+    # Timestamped
+    segments = content.get('segments', [])
+    if segments:
+        with st.expander("Timestamped Transcript"):
+            for start, _, text, speaker in segment_rows(segments):
+                start = start or 0.0
+                start_str = f"{int(start // 60):02d}:{start % 60:05.2f}"
+                speaker = f" [{speaker}]" if speaker else ""
+                st.markdown(f"**{start_str}{speaker}:** {text}")
+
+    # Download button; the export is rendered in memory once per job and format
+    title = content['title']
+    safe_title = "".join(c for c in title if c.isalnum() or c in (' ', '-', '_')).rstrip()[:50]
+    try:
+        data = export_bytes(job_id, output_format, content)
+    except Exception as e:
+        st.error(f"Could not export {title} as {output_format.upper()}: {e}")
+        continue
+    st.download_button(
+        label=f"Download {title} ({output_format.upper()})",
+        data=data,
+        file_name=f"{safe_title}.{output_format}",
+        mime="application/octet-stream" if output_format == "json" else f"application/{output_format}",
+        key=f"download_{job_id}"
+    )
+
+if pending:
+    for status in pending:
+        show_progress(status)
+    # Poll: rerun the script until every job has finished
+    time.sleep(POLL_INTERVAL)
+    st.rerun()
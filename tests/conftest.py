@@ -0,0 +1,63 @@
+"""Shared fixtures: every external backend replaced by the bench_pipeline stand-ins."""
+
+import os
+import sys
+import textwrap
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+import bench_pipeline  # noqa: E402
+import yt_transcribe_and_summarize as yts  # noqa: E402
+
+
+@pytest.fixture
+def fakes(monkeypatch, tmp_path):
+    """Install the stand-ins for one test and undo every global they touch."""
+    monkeypatch.setattr(yts, "_backends", dict(yts._backends))
+    monkeypatch.setattr(yts, "YouTubeTranscriptApi", yts.YouTubeTranscriptApi)
+    for cache in (yts.TRANSCRIPT_CACHE, yts.SUMMARY_CACHE):
+        monkeypatch.setattr(cache, "root", cache.root)
+        monkeypatch.setattr(cache, "enabled", cache.enabled)
+    bench_pipeline.install_fakes()
+    yts.configure_caches(tmp_path / "cache", enabled=False)
+    monkeypatch.setattr(yts, "fetch_video_title", lambda vid: f"Title {vid}")
+    monkeypatch.setattr(
+        yts._backends["transformers"],
+        "pipeline",
+        lambda task, **kwargs: bench_pipeline.fake_summarization_pipeline,
+    )
+    monkeypatch.setattr(
+        bench_pipeline.FakeTranscriptApi, "entries", bench_pipeline.make_entries(3)
+    )
+    return bench_pipeline
+
+
+# Runs first in every spawned worker process (via PYTHONPATH), so workers use
+# the same stand-ins as the test process
+_WORKER_SITE = """
+import os
+import sys
+
+sys.path.insert(0, {root!r})
+import bench_pipeline as b
+import yt_transcribe_and_summarize as y
+
+b.install_fakes()
+y.configure_caches(enabled=False)
+y.fetch_video_title = lambda vid: f"Title {{vid}}"
+y._backends["transformers"].pipeline = lambda task, **k: b.fake_summarization_pipeline
+b.FakeTranscriptApi.entries = b.make_entries(3)
+"""
+
+
+def fake_workers(tmp_path: Path, monkeypatch, extra: str = ""):
+    """Make spawned worker processes install the stand-ins, then run ``extra``."""
+    site = tmp_path / "site"
+    site.mkdir(exist_ok=True)
+    source = _WORKER_SITE.format(root=str(ROOT)) + textwrap.dedent(extra)
+    (site / "sitecustomize.py").write_text(source)
+    monkeypatch.setenv("PYTHONPATH", os.pathsep.join([str(site), str(ROOT)]))
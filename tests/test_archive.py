@@ -0,0 +1,47 @@
+import pytest
+
+import yt_transcribe_and_summarize as yts
+
+
+def _content(video_id: str, tldr: str = "Short.") -> dict:
+    segments = [
+        yts.Segment(0.0, 2.5, f"Hello from {video_id}.", "SPEAKER_00"),
+        yts.Segment(2.5, 5.0, "Second line.", None),
+    ]
+    summary = yts.Summary(tldr=tldr, detailed="Longer.")
+    return yts.generate_content(video_id, f"Title {video_id}", summary, segments)
+
+
+@pytest.mark.parametrize("fmt", ["jsonl", "parquet"])
+def test_get_matches_generate_content_and_compact_drops_old_records(tmp_path, fmt):
+    if fmt == "parquet":
+        pytest.importorskip("pyarrow")
+    ids = ["aaaaaaaaaaa", "bbbbbbbbbbb", "ccccccccccc"]
+    writer = yts.ArchiveWriter(tmp_path, fmt, flush_every=2)
+    for video_id in ids:
+        writer.add(_content(video_id))
+    writer.add(_content(ids[0], tldr="Updated."))
+    writer.close()
+    old_parts = sorted(p.name for p in tmp_path.glob("part-*"))
+
+    content = yts.ArchiveReader(tmp_path).get(ids[1])
+    expected = _content(ids[1])
+    assert isinstance(content["segments"], yts.SegmentTable)
+    assert list(content["segments"].rows()) == list(expected["segments"].rows())
+    assert {k: v for k, v in content.items() if k != "segments"} == {
+        k: v for k, v in expected.items() if k != "segments"
+    }
+
+    writer.compact()
+
+    new_parts = sorted(p.name for p in tmp_path.glob("part-*"))
+    assert not set(new_parts) & set(old_parts)
+    reader = yts.ArchiveReader(tmp_path)
+    assert sorted(reader.video_ids()) == ids
+    assert reader.get(ids[0])["tldr"] == "Updated."
+    assert len(reader.column("start")) == 2 * len(ids)
+    # Still appendable after compaction, also by a new writer
+    writer = yts.ArchiveWriter(tmp_path, fmt)
+    writer.add(_content("ddddddddddd"))
+    writer.close()
+    assert len(yts.ArchiveReader(tmp_path)) == 4
@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+import yt_transcribe_and_summarize as yts
+from conftest import fake_workers
+
+# faster-whisper model that reports the settings it was built and called with
+ECHO_MODEL = """
+import itertools
+import types
+
+_calls = itertools.count()
+
+class EchoModel:
+    def __init__(self, model_name=None, device=None, compute_type=None):
+        self.label = f"{model_name} {compute_type}"
+
+    def transcribe(self, audio, beam_size=5, **kwargs):
+        text = f"{next(_calls)}-{os.getpid()} {self.label} beam{beam_size}"
+        seg = types.SimpleNamespace(start=0.0, end=len(audio) / 16000, text=text)
+        return iter([seg]), None
+
+y._backends["faster_whisper"].WhisperModel = EchoModel
+"""
+
+
+def test_parallel_windows_use_the_configured_backend(fakes, tmp_path, monkeypatch):
+    fake_workers(tmp_path, monkeypatch, ECHO_MODEL)
+    monkeypatch.setattr(yts, "ASR", yts.ASR)
+    yts.configure_asr("faster-whisper", compute_type="int8", beam_size=1)
+    audio = np.zeros(3 * yts.SAMPLE_RATE, dtype=np.float32)
+
+    table = yts.transcribe_parallel(audio, "tiny", workers=2, window_s=1.0)
+
+    texts = [text for _, _, text, _ in table.rows()]
+    assert len(texts) > 1
+    assert all(text.endswith(" tiny int8 beam1") for text in texts)
+
+
+def test_cache_tag_changes_only_with_settings_that_change_the_transcript():
+    tag = yts.AsrSettings().cache_tag
+
+    # Default whisper settings keep existing cache entries valid
+    assert tag("small") == "small"
+    assert yts.AsrSettings(batch_size=8).cache_tag("small") == "small"
+    tags = {
+        yts.AsrSettings(compute_type="float32").cache_tag("small"),
+        yts.AsrSettings(beam_size=5).cache_tag("small"),
+        yts.AsrSettings("faster-whisper", "int8").cache_tag("small"),
+        yts.AsrSettings("faster-whisper", "int8", 5).cache_tag("small"),
+        yts.AsrSettings("faster-whisper", "float16").cache_tag("small"),
+        yts.AsrSettings("faster-whisper", "int8").cache_tag("medium"),
+    }
+    assert len(tags) == 6 and "small" not in tags
+    batched = yts.AsrSettings("faster-whisper", "int8", 5, batch_size=4)
+    assert batched.cache_tag("small") == yts.AsrSettings(
+        "faster-whisper", "int8", 5
+    ).cache_tag("small")
+
+
+def test_unsupported_compute_type_is_rejected(monkeypatch):
+    monkeypatch.setattr(yts, "ASR", yts.ASR)
+    before = yts.ASR
+
+    for backend, compute_type in (("whisper", "int8"), ("faster-whisper", "fp8")):
+        with pytest.raises(ValueError, match="does not support compute type"):
+            yts.configure_asr(backend, compute_type)
+    assert yts.ASR is before
+
+    yts.configure_asr("whisper", "float32")
+    assert yts.ASR.compute_type == "float32"
+    yts.configure_asr("faster-whisper", "int8_float16")
+    assert yts.ASR.compute_type == "int8_float16"
+    yts.configure_asr("faster-whisper")
+    assert yts.ASR.compute_type == "int8"
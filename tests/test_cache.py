@@ -0,0 +1,20 @@
+import errno
+
+import yt_transcribe_and_summarize as yts
+
+
+def test_failed_put_leaves_no_temp_file(tmp_path, monkeypatch):
+    cache = yts.DiskCache(tmp_path)
+    key = yts.DiskCache.key("transcript", "abc")
+
+    def disk_full(src, dst):
+        raise OSError(errno.ENOSPC, "No space left on device")
+
+    monkeypatch.setattr(yts.os, "replace", disk_full)
+    cache.put(key, b"data")
+    monkeypatch.undo()
+
+    assert [p for p in tmp_path.rglob("*") if p.is_file()] == []
+    assert cache.get(key) is None
+    cache.put(key, b"data")
+    assert cache.get(key) == b"data"
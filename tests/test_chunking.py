@@ -0,0 +1,50 @@
+import yt_transcribe_and_summarize as yts
+
+
+class _WordTokenizer:
+    """One token per word, plus BOS/EOS like the BART tokenizer."""
+
+    def num_special_tokens_to_add(self, pair=False):
+        return 2
+
+    def __call__(self, texts, add_special_tokens=True):
+        return {"input_ids": [text.split() for text in texts]}
+
+
+def _segments(n):
+    return [
+        yts.Segment(i * 10.0, i * 10.0 + 10.0, f"word{i}a word{i}b") for i in range(n)
+    ]
+
+
+def test_chunks_overlap_and_keep_their_time_span():
+    chunks = yts.chunk_segments(
+        _segments(6), _WordTokenizer(), max_tokens=8, overlap_tokens=2
+    )
+
+    # Six tokens per chunk after the two special tokens; the last segment of
+    # each chunk is repeated at the start of the next one
+    assert [(c.start, c.end, c.first_segment, c.n_tokens) for c in chunks] == [
+        (0.0, 30.0, 0, 6),
+        (20.0, 50.0, 2, 6),
+        (40.0, 60.0, 4, 4),
+    ]
+    assert chunks[1].text == "word2a word2b word3a word3b word4a word4b"
+    no_overlap = yts.chunk_segments(_segments(6), _WordTokenizer(), max_tokens=8)
+    assert [(c.start, c.end) for c in no_overlap] == [(0.0, 30.0), (30.0, 60.0)]
+
+
+def test_oversized_segment_is_split_at_sentences_within_its_span():
+    text = "One two three four. Five six seven eight. Nine ten eleven twelve."
+    segments = [yts.Segment(100.0, 130.0, text), yts.Segment(130.0, 131.0, "   ")]
+
+    chunks = yts.chunk_segments(segments, _WordTokenizer(), max_tokens=6)
+
+    assert [c.text for c in chunks] == [
+        "One two three four.",
+        "Five six seven eight.",
+        "Nine ten eleven twelve.",
+    ]
+    assert chunks[0].start == 100.0 and chunks[-1].end == 130.0
+    assert all(a.end <= b.start for a, b in zip(chunks, chunks[1:]))
+    assert all(c.first_segment == 0 for c in chunks)
@@ -0,0 +1,40 @@
+import os
+import sys
+
+import numpy as np
+
+import yt_transcribe_and_summarize as yts
+
+# Stand-in ffmpeg: floods stderr before writing any audio, then writes
+# one second of a constant taken from the input file
+FAKE_FFMPEG = f"""#!{sys.executable}
+import sys
+sys.stderr.write("warning\\n" * 200000)
+sys.stderr.flush()
+value = float(open(sys.argv[sys.argv.index("-i") + 1]).read())
+sys.stdout.buffer.write(bytes(__import__("array").array("f", [value] * 16000)))
+"""
+
+
+def test_decode_audio_noisy_stderr_and_unique_spill_files(tmp_path, monkeypatch):
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    ffmpeg = bin_dir / "ffmpeg"
+    ffmpeg.write_text(FAKE_FFMPEG)
+    ffmpeg.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+
+    spill_dir = tmp_path / "spill"
+    spill_dir.mkdir()
+    audio = []
+    for value, sub in ((1.0, "a"), (2.0, "b")):
+        # Same stem in different folders
+        src = tmp_path / sub / "talk.m4a"
+        src.parent.mkdir()
+        src.write_text(str(value))
+        audio.append(yts.decode_audio(src, mmap_dir=spill_dir, mmap_seconds=0.1))
+
+    assert all(isinstance(a, np.memmap) for a in audio)
+    assert audio[0].filename != audio[1].filename
+    assert np.all(audio[0] == 1.0) and np.all(audio[1] == 2.0)
+    assert len(audio[0]) == 16000
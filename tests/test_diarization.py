@@ -0,0 +1,60 @@
+import yt_transcribe_and_summarize as yts
+
+# Two speakers taking turns, with a gap and an overlap (pyannote can do both)
+TURN_STARTS = [0.0, 4.0, 9.0, 11.5]
+TURN_ENDS = [4.0, 9.0, 12.0, 20.0]
+TURN_LABELS = ["A", "B", "A", "B"]
+
+
+def test_align_speakers_picks_largest_total_overlap():
+    seg_starts = [0.0, 3.0, 8.5, 12.5, 25.0]
+    seg_ends = [3.0, 8.0, 11.0, 14.0, 26.0]
+
+    labels = yts.align_speakers(
+        seg_starts, seg_ends, TURN_STARTS, TURN_ENDS, TURN_LABELS
+    )
+
+    # 3-8: 1 s of A, 4 s of B; 8.5-11: 0.5 s of B, 2 s of A; 25-26: no turn
+    assert labels == ["A", "B", "A", "B", None]
+
+
+def test_assign_speakers_labels_lists_and_tables_alike():
+    segments = [
+        yts.Segment(0.0, 3.0, "hello there"),
+        yts.Segment(3.0, 8.0, "how are you"),
+        yts.Segment(25.0, 26.0, "after the end", speaker="SPEAKER_09"),
+    ]
+    table = yts.SegmentTable.from_segments(segments)
+
+    labelled = yts.assign_speakers(segments, TURN_STARTS, TURN_ENDS, TURN_LABELS)
+    labelled_table = yts.assign_speakers(table, TURN_STARTS, TURN_ENDS, TURN_LABELS)
+
+    # Segments without any overlapping turn keep their label
+    assert [s.speaker for s in labelled] == ["A", "B", "SPEAKER_09"]
+    assert isinstance(labelled_table, yts.SegmentTable)
+    assert labelled_table.speaker_labels() == ["A", "B", "SPEAKER_09"]
+
+
+def test_assign_speakers_splits_segments_at_speaker_changes():
+    segments = [
+        yts.Segment(0.0, 2.0, "only speaker a"),
+        # 2 s of A then 4 s of B: a third of the words go to A
+        yts.Segment(2.0, 8.0, "one two three four five six"),
+    ]
+
+    out = yts.assign_speakers(segments, TURN_STARTS, TURN_ENDS, TURN_LABELS, split=True)
+
+    assert [(s.start, s.end, s.text, s.speaker) for s in out] == [
+        (0.0, 2.0, "only speaker a", "A"),
+        (2.0, 4.0, "one two", "A"),
+        (4.0, 8.0, "three four five six", "B"),
+    ]
+    table = yts.assign_speakers(
+        yts.SegmentTable.from_segments(segments),
+        TURN_STARTS,
+        TURN_ENDS,
+        TURN_LABELS,
+        split=True,
+    )
+    assert isinstance(table, yts.SegmentTable)
+    assert list(table.rows()) == [(s.start, s.end, s.text, s.speaker) for s in out]
@@ -0,0 +1,49 @@
+import json
+
+import pytest
+
+import yt_transcribe_and_summarize as yts
+
+
+def _content():
+    segments = [
+        yts.Segment(0.0, 2.5, "Hello there.", "SPEAKER_00"),
+        yts.Segment(2.5, 5.0, "Second line.", None),
+    ]
+    summary = yts.Summary(tldr="Short.", detailed="Longer.")
+    return yts.generate_content("aaaaaaaaaaa", "A title", summary, segments)
+
+
+def test_failing_sink_leaves_no_partial_or_replaced_files(tmp_path, monkeypatch):
+    outputs = {fmt: tmp_path / f"out.{fmt}" for fmt in ("json", "md", "html")}
+    outputs["md"].write_text("previous export")
+    blocks = []
+
+    def block(self, md):
+        blocks.append(md)
+        if len(blocks) == 2:
+            raise RuntimeError("disk gone")
+
+    monkeypatch.setattr(yts._HtmlSink, "block", block)
+
+    with pytest.raises(RuntimeError, match="disk gone"):
+        yts.render_content(_content(), outputs)
+
+    # The md sink had already written blocks, but nothing was moved into place
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["out.md"]
+    assert outputs["md"].read_text() == "previous export"
+
+
+def test_all_formats_are_written_together(tmp_path):
+    outputs = {fmt: tmp_path / f"out.{fmt}" for fmt in ("json", "md", "html")}
+
+    yts.render_content(_content(), outputs)
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        "out.html",
+        "out.json",
+        "out.md",
+    ]
+    assert json.loads(outputs["json"].read_text())["tldr"] == "Short."
+    assert "Hello there." in outputs["md"].read_text()
+    assert "Second line." in outputs["html"].read_text()
@@ -0,0 +1,29 @@
+import yt_transcribe_and_summarize as yts
+
+
+def test_repeated_sentences_are_picked_once():
+    assert yts.extractive_sentences("Hello world. " * 9) == ["Hello world."]
+
+    text = "Hello world. " * 9 + "Cats purr loudly. Dogs bark often."
+    picked = yts.extractive_sentences(text)
+    assert picked.count("Hello world.") == 1
+    assert "Cats purr loudly." in picked and "Dogs bark often." in picked
+
+
+def test_extractive_tldr_is_one_whole_sentence():
+    text = "Why do rivers bend? Water erodes the outer bank. Silt settles inside."
+    assert yts._extractive_summary(text).tldr == "Why do rivers bend?"
+
+    long = " ".join(f"word{i}" for i in range(35)) + "."
+    tldr = yts._extractive_summary(long).tldr
+    assert tldr.endswith("…") and len(tldr.split()) == 30
+
+
+def test_non_latin_sentences_are_ranked_too():
+    text = "Привет мир. " * 9 + "Кошки громко мурлычут. Собаки часто лают."
+
+    assert yts.extractive_sentences(text) == [
+        "Привет мир.",
+        "Кошки громко мурлычут.",
+        "Собаки часто лают.",
+    ]
@@ -0,0 +1,111 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import yt_transcribe_and_summarize as yts
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # Keep-alive, so a reused pooled connection shows up as one client port
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.ports.append(self.client_address[1])
+            status = server.replies.pop(0) if server.replies else 200
+        body = b"ok"
+        self.send_response(status)
+        if status == 429:
+            self.send_header("Retry-After", "3600")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stand_in():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.ports = []
+    server.replies = []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    server.url = f"http://127.0.0.1:{server.server_address[1]}/"
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_retries_429_and_503_with_capped_retry_after(stand_in):
+    stand_in.replies = [429, 503]
+    client = yts.HttpClient(backoff=0.01, max_backoff=0.05)
+
+    start = time.monotonic()
+    response = client.get(stand_in.url)
+
+    assert response.status_code == 200
+    assert len(stand_in.ports) == 3
+    # Retry-After: 3600 is clamped to max_backoff
+    assert time.monotonic() - start < 2
+
+
+def test_gives_up_after_max_retries(stand_in):
+    stand_in.replies = [503] * 5
+    client = yts.HttpClient(max_retries=2, backoff=0.01)
+
+    assert client.get(stand_in.url).status_code == 503
+    assert len(stand_in.ports) == 3
+
+
+def test_token_bucket_limits_request_rate(stand_in):
+    client = yts.HttpClient(yts.TokenBucket(rate=20, burst=1))
+
+    start = time.monotonic()
+    for _ in range(6):
+        client.get(stand_in.url)
+
+    # The first request spends the burst; the other five wait 1/20 s each
+    assert time.monotonic() - start >= 5 / 20 * 0.9
+
+
+def test_threads_share_one_connection_pool(stand_in, monkeypatch):
+    monkeypatch.setattr(yts, "_http_shared", {})
+    monkeypatch.setattr(yts, "_http_local", threading.local())
+    yts.configure_http(rate=0, pool_size=4)
+
+    def fetch():
+        yts.get_http_session().get(stand_in.url).content
+
+    for _ in range(3):
+        thread = threading.Thread(target=fetch)
+        thread.start()
+        thread.join()
+    fetch()
+
+    # Four sessions, one after another, all over the same kept-alive socket
+    assert len(stand_in.ports) == 4
+    assert len(set(stand_in.ports)) == 1
+
+
+def test_captions_use_the_pooled_session(fakes, monkeypatch):
+    monkeypatch.setattr(yts, "_http_shared", {})
+    monkeypatch.setattr(yts, "_http_local", threading.local())
+    clients = []
+    monkeypatch.setattr(
+        fakes.FakeTranscriptApi,
+        "__init__",
+        lambda self, proxy_config=None, http_client=None: clients.append(http_client),
+    )
+
+    assert yts.fetch_captions("aaaaaaaaaaa", "en")
+    assert yts.fetch_captions("bbbbbbbbbbb", "en")
+
+    # One API client per thread, built on that thread's pooled HttpClient
+    assert clients == [yts.get_http_session()]
+    assert isinstance(clients[0], yts.HttpClient)
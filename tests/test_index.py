@@ -0,0 +1,101 @@
+import pytest
+
+import yt_transcribe_and_summarize as yts
+
+pytest.importorskip("numpy")
+
+
+def _content(video_id, *texts):
+    segments = [
+        yts.Segment(10.0 * i, 10.0 * i + 10.0, text, "SPEAKER_00")
+        for i, text in enumerate(texts)
+    ]
+    summary = yts.Summary(tldr="Short.", detailed="Longer.")
+    return yts.generate_content(video_id, f"Title {video_id}", summary, segments)
+
+
+def _found(index, query):
+    return [(hit.video_id, hit.start) for hit in index.search(query)]
+
+
+def test_phrases_match_words_in_order_across_segments(tmp_path):
+    index = yts.TranscriptIndex(tmp_path, flush_every=1)
+    index.add(_content("aaaaaaaaaaa", "The quick brown fox.", "Jumps over it."))
+    index.add(_content("bbbbbbbbbbb", "A brown and quick fox.", "Fox jumps."))
+    index.add(_content("ccccccccccc", "Very quick", "brown bears."))
+
+    assert _found(index, '"quick brown"') == [
+        ("aaaaaaaaaaa", 0.0),
+        # Phrases may run into the next segment and are reported where they start
+        ("ccccccccccc", 0.0),
+    ]
+    assert sorted(_found(index, "fox jumps")) == [
+        ("aaaaaaaaaaa", 0.0),
+        ("aaaaaaaaaaa", 10.0),
+        ("bbbbbbbbbbb", 0.0),
+        ("bbbbbbbbbbb", 10.0),
+    ]
+    # A segment matching both words ranks above one matching only one
+    assert _found(index, "fox jumps")[0] == ("bbbbbbbbbbb", 10.0)
+    assert index.search('"fox quick"') == []
+    hit = index.search('"brown bears"')[0]
+    assert (hit.title, hit.text, hit.speaker) == (
+        "Title ccccccccccc",
+        "brown bears.",
+        "SPEAKER_00",
+    )
+
+
+def test_reindexed_video_supersedes_its_old_entry(tmp_path):
+    index = yts.TranscriptIndex(tmp_path, flush_every=1)
+    index.add(_content("aaaaaaaaaaa", "Old wording here."))
+    index.add(_content("bbbbbbbbbbb", "Other video with old wording."))
+    index.add(_content("aaaaaaaaaaa", "New wording here."))
+
+    assert len(index) == 2
+    assert _found(index, "old") == [("bbbbbbbbbbb", 0.0)]
+    assert _found(index, "new") == [("aaaaaaaaaaa", 0.0)]
+
+    # Same answers from a fresh reader of the files on disk
+    reopened = yts.TranscriptIndex(tmp_path)
+    assert len(reopened) == 2
+    assert _found(reopened, "old") == [("bbbbbbbbbbb", 0.0)]
+    assert _found(reopened, '"new wording"') == [("aaaaaaaaaaa", 0.0)]
+
+
+def test_search_reads_the_index_that_index_writes(fakes, tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(yts, "ASR", yts.ASR)
+    monkeypatch.setattr(yts, "VAD", yts.VAD)
+    # Set after import, like a value that only comes from .env
+    monkeypatch.setenv("YT_CACHE_DIR", str(tmp_path / "env-cache"))
+    for cache_dir in (tmp_path / "cache", tmp_path / "env-cache"):
+        index = yts.TranscriptIndex(yts.default_index_dir(cache_dir))
+        index.add(_content("aaaaaaaaaaa", f"Stored under {cache_dir.name}."))
+        index.close()
+
+    for args, expected in (
+        (["--cache-dir", str(tmp_path / "cache")], "Stored under cache."),
+        ([], "Stored under env-cache."),
+    ):
+        monkeypatch.setattr("sys.argv", ["yts", "--search", "stored", *args])
+        yts.main()
+        out = capsys.readouterr().out
+        assert expected in out and "1 hit(s)" in out
+
+
+def test_non_ascii_words_are_indexed_whole(tmp_path):
+    index = yts.TranscriptIndex(tmp_path)
+    index.add(_content("aaaaaaaaaaa", "Grüße aus der Straße.", "We land in 東京 soon."))
+    index.add(_content("bbbbbbbbbbb", "Москва ждёт.", "Strasse is the Swiss spelling."))
+    index.close()
+
+    assert _found(index, "grüße") == [("aaaaaaaaaaa", 0.0)]
+    # Casefolding matches ß and ss, in both directions
+    assert sorted(_found(index, "STRASSE")) == [
+        ("aaaaaaaaaaa", 0.0),
+        ("bbbbbbbbbbb", 10.0),
+    ]
+    assert _found(index, "東京") == [("aaaaaaaaaaa", 10.0)]
+    assert _found(index, '"москва ждёт"') == [("bbbbbbbbbbb", 0.0)]
+    # "straße" is no longer split into "stra" + "e"
+    assert index.search("stra") == []
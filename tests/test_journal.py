@@ -0,0 +1,71 @@
+import yt_transcribe_and_summarize as yts
+
+
+def _opts(tmp_path, **kwargs):
+    return yts.PipelineOptions(
+        formats=["md"], output=str(tmp_path / "out"), is_batch=True, **kwargs
+    )
+
+
+def test_reopened_journal_restores_recorded_stages(tmp_path):
+    path = tmp_path / "batch.journal.jsonl"
+    opts = _opts(tmp_path)
+    segments = [yts.Segment(0.0, 2.0, "Hello there.", "SPEAKER_00")]
+    journal = yts.Journal(path, opts)
+    journal.record("aaaaaaaaaaa", "metadata", title="A title")
+    journal.save_transcript("aaaaaaaaaaa", segments)
+    journal.record("aaaaaaaaaaa", "summary", tldr="Short.", detailed="Longer.")
+    journal.close()
+    # A crash mid-write leaves a torn last line behind
+    with open(path, "a", encoding="utf-8") as fh:
+        fh.write('{"video_id": "bbbbbbbbbbb", "sta')
+
+    journal = yts.Journal(path, opts)
+    assert journal.get("aaaaaaaaaaa", "metadata")["title"] == "A title"
+    assert list(yts.segment_rows(journal.load_transcript("aaaaaaaaaaa"))) == [
+        (0.0, 2.0, "Hello there.", "SPEAKER_00")
+    ]
+    assert journal.summary("aaaaaaaaaaa") == yts.Summary("Short.", "Longer.")
+    assert journal.get("bbbbbbbbbbb", "metadata") is None
+    journal.close()
+
+    # Other transcript/summary options, or --refresh, start from scratch
+    for other, resume in (
+        (_opts(tmp_path, summary_model="other/model"), True),
+        (opts, False),
+    ):
+        journal = yts.Journal(path, other, resume=resume)
+        assert journal.get("aaaaaaaaaaa", "metadata") is None
+        assert journal.load_transcript("aaaaaaaaaaa") is None
+        journal.close()
+
+
+def test_resumed_batch_skips_finished_stages(fakes, tmp_path, monkeypatch):
+    path = tmp_path / "batch.journal.jsonl"
+    opts = _opts(tmp_path, summary_model="test/journal-summarizer")
+    ids = ["aaaaaaaaaaa", "bbbbbbbbbbb"]
+    (tmp_path / "out").mkdir()
+
+    def run():
+        journal = yts.Journal(path, opts)
+        jobs = [yts.VideoJob(url=f"https://youtu.be/{vid}") for vid in ids]
+        try:
+            return yts.run_pipeline(jobs, yts.build_stages(opts, journal=journal))
+        finally:
+            journal.close()
+
+    done = run()
+    assert [job.error for job in done] == [None, None]
+    first = {job.video_id: job.summary for job in done}
+
+    def unavailable(*args, **kwargs):
+        raise AssertionError("a finished stage ran again")
+
+    monkeypatch.setattr(yts, "fetch_video_title", unavailable)
+    monkeypatch.setattr(yts, "fetch_captions", unavailable)
+    monkeypatch.setattr(yts, "summarize_batch", unavailable)
+    again = run()
+
+    assert [job.error for job in again] == [None, None]
+    assert {job.video_id: job.summary for job in again} == first
+    assert all(job.title == f"Title {job.video_id}" for job in again)
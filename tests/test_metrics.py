@@ -0,0 +1,38 @@
+import threading
+
+import yt_transcribe_and_summarize as yts
+
+
+def test_finished_threads_leave_no_span_stacks():
+    metrics = yts.Metrics()
+
+    def work():
+        with metrics.span("outer"):
+            with metrics.span("inner"):
+                metrics.add(audio_seconds=1.0)
+        # Outside any span: counted nowhere, and no stack registered
+        metrics.add(audio_seconds=1.0)
+
+    for _ in range(20):
+        thread = threading.Thread(target=work)
+        thread.start()
+        thread.join()
+
+    assert metrics._stacks == {}
+    assert metrics.totals["outer"]["calls"] == 20
+    assert metrics.totals["outer"]["audio_seconds"] == 20.0
+
+
+def test_batch_and_single_summaries_share_one_stage(fakes, monkeypatch):
+    monkeypatch.setattr(yts.METRICS, "totals", {})
+    transcripts = [
+        [yts.Segment(0.0, 5.0, f"This talk is about {word} today.")]
+        for word in ("alpha", "beta")
+    ]
+
+    yts.summarize_batch(transcripts, "test/metrics-summarizer")
+    yts.summarize_transcript(transcripts[0], "test/metrics-summarizer")
+
+    stages = {stage for stage in yts.METRICS.totals if stage.startswith("summarize")}
+    assert stages == {"summarize_transcript"}
+    assert yts.METRICS.totals["summarize_transcript"]["calls"] == 2
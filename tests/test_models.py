@@ -0,0 +1,68 @@
+import yt_transcribe_and_summarize as yts
+
+
+class _Tensor:
+    def __init__(self, nbytes):
+        self.nbytes = nbytes
+
+    def numel(self):
+        return self.nbytes
+
+    def element_size(self):
+        return 1
+
+
+class _Model:
+    """Looks like a torch module of ``nbytes`` parameter bytes."""
+
+    def __init__(self, nbytes):
+        self._params = [_Tensor(nbytes)]
+
+    def parameters(self):
+        return iter(self._params)
+
+
+def test_least_recently_used_model_is_evicted_over_budget():
+    manager = yts.ModelManager(max_bytes=250)
+    loads = []
+
+    def get(kind, name):
+        def loader():
+            loads.append(name)
+            return _Model(100)
+
+        return manager.get(kind, name, "cpu", loader)
+
+    small = get("asr", "small")
+    get("summarizer", "bart")
+    assert get("asr", "small") is small  # now "bart" is least recently used
+    get("diarization", "pyannote")
+
+    assert manager.resident() == [
+        ("asr", "small", "cpu"),
+        ("diarization", "pyannote", "cpu"),
+    ]
+    assert manager.resident_bytes() == 200
+    get("summarizer", "bart")
+    assert loads == ["small", "bart", "pyannote", "bart"]
+    stats = manager.stats()
+    assert {
+        kind: (s["hits"], s["misses"], s["evictions"]) for kind, s in stats.items()
+    } == {
+        "asr": (1, 1, 1),
+        "summarizer": (0, 2, 1),
+        "diarization": (0, 1, 0),
+    }
+
+
+def test_model_larger_than_the_budget_stays_resident():
+    manager = yts.ModelManager(max_bytes=50)
+
+    model = manager.get("asr", "large", "cpu", lambda: _Model(100))
+
+    assert manager.resident() == [("asr", "large", "cpu")]
+    assert manager.get("asr", "large", "cpu", lambda: _Model(100)) is model
+
+    manager.evict("asr")
+    assert manager.resident() == []
+    assert manager.stats()["asr"]["evictions"] == 1
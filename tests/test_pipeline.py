@@ -0,0 +1,64 @@
+import yt_transcribe_and_summarize as yts
+
+
+def test_summarizer_failure_marks_only_its_video(fakes, monkeypatch):
+    def summarizer(texts, **kwargs):
+        if any("poison" in text for text in texts):
+            raise RuntimeError("CUDA out of memory")
+        return fakes.fake_summarization_pipeline(texts, **kwargs)
+
+    monkeypatch.setattr(
+        yts._backends["transformers"], "pipeline", lambda task, **kwargs: summarizer
+    )
+    words = ["alpha", "poison", "gamma", "delta"]
+    jobs = [
+        yts.VideoJob(
+            url=word,
+            video_id=word,
+            segments=[yts.Segment(0.0, 5.0, f"This talk is about {word} today.")],
+        )
+        for word in words
+    ]
+    # A model name of its own, so no summarizer cached by other tests is reused
+    opts = yts.PipelineOptions(formats=[], summary_model="test/flaky-summarizer")
+    stages = yts.build_stages(opts)
+    summarize = next(stage for stage in stages if stage.name == "summarize")
+
+    summarize.fn(jobs)
+
+    failed = {job.video_id: job.error for job in jobs if job.error}
+    assert list(failed) == ["poison"]
+    assert "CUDA out of memory" in failed["poison"]
+    assert all(job.summary is not None for job in jobs if job.error is None)
+
+
+def test_fetch_metadata_batch_resolves_every_video_once(fakes):
+    ids = ["aaaaaaaaaaa", "bbbbbbbbbbb", "aaaaaaaaaaa", "ccccccccccc"]
+
+    found = yts.fetch_metadata_batch(ids, "en", max_workers=3)
+
+    assert list(found) == ["aaaaaaaaaaa", "bbbbbbbbbbb", "ccccccccccc"]
+    for video_id, (title, segments) in found.items():
+        assert title == f"Title {video_id}"
+        assert len(segments) > 0
+
+
+def test_metadata_stage_fails_only_the_broken_video(fakes, monkeypatch):
+    fetch_captions = yts.fetch_captions
+
+    def flaky_captions(video_id, lang):
+        if video_id == "bbbbbbbbbbb":
+            raise RuntimeError("caption list unavailable")
+        return fetch_captions(video_id, lang)
+
+    monkeypatch.setattr(yts, "fetch_captions", flaky_captions)
+    ids = ["aaaaaaaaaaa", "bbbbbbbbbbb", "ccccccccccc"]
+    jobs = [yts.VideoJob(url=f"https://youtu.be/{vid}") for vid in ids]
+    stages = yts.build_stages(yts.PipelineOptions(formats=[]))
+    metadata = next(stage for stage in stages if stage.name == "metadata")
+
+    metadata.fn(jobs)
+
+    assert [job.error is None for job in jobs] == [True, False, True]
+    assert "caption list unavailable" in jobs[1].error
+    assert all(job.title and job.segments for job in (jobs[0], jobs[2]))
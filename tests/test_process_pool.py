@@ -0,0 +1,98 @@
+from typing import List
+
+import yt_transcribe_and_summarize as yts
+from conftest import fake_workers
+
+# A video whose caption fetch kills its worker, the way the OOM killer would
+CRASH_ON_VIDEO = """
+_fetch_captions = y.fetch_captions
+
+def fetch_captions(video_id, lang):
+    if video_id == os.environ["YT_TEST_CRASH_VIDEO"]:
+        os._exit(1)
+    return _fetch_captions(video_id, lang)
+
+y.fetch_captions = fetch_captions
+"""
+
+
+def test_dead_worker_fails_only_its_video(fakes, tmp_path, monkeypatch):
+    fake_workers(tmp_path, monkeypatch, CRASH_ON_VIDEO)
+    monkeypatch.setenv("YT_TEST_CRASH_VIDEO", "crashcrash0")
+    # Two workers even on a one-core machine (pinning to a missing core is ignored)
+    monkeypatch.setattr(yts, "available_cpus", lambda: [0, 1])
+    ids = ["aaaaaaaaaaa", "bbbbbbbbbbb", "crashcrash0", "ccccccccccc", "ddddddddddd"]
+    jobs = [yts.VideoJob(url=f"https://youtu.be/{vid}") for vid in ids]
+    opts = yts.PipelineOptions(formats=[], output=str(tmp_path), is_batch=True)
+
+    done = yts.run_process_pool(jobs, opts, workers=2, threads=1)
+
+    errors = {job.url.rsplit("/", 1)[1]: job.error for job in done}
+    assert sorted(errors) == sorted(ids)
+    assert "process died" in errors.pop("crashcrash0")
+    assert errors == dict.fromkeys(errors)
+    assert all(job.summary is not None for job in done if job.error is None)
+
+
+# Logs the pid of every calibration unit a worker runs
+LOG_UNITS = """
+_calibration_unit = y._calibration_unit
+
+def calibration_unit(audio_seconds):
+    with open(os.environ["YT_TEST_UNIT_LOG"], "a") as f:
+        f.write(f"{os.getpid()}\\n")
+    return _calibration_unit(audio_seconds)
+
+y._calibration_unit = calibration_unit
+"""
+
+
+def test_calibration_runs_one_unit_on_every_worker(fakes, tmp_path, monkeypatch):
+    fake_workers(tmp_path, monkeypatch, LOG_UNITS)
+    log = tmp_path / "units.log"
+    monkeypatch.setenv("YT_TEST_UNIT_LOG", str(log))
+    monkeypatch.setattr(yts, "available_cpus", lambda: [0, 1])
+
+    workers, threads = yts.calibrate_process_pool(
+        yts.PipelineOptions(formats=[]), audio_seconds=1.0
+    )
+
+    assert (workers, threads) in ((1, 2), (2, 1))
+    pids = log.read_text().split()
+    # 1 worker: warm-up + timed unit; 2 workers: one of each per worker
+    assert len(pids) == 6
+    assert len(set(pids[2:4])) == 2 and len(set(pids[4:6])) == 2
+
+
+# Summaries carry a tag from the environment, to tell runs apart
+TAG_SUMMARIES = """
+_summarize = b.fake_summarization_pipeline
+
+def fake_summarization_pipeline(texts, **kwargs):
+    tag = os.environ["YT_TEST_SUMMARY_TAG"]
+    return [{"summary_text": f"{tag} {out['summary_text']}"} for out in _summarize(texts, **kwargs)]
+
+b.fake_summarization_pipeline = fake_summarization_pipeline
+"""
+
+
+def test_refresh_ignores_the_journal_in_workers(fakes, tmp_path, monkeypatch):
+    fake_workers(tmp_path, monkeypatch, TAG_SUMMARIES)
+    journal = tmp_path / "batch.journal.jsonl"
+    ids = ["aaaaaaaaaaa", "bbbbbbbbbbb"]
+
+    def run(tag: str, refresh: bool) -> List[str]:
+        monkeypatch.setenv("YT_TEST_SUMMARY_TAG", tag)
+        opts = yts.PipelineOptions(
+            formats=[], output=str(tmp_path), is_batch=True, refresh=refresh
+        )
+        jobs = [yts.VideoJob(url=f"https://youtu.be/{vid}") for vid in ids]
+        done = yts.run_process_pool(jobs, opts, 1, 1, journal)
+        assert all(job.error is None for job in done)
+        return [job.summary.detailed.split()[0] for job in done]
+
+    assert run("first", refresh=False) == ["first", "first"]
+    # Resumed from the journal: nothing is summarized again
+    assert run("second", refresh=False) == ["first", "first"]
+    assert run("third", refresh=True) == ["third", "third"]
+    assert run("fourth", refresh=False) == ["third", "third"]
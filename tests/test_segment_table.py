@@ -0,0 +1,35 @@
+import pytest
+
+import yt_transcribe_and_summarize as yts
+
+pytest.importorskip("numpy")
+
+
+def _table():
+    return yts.SegmentTable.from_segments(
+        [
+            yts.Segment(0.0, 1.5, "Grüße aus München.", "SPEAKER_00"),
+            yts.Segment(1.5, 3.0, "", None),
+            yts.Segment(3.0, 4.25, "東京 and back", "SPEAKER_01"),
+            yts.Segment(4.25, 6.0, "Last one.", "SPEAKER_00"),
+        ]
+    )
+
+
+@pytest.mark.parametrize(
+    "table",
+    [
+        _table(),
+        _table()[1:3],
+        _table()[2:2],
+        yts.SegmentTable.from_segments([]),
+    ],
+    ids=["full", "slice", "empty-slice", "empty"],
+)
+def test_bytes_round_trip(table):
+    restored = yts.SegmentTable.from_bytes(table.to_bytes())
+
+    assert list(restored.rows()) == list(table.rows())
+    assert len(restored) == len(table)
+    assert restored.transcript() == table.transcript()
+    assert restored.speaker_labels() == table.speaker_labels()
@@ -0,0 +1,91 @@
+import json
+import threading
+
+import pytest
+import requests
+
+import yt_transcribe_and_summarize as yts
+
+
+@pytest.fixture
+def server(tmp_path):
+    # Queue is never started: submissions are only parsed and queued
+    jobs = yts.JobQueue()
+    server = yts.serve_jobs(jobs, port=0, export_root=tmp_path / "exports")
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _url(server) -> str:
+    return f"http://127.0.0.1:{server.server_address[1]}/jobs"
+
+
+def test_post_requires_json_content_type(server):
+    body = json.dumps({"url": "abcdefghijk"})
+    for content_type in ("text/plain", "application/x-www-form-urlencoded", None):
+        headers = {"Content-Type": content_type} if content_type else {}
+        resp = requests.post(_url(server), data=body, headers=headers)
+        assert resp.status_code == 415
+    assert not server.jobs.jobs
+
+    resp = requests.post(_url(server), json={"url": "abcdefghijk"})
+    assert resp.status_code == 202
+
+
+def test_output_confined_to_export_root(server, tmp_path):
+    root = server.export_root
+    for output in (str(tmp_path / "elsewhere"), "../escape.md", "/etc/passwd"):
+        resp = requests.post(
+            _url(server), json={"url": "abcdefghijk", "options": {"output": output}}
+        )
+        assert resp.status_code == 400
+        assert "export directory" in resp.json()["error"]
+    assert not server.jobs.jobs
+
+    for output, expected in (
+        ("notes/video.md", root / "notes" / "video.md"),
+        (str(root / "abs.md"), root / "abs.md"),
+    ):
+        resp = requests.post(
+            _url(server),
+            json={"url": "abcdefghijk", "options": {"output": output}},
+        )
+        assert resp.status_code == 202
+        job = server.jobs.jobs[resp.json()["jobs"][0]["id"]]
+        assert job.options.output == str(expected)
+
+
+def test_jobs_stream_segments_and_partial_summaries(fakes, tmp_path):
+    # Long enough for several summarization windows
+    fakes.FakeTranscriptApi.entries = fakes.make_entries(30)
+    jobs = yts.JobQueue(defaults=yts.PipelineOptions(formats=[])).start()
+    server = yts.serve_jobs(jobs, port=0, export_root=tmp_path)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        job, _ = jobs.submit("abcdefghijk")
+        while True:
+            status = jobs.status(job.id, progress=3)
+            if status["state"] not in ("queued", "running"):
+                break
+            jobs.wait(job.id, 0.01)
+        client = yts.JobClient(f"http://127.0.0.1:{server.server_address[1]}")
+        remote = client.status(job.id, progress=3)
+        plain = client.status(job.id)
+    finally:
+        server.shutdown()
+        server.server_close()
+        jobs.stop()
+
+    assert status["state"] == "done", status["error"]
+    assert "progress" not in plain
+    assert remote["progress"] == status["progress"]
+    partials = status["progress"]["partials"]
+    assert len(partials) > 1
+    assert [p["index"] for p in partials] == list(range(len(partials)))
+    assert all(p["start"] < p["end"] and p["text"] for p in partials)
+    # Segments are only kept until the content is built
+    assert status["progress"]["segment_count"] == 0
+    assert len(jobs.get(job.id).content["segments"]) > 0
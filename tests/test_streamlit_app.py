@@ -0,0 +1,29 @@
+import pytest
+
+from conftest import ROOT
+
+AppTest = pytest.importorskip("streamlit.testing.v1").AppTest
+
+
+def test_expired_job_asks_to_resubmit(fakes):
+    app = AppTest.from_file(str(ROOT / "streamlit_app.py"), default_timeout=30)
+    app.session_state.job_ids = ["0123456789ab"]
+    app.session_state.submit_errors = []
+
+    app.run()
+
+    assert not app.exception
+    assert any("expired" in w.value for w in app.warning)
+
+
+def test_processed_video_is_rendered(fakes):
+    app = AppTest.from_file(str(ROOT / "streamlit_app.py"), default_timeout=60)
+    app.run()
+    app.text_area[0].input("abcdefghijk")
+    app.button[0].click()
+
+    # Polls (sleep + rerun) until the job has finished
+    app.run()
+
+    assert not app.exception
+    assert any(md.value == "## Title abcdefghijk" for md in app.markdown)
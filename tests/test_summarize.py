@@ -0,0 +1,74 @@
+import yt_transcribe_and_summarize as yts
+
+
+class _WordTokenizer:
+    """One token per word, plus BOS/EOS like the BART tokenizer."""
+
+    def num_special_tokens_to_add(self, pair=False):
+        return 2
+
+    def __call__(self, texts, add_special_tokens=True):
+        return {"input_ids": [text.split() for text in texts]}
+
+
+class _FirstWords:
+    """Summarizes by joining the first word of each paragraph with '+'."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, texts, batch_size=8, truncation=True, **generation):
+        self.calls.append(list(texts))
+        return [
+            {"summary_text": "+".join(p.split()[0] for p in text.split("\n\n"))}
+            for text in texts
+        ]
+
+
+def test_partials_are_reduced_level_by_level_across_videos(fakes):
+    summarizer = _FirstWords()
+    partials = [
+        ["a1 x y", "a2 x y", "a3 x y", "a4 x y"],
+        ["only one"],
+        ["p1 x y", "p2 x y"],
+        [],
+    ]
+
+    # 6 tokens per window once BOS/EOS are taken off: two partials per group
+    reduced = yts._reduce_partials(
+        partials, _WordTokenizer(), summarizer, 8, 4, "test/reduce"
+    )
+
+    assert reduced == ["a1+a2+a3+a4", "only one", "p1+p2", ""]
+    # One summarizer call per level, shared by every video still reducing
+    assert [sorted(call) for call in summarizer.calls] == [
+        ["a1 x y\n\na2 x y", "a3 x y\n\na4 x y", "p1 x y\n\np2 x y"],
+        ["a1+a2\n\na3+a4"],
+    ]
+    assert partials[0] == ["a1 x y", "a2 x y", "a3 x y", "a4 x y"]
+
+
+def test_summaries_are_memoized_per_model_and_generation(fakes, tmp_path):
+    yts.configure_caches(tmp_path / "memo")
+    summarizer = _FirstWords()
+
+    def run(texts, model="test/memo", generation=yts.MAP_GENERATION):
+        return yts._run_summarizer(summarizer, texts, 8, generation, model)
+
+    assert run(["alpha one", "beta two", "alpha one"]) == ["alpha", "beta", "alpha"]
+    assert run(["beta two", "gamma three", "alpha one"]) == ["beta", "gamma", "alpha"]
+    run(["alpha one"], model="test/other")
+    run(["alpha one"], generation=yts.REDUCE_GENERATION)
+    # Without a model name nothing is cached
+    run(["alpha one"], model=None)
+    run(["alpha one"], model=None)
+
+    # Duplicates within a call and texts seen before never reach the model
+    assert [sorted(call) for call in summarizer.calls] == [
+        ["alpha one", "beta two"],
+        ["gamma three"],
+        ["alpha one"],
+        ["alpha one"],
+        ["alpha one"],
+        ["alpha one"],
+    ]
@@ -0,0 +1,58 @@
+from pathlib import Path
+
+import numpy as np
+
+import yt_transcribe_and_summarize as yts
+
+
+def _speech_with_pauses(seconds: int = 20) -> np.ndarray:
+    # Noise bursts, with the second half of every 4 s block silent
+    rng = np.random.default_rng(0)
+    audio = (0.3 * rng.standard_normal(seconds * yts.SAMPLE_RATE)).astype(np.float32)
+    block = 4 * yts.SAMPLE_RATE
+    for start in range(0, len(audio), block):
+        audio[start + block // 2 : start + block] = 0
+    return audio
+
+
+def test_trim_silence_keeps_memmap_input_on_disk(tmp_path):
+    audio = _speech_with_pauses()
+    path = tmp_path / "talk.f32"
+    audio.tofile(path)
+    mapped = np.memmap(path, dtype=np.float32, mode="c")
+    spill_dir = tmp_path / "spill"
+    spill_dir.mkdir()
+
+    settings = yts.VadSettings("energy")
+    trimmed, timemap = yts.trim_silence(mapped, settings, mmap_dir=spill_dir)
+    in_ram, _ = yts.trim_silence(audio, settings)
+    without_dir, _ = yts.trim_silence(mapped, settings)
+
+    assert timemap is not None and len(trimmed) < len(audio)
+    assert isinstance(trimmed, np.memmap)
+    assert Path(trimmed.filename).parent == spill_dir
+    assert type(in_ram) is np.ndarray and type(without_dir) is np.ndarray
+    np.testing.assert_array_equal(trimmed, in_ram)
+    np.testing.assert_array_equal(without_dir, in_ram)
+    # Nothing is written next to the caller's file
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["spill", "talk.f32"]
+
+
+def test_transcription_deletes_the_trimmed_speech(fakes, tmp_path, monkeypatch):
+    path = tmp_path / "talk.f32"
+    _speech_with_pauses().tofile(path)
+    mapped = np.memmap(path, dtype=np.float32, mode="c")
+    monkeypatch.setattr(yts, "VAD", yts.VadSettings("energy"))
+    seen = []
+
+    def transcribe(self, audio, verbose=False, **kwargs):
+        seen.append(Path(audio.filename))
+        assert seen[0].exists()
+        return {"segments": [{"start": 0.0, "end": 1.0, "text": "Hello."}]}
+
+    monkeypatch.setattr(fakes.FakeWhisperModel, "transcribe", transcribe)
+
+    assert yts.transcribe_with_whisper(mapped, "tiny")
+    assert seen and seen[0].name.startswith("talk-speech-")
+    assert not seen[0].parent.exists()
+    assert [p.name for p in tmp_path.iterdir()] == ["talk.f32"]
@@ -27,15 +27,42 @@ Requirements: ffmpeg, sufficient VRAM for chosen Whisper model.
 """
 
 import argparse
+import functools
+import gzip
+import hashlib
+import heapq
+import importlib
+import io
 import os
+import queue
+import random
 import re
+import shutil
+import subprocess
 import sys
 import tempfile
 import math
 import json
-from dataclasses import dataclass
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field, fields, replace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
-from typing import List, Optional, Dict, Any
+from urllib.parse import parse_qsl
+from typing import (
+    List,
+    Optional,
+    Dict,
+    Any,
+    Callable,
+    Iterable,
+    Iterator,
+    Sequence,
+    Tuple,
+    Union,
+)
 
 from youtube_transcript_api import (
     YouTubeTranscriptApi,
@@ -45,50 +72,107 @@ from youtube_transcript_api import (
 )
 from dotenv import load_dotenv
 import requests
+import requests.adapters
 
-# Local whisper
-try:
-    import whisper  # openai-whisper
-except Exception:
-    whisper = None  # type: ignore
-
-# Summarization (transformers)
 try:
-    from transformers import pipeline, AutoTokenizer, AutoModelForSeq2SeqLM
+    import numpy as np
 except Exception:
-    pipeline = None  # type: ignore
-    AutoTokenizer = None  # type: ignore
-    AutoModelForSeq2SeqLM = None  # type: ignore
+    np = None  # type: ignore
 
-# Fallback audio download
 try:
-    import yt_dlp
-except Exception:
-    yt_dlp = None  # type: ignore
-
-# Torch for device detection
-try:
-    import torch
-except Exception:
-    torch = None  # type: ignore
-
+    import resource  # peak RSS in stage spans; not available on Windows
+except ImportError:
+    resource = None  # type: ignore
 
-# New format support (HTML/PDF)
+# New format support (HTML)
 try:
     from markdown_it import MarkdownIt
 except ImportError:
     MarkdownIt = None  # type: ignore
 
-try:
-    from weasyprint import HTML
-except Exception:
-    HTML = None  # type: ignore
+# Heavy optional backends are imported lazily by the stage that needs them, so
+# caption-only runs never pay for torch/whisper/transformers. load_backend
+# returns None when a backend is not installed, like the old eager imports.
+_BACKEND_IMPORTS: Dict[str, Tuple[str, Tuple[str, ...]]] = {
+    # name: (module, attributes that must import cleanly)
+    "whisper": ("whisper", ()),  # openai-whisper
+    "transformers": (
+        "transformers",
+        ("pipeline", "AutoTokenizer", "AutoModelForSeq2SeqLM"),
+    ),
+    "yt_dlp": ("yt_dlp", ()),  # audio download
+    "torch": ("torch", ()),  # device detection
+    "weasyprint": ("weasyprint", ("HTML",)),  # PDF export
+    "pyannote": ("pyannote.audio", ("Pipeline",)),  # diarization
+    "scipy": ("scipy.sparse", ("csr_matrix",)),  # extractive summaries
+    "faster_whisper": ("faster_whisper", ("WhisperModel",)),  # --asr faster-whisper
+    # --vad silero (the Silero model bundled with faster-whisper)
+    "silero_vad": ("faster_whisper.vad", ("get_speech_timestamps", "VadOptions")),
+    "pyarrow": ("pyarrow", ("table",)),  # --archive-format parquet
+    "parquet": ("pyarrow.parquet", ("ParquetFile", "write_table")),
+}
+_backends: Dict[str, Optional[Any]] = {}
+_backend_seconds: Dict[str, float] = {}
+_backend_lock = threading.RLock()
+
+
+def load_backend(name: str) -> Optional[Any]:
+    """Import optional backend ``name`` on first use; None if unavailable."""
+    if name in _backends:
+        return _backends[name]
+    with _backend_lock:
+        if name not in _backends:
+            module_name, attrs = _BACKEND_IMPORTS[name]
+            t0 = time.perf_counter()
+            try:
+                module = importlib.import_module(module_name)
+                for attr in attrs:
+                    getattr(module, attr)
+            except Exception:
+                module = None
+            _backend_seconds[name] = time.perf_counter() - t0
+            _backends[name] = module
+    return _backends[name]
+
+
+def backend_loaded(name: str) -> bool:
+    """True if ``name`` has already been imported (never triggers an import)."""
+    return _backends.get(name) is not None
+
+
+def loaded_backends() -> Dict[str, Dict[str, Any]]:
+    """Backends imported so far, with availability and import time."""
+    return {
+        name: {
+            "available": module is not None,
+            "seconds": round(_backend_seconds.get(name, 0.0), 3),
+        }
+        for name, module in _backends.items()
+    }
 
-# Diarization
-try:
-    from pyannote.audio import Pipeline
-except Exception:
-    Pipeline = None  # type: ignore
+
+# Old module-level names (e.g. ``yt_transcribe_and_summarize.whisper``) still
+# resolve, importing the backend on first access.
+_LAZY_ATTRIBUTES = {
+    "whisper": ("whisper", None),
+    "torch": ("torch", None),
+    "yt_dlp": ("yt_dlp", None),
+    "pipeline": ("transformers", "pipeline"),
+    "AutoTokenizer": ("transformers", "AutoTokenizer"),
+    "AutoModelForSeq2SeqLM": ("transformers", "AutoModelForSeq2SeqLM"),
+    "HTML": ("weasyprint", "HTML"),
+    "Pipeline": ("pyannote", "Pipeline"),
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name in _LAZY_ATTRIBUTES:
+        backend, attr = _LAZY_ATTRIBUTES[name]
+        module = load_backend(backend)
+        if module is None or attr is None:
+            return module
+        return getattr(module, attr)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 @dataclass
@@ -105,6 +189,953 @@ class Segment:
     speaker: Optional[str] = None
 
 
+class SegmentTable:
+    """Columnar, array-backed transcript.
+
+    Times live in float64 arrays, speakers in an int32 array of indices into an
+    interned label list (-1 for none), and all texts in one string joined by
+    single spaces with an offsets array (n + 1 entries) marking where each
+    segment starts. Slicing returns a view sharing every buffer, and
+    ``transcript()`` of an unsliced table is the text buffer itself.
+
+    Iterating yields Segment objects for code that still wants rows; hot paths
+    should use the columns or ``rows()`` instead.
+    """
+
+    __slots__ = ("start", "end", "speaker_ids", "speakers", "text", "offsets")
+
+    def __init__(
+        self,
+        start: "np.ndarray",
+        end: "np.ndarray",
+        speaker_ids: "np.ndarray",
+        speakers: List[str],
+        text: str,
+        offsets: "np.ndarray",
+    ):
+        self.start = start
+        self.end = end
+        self.speaker_ids = speaker_ids
+        self.speakers = speakers
+        self.text = text
+        self.offsets = offsets
+
+    @classmethod
+    def from_columns(
+        cls,
+        start: Sequence[float],
+        end: Sequence[float],
+        texts: Sequence[str],
+        speakers: Optional[Sequence[Optional[str]]] = None,
+    ) -> "SegmentTable":
+        n = len(texts)
+        lengths = np.fromiter((len(t) + 1 for t in texts), dtype=np.int64, count=n)
+        offsets = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        labels: Dict[str, int] = {}
+        if speakers is None:
+            speaker_ids = np.full(n, -1, dtype=np.int32)
+        else:
+            speaker_ids = np.fromiter(
+                (
+                    -1 if s is None else labels.setdefault(s, len(labels))
+                    for s in speakers
+                ),
+                dtype=np.int32,
+                count=n,
+            )
+        return cls(
+            np.asarray(start, dtype=np.float64),
+            np.asarray(end, dtype=np.float64),
+            speaker_ids,
+            list(labels),
+            " ".join(texts),
+            offsets,
+        )
+
+    @classmethod
+    def from_segments(cls, segments: Sequence[Segment]) -> "SegmentTable":
+        if isinstance(segments, SegmentTable):
+            return segments
+        return cls.from_columns(
+            [s.start for s in segments],
+            [s.end for s in segments],
+            [s.text for s in segments],
+            [s.speaker for s in segments],
+        )
+
+    def __len__(self) -> int:
+        return len(self.start)
+
+    def text_at(self, i: int) -> str:
+        return self.text[self.offsets[i] : self.offsets[i + 1] - 1]
+
+    def speaker_at(self, i: int) -> Optional[str]:
+        sid = self.speaker_ids[i]
+        return None if sid < 0 else self.speakers[sid]
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            lo, hi, step = i.indices(len(self))
+            if step != 1:
+                raise ValueError("SegmentTable slices must be contiguous")
+            hi = max(lo, hi)
+            return SegmentTable(
+                self.start[lo:hi],
+                self.end[lo:hi],
+                self.speaker_ids[lo:hi],
+                self.speakers,
+                self.text,
+                self.offsets[lo : hi + 1],
+            )
+        if i < 0:
+            i += len(self)
+        return Segment(
+            start=float(self.start[i]),
+            end=float(self.end[i]),
+            text=self.text_at(i),
+            speaker=self.speaker_at(i),
+        )
+
+    def __iter__(self) -> Iterator[Segment]:
+        for start, end, text, speaker in self.rows():
+            yield Segment(start=start, end=end, text=text, speaker=speaker)
+
+    def rows(self) -> Iterator[Tuple[float, float, str, Optional[str]]]:
+        """(start, end, text, speaker) tuples without building Segment objects."""
+        text, offsets, labels = self.text, self.offsets.tolist(), self.speakers
+        for i, (start, end, sid) in enumerate(
+            zip(self.start.tolist(), self.end.tolist(), self.speaker_ids.tolist())
+        ):
+            yield start, end, text[offsets[i] : offsets[i + 1] - 1], (
+                None if sid < 0 else labels[sid]
+            )
+
+    def texts(self) -> List[str]:
+        offsets = self.offsets.tolist()
+        return [self.text[a : b - 1] for a, b in zip(offsets, offsets[1:])]
+
+    def speaker_labels(self) -> List[Optional[str]]:
+        labels = self.speakers
+        return [None if sid < 0 else labels[sid] for sid in self.speaker_ids.tolist()]
+
+    def transcript(self) -> str:
+        """All segment texts joined by spaces (no copy for an unsliced table)."""
+        if not len(self):
+            return ""
+        lo, hi = int(self.offsets[0]), int(self.offsets[-1]) - 1
+        if lo == 0 and hi == len(self.text):
+            return self.text
+        return self.text[lo:hi]
+
+    def with_speakers(self, speakers: Sequence[Optional[str]]) -> "SegmentTable":
+        """Same rows (sharing time/text buffers) with new speaker labels."""
+        labels: Dict[str, int] = {}
+        ids = np.fromiter(
+            (-1 if s is None else labels.setdefault(s, len(labels)) for s in speakers),
+            dtype=np.int32,
+            count=len(self),
+        )
+        return SegmentTable(
+            self.start, self.end, ids, list(labels), self.text, self.offsets
+        )
+
+    def to_bytes(self) -> bytes:
+        """Compact serialized form (compressed .npz)."""
+        buf = io.BytesIO()
+        np.savez_compressed(
+            buf,
+            start=self.start,
+            end=self.end,
+            speaker_ids=self.speaker_ids,
+            speakers=np.array(json.dumps(self.speakers)),
+            text=np.frombuffer(self.transcript().encode("utf-8"), dtype=np.uint8),
+            offsets=self.offsets - self.offsets[0],
+        )
+        return buf.getvalue()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "SegmentTable":
+        with np.load(io.BytesIO(data), allow_pickle=False) as z:
+            return cls(
+                z["start"],
+                z["end"],
+                z["speaker_ids"],
+                json.loads(str(z["speakers"])),
+                z["text"].tobytes().decode("utf-8"),
+                z["offsets"],
+            )
+
+
+# A transcript is either a plain Segment list or a SegmentTable
+Transcript = Union[List[Segment], SegmentTable]
+
+
+def to_segment_table(segments: Optional[Transcript]) -> Optional[Transcript]:
+    """SegmentTable for ``segments`` when numpy is available, else unchanged."""
+    if segments is None or np is None or isinstance(segments, SegmentTable):
+        return segments
+    return SegmentTable.from_segments(segments)
+
+
+def segment_rows(
+    segments: Iterable[Any],
+) -> Iterator[Tuple[Optional[float], Optional[float], str, Optional[str]]]:
+    """(start, end, text, speaker) rows from a SegmentTable, Segments or dicts."""
+    if isinstance(segments, SegmentTable):
+        yield from segments.rows()
+        return
+    for seg in segments:
+        if isinstance(seg, dict):
+            yield seg.get("start"), seg.get("end"), seg.get("text", ""), seg.get(
+                "speaker"
+            )
+        else:
+            yield seg.start, seg.end, seg.text, seg.speaker
+
+
+def transcript_text(segments: Transcript) -> str:
+    if isinstance(segments, SegmentTable):
+        return segments.transcript()
+    return " ".join([s.text for s in segments])
+
+
+# ---------------------------------------------------------------------------
+# Instrumentation
+# ---------------------------------------------------------------------------
+
+
+@dataclass
+class Span:
+    """Timing and resource usage of one stage call."""
+
+    stage: str
+    video_id: Optional[str] = None
+    parent: Optional[str] = None
+    started_at: float = 0.0
+    wall_s: float = 0.0
+    # CPU time of the calling thread, and of the whole process (which also
+    # covers torch's intra-op threads but overlaps with concurrent stages)
+    cpu_s: float = 0.0
+    process_cpu_s: float = 0.0
+    # Process high-water mark when the span ended
+    peak_rss_mb: Optional[float] = None
+    audio_seconds: float = 0.0
+    # Audio left out of transcription by voice activity detection
+    skipped_seconds: float = 0.0
+    tokens_generated: int = 0
+    error: Optional[str] = None
+
+
+_SPAN_COUNTERS = (
+    "wall_s",
+    "cpu_s",
+    "process_cpu_s",
+    "audio_seconds",
+    "skipped_seconds",
+    "tokens_generated",
+)
+
+
+def _peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+class Metrics:
+    """Collects stage spans into per-stage totals.
+
+    Optionally appends every span to a JSON-lines file, and runs a sampling
+    profiler that attributes stack samples to the innermost open span of each
+    thread.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.totals: Dict[str, Dict[str, float]] = {}
+        self.jsonl: Optional[Any] = None
+        # Counting generated tokens re-tokenizes summaries, so only when asked
+        self.count_tokens = False
+        # Open spans per thread id, read by the profiler thread; a thread is
+        # only listed while it has a span open
+        self._stacks: Dict[int, List[Span]] = {}
+        self._sampler: Optional[threading.Thread] = None
+        self._sampler_stop = threading.Event()
+        self.samples: Dict[str, Dict[str, int]] = {}
+
+    def configure(
+        self,
+        jsonl_path: Optional[Path] = None,
+        count_tokens: bool = False,
+    ):
+        with self._lock:
+            if self.jsonl is not None:
+                self.jsonl.close()
+                self.jsonl = None
+            if jsonl_path is not None:
+                self.jsonl = open(jsonl_path, "a", encoding="utf-8", buffering=1)
+            self.count_tokens = count_tokens or jsonl_path is not None
+
+    def _stack(self) -> List[Span]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+            self._stacks[threading.get_ident()] = stack
+        return stack
+
+    @property
+    def video_id(self) -> Optional[str]:
+        return getattr(self._local, "video_id", None)
+
+    @video_id.setter
+    def video_id(self, value: Optional[str]):
+        self._local.video_id = value
+
+    @contextmanager
+    def span(self, stage: str) -> Iterator[Span]:
+        stack = self._stack()
+        s = Span(
+            stage=stage,
+            video_id=self.video_id,
+            parent=stack[-1].stage if stack else None,
+            started_at=time.time(),
+        )
+        wall, cpu, pcpu = time.perf_counter(), time.thread_time(), time.process_time()
+        stack.append(s)
+        try:
+            yield s
+        except BaseException as e:
+            s.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            stack.pop()
+            if not stack:
+                # Worker threads come and go; don't keep one entry per ident
+                self._stacks.pop(threading.get_ident(), None)
+                self._local.stack = None
+            s.wall_s = time.perf_counter() - wall
+            s.cpu_s = time.thread_time() - cpu
+            s.process_cpu_s = time.process_time() - pcpu
+            s.peak_rss_mb = _peak_rss_mb()
+            self._finish(s)
+
+    def add(
+        self,
+        audio_seconds: float = 0.0,
+        tokens_generated: int = 0,
+        skipped_seconds: float = 0.0,
+    ):
+        """Add work done to every open span of the calling thread."""
+        for s in getattr(self._local, "stack", None) or ():
+            s.audio_seconds += audio_seconds
+            s.skipped_seconds += skipped_seconds
+            s.tokens_generated += tokens_generated
+
+    def _finish(self, s: Span):
+        with self._lock:
+            totals = self.totals.setdefault(
+                s.stage, dict.fromkeys(("calls", "errors") + _SPAN_COUNTERS, 0)
+            )
+            totals["calls"] += 1
+            totals["errors"] += s.error is not None
+            for name in _SPAN_COUNTERS:
+                totals[name] += getattr(s, name)
+            if self.jsonl is not None:
+                self.jsonl.write(json.dumps(s.__dict__, ensure_ascii=False) + "\n")
+
+    def prometheus_text(self) -> str:
+        """Per-stage totals in the Prometheus text exposition format."""
+        help_text = {
+            "calls": ("calls_total", "Stage invocations"),
+            "errors": ("errors_total", "Stage invocations that raised"),
+            "wall_s": ("wall_seconds_total", "Wall-clock time in the stage"),
+            "cpu_s": ("cpu_seconds_total", "CPU time of the calling thread"),
+            "process_cpu_s": (
+                "process_cpu_seconds_total",
+                "Process CPU time while the stage ran",
+            ),
+            "audio_seconds": ("audio_seconds_total", "Seconds of audio processed"),
+            "skipped_seconds": (
+                "skipped_audio_seconds_total",
+                "Seconds of audio skipped as non-speech",
+            ),
+            "tokens_generated": ("tokens_generated_total", "Summary tokens generated"),
+        }
+        with self._lock:
+            totals = {stage: dict(t) for stage, t in self.totals.items()}
+        lines = []
+        for key, (suffix, text) in help_text.items():
+            name = f"yt_stage_{suffix}"
+            lines += [f"# HELP {name} {text}.", f"# TYPE {name} counter"]
+            for stage, t in sorted(totals.items()):
+                lines.append(f'{name}{{stage="{stage}"}} {t[key]:g}')
+        rss = _peak_rss_mb()
+        if rss is not None:
+            lines += [
+                "# HELP yt_process_peak_rss_bytes Peak resident set size.",
+                "# TYPE yt_process_peak_rss_bytes gauge",
+                f"yt_process_peak_rss_bytes {int(rss * 1024 * 1024)}",
+            ]
+        return "\n".join(lines) + "\n"
+
+    def summary_lines(self) -> List[str]:
+        with self._lock:
+            totals = sorted(self.totals.items(), key=lambda kv: -kv[1]["wall_s"])
+        return [
+            f"{stage}: {t['calls']:.0f} calls, {t['wall_s']:.2f}s wall, "
+            f"{t['cpu_s']:.2f}s CPU"
+            + (f", {t['audio_seconds']:.0f}s audio" if t["audio_seconds"] else "")
+            + (
+                f" ({100 * t['skipped_seconds'] / t['audio_seconds']:.0f}% skipped)"
+                if t["skipped_seconds"] and t["audio_seconds"]
+                else ""
+            )
+            + (f", {t['tokens_generated']:.0f} tokens" if t["tokens_generated"] else "")
+            + (f", {t['errors']:.0f} errors" if t["errors"] else "")
+            for stage, t in totals
+        ]
+
+    def start_profiler(self, interval: float = 0.005):
+        """Sample every thread's stack while it is inside a span."""
+        if self._sampler is not None:
+            return
+        self._sampler_stop.clear()
+        self._sampler = threading.Thread(
+            target=self._sample_loop, args=(interval,), name="profiler", daemon=True
+        )
+        self._sampler.start()
+
+    def stop_profiler(self):
+        if self._sampler is not None:
+            self._sampler_stop.set()
+            self._sampler.join()
+            self._sampler = None
+
+    def _sample_loop(self, interval: float):
+        me = threading.get_ident()
+        while not self._sampler_stop.wait(interval):
+            frames = sys._current_frames()
+            for tid, stack in list(self._stacks.items()):
+                frame = frames.get(tid)
+                if tid == me or not stack or frame is None:
+                    continue
+                names = []
+                while frame is not None:
+                    code = frame.f_code
+                    names.append(
+                        f"{code.co_name} ({Path(code.co_filename).name}"
+                        f":{code.co_firstlineno})"
+                    )
+                    frame = frame.f_back
+                key = ";".join(reversed(names))
+                per_stage = self.samples.setdefault(stack[-1].stage, {})
+                per_stage[key] = per_stage.get(key, 0) + 1
+
+    def write_profile(self, out_dir: Path, top: int = 15) -> Optional[Path]:
+        """Write the hottest sampled stage as collapsed stacks (flamegraph input).
+
+        The hottest stage is the one with the most wall time among those that
+        were sampled. Prints its functions with the most self samples.
+        """
+        sampled = [stage for stage in self.samples if stage in self.totals]
+        if not sampled:
+            return None
+        stage = max(sampled, key=lambda st: self.totals[st]["wall_s"])
+        stacks = self.samples[stage]
+        out_dir.mkdir(parents=True, exist_ok=True)
+        path = out_dir / f"profile-{stage}.folded"
+        with open(path, "w", encoding="utf-8") as fh:
+            for key, count in sorted(stacks.items(), key=lambda kv: -kv[1]):
+                fh.write(f"{key} {count}\n")
+        self_samples: Dict[str, int] = {}
+        for key, count in stacks.items():
+            leaf = key.rsplit(";", 1)[-1]
+            self_samples[leaf] = self_samples.get(leaf, 0) + count
+        total = sum(stacks.values())
+        print(f"Hottest stage: {stage} ({total} samples) -> {path}")
+        for leaf, count in sorted(self_samples.items(), key=lambda kv: -kv[1])[:top]:
+            print(f"  {100 * count / total:5.1f}%  {leaf}")
+        return path
+
+
+METRICS = Metrics()
+
+
+def instrumented(stage: str):
+    """Record each call of the decorated function as a ``stage`` span."""
+
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with METRICS.span(stage):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
+@contextmanager
+def video_context(video_id: Optional[str]) -> Iterator[None]:
+    """Tag spans opened by this thread inside the block with ``video_id``."""
+    previous = METRICS.video_id
+    METRICS.video_id = video_id
+    try:
+        yield
+    finally:
+        METRICS.video_id = previous
+
+
+def serve_metrics(port: int, host: str = "127.0.0.1") -> Any:
+    """Serve METRICS.prometheus_text() at http://host:port/metrics."""
+
+    class _Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/", "/metrics"):
+                self.send_error(404)
+                return
+            body = METRICS.prometheus_text().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), _Handler)
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    return server
+
+
+# ---------------------------------------------------------------------------
+# Model management
+# ---------------------------------------------------------------------------
+
+DIARIZATION_MODEL = "pyannote/speaker-diarization-3.1"
+
+
+@dataclass
+class ModelStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    load_seconds: float = 0.0
+
+
+def _estimate_model_bytes(model: Any) -> int:
+    """Best-effort parameter + buffer size of a torch-backed model."""
+    # HF pipelines wrap the module in .model; pyannote pipelines expose their
+    # sub-models through named attributes, so fall back to 0 for those.
+    module = getattr(model, "model", model)
+    total = 0
+    for attr in ("parameters", "buffers"):
+        fn = getattr(module, attr, None)
+        if not callable(fn):
+            continue
+        try:
+            for t in fn():
+                total += t.numel() * t.element_size()
+        except Exception:
+            return 0
+    return total
+
+
+class ModelManager:
+    """Process-wide registry that loads each (kind, name, device) model once.
+
+    Models are handed out as shared instances. When ``max_bytes`` is set and the
+    estimated size of the resident models exceeds it, the least recently used
+    models are evicted (the model just requested is never evicted).
+    """
+
+    def __init__(self, max_bytes: Optional[int] = None):
+        self.max_bytes = max_bytes
+        self._models: "OrderedDict[Tuple[str, str, str], Tuple[Any, int]]" = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+        self._loading: Dict[Tuple[str, str, str], threading.Lock] = {}
+        self._stats: Dict[str, ModelStats] = {}
+
+    def get(self, kind: str, name: str, device: str, loader: Callable[[], Any]) -> Any:
+        key = (kind, name, device)
+        with self._lock:
+            stats = self._stats.setdefault(kind, ModelStats())
+            if key in self._models:
+                self._models.move_to_end(key)
+                stats.hits += 1
+                return self._models[key][0]
+            key_lock = self._loading.setdefault(key, threading.Lock())
+        # Load outside the registry lock so different models can load in
+        # parallel, but never load the same key twice.
+        with key_lock:
+            with self._lock:
+                if key in self._models:
+                    self._models.move_to_end(key)
+                    stats.hits += 1
+                    return self._models[key][0]
+            t0 = time.perf_counter()
+            model = loader()
+            elapsed = time.perf_counter() - t0
+            size = _estimate_model_bytes(model)
+            with self._lock:
+                stats.misses += 1
+                stats.load_seconds += elapsed
+                self._models[key] = (model, size)
+                self._loading.pop(key, None)
+                self._evict_locked(keep=key)
+        return model
+
+    def _evict_locked(self, keep: Tuple[str, str, str]):
+        if self.max_bytes is None:
+            return
+        evicted = False
+        while self.resident_bytes() > self.max_bytes:
+            victim = next((k for k in self._models if k != keep), None)
+            if victim is None:
+                break
+            del self._models[victim]
+            self._stats.setdefault(victim[0], ModelStats()).evictions += 1
+            evicted = True
+        # Only touch torch if something already imported it
+        if evicted and backend_loaded("torch"):
+            torch = load_backend("torch")
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+
+    def resident_bytes(self) -> int:
+        return sum(size for _, size in self._models.values())
+
+    def resident(self) -> List[Tuple[str, str, str]]:
+        with self._lock:
+            return list(self._models)
+
+    def evict(self, kind: Optional[str] = None):
+        """Drop all resident models (or only those of ``kind``)."""
+        with self._lock:
+            for key in [k for k in self._models if kind is None or k[0] == kind]:
+                del self._models[key]
+                self._stats.setdefault(key[0], ModelStats()).evictions += 1
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {
+                kind: {
+                    "hits": s.hits,
+                    "misses": s.misses,
+                    "evictions": s.evictions,
+                    "load_seconds": round(s.load_seconds, 3),
+                }
+                for kind, s in self._stats.items()
+            }
+
+
+def _env_model_budget() -> Optional[int]:
+    mb = os.getenv("YT_MODEL_CACHE_MB")
+    try:
+        return int(float(mb) * 1024 * 1024) if mb else None
+    except ValueError:
+        return None
+
+
+MODEL_MANAGER = ModelManager(max_bytes=_env_model_budget())
+
+
+def _torch_device() -> str:
+    torch = load_backend("torch")
+    if torch is None:
+        return "cpu"
+    if torch.cuda.is_available():
+        return "cuda"
+    if torch.backends.mps.is_available():
+        return "mps"
+    return "cpu"
+
+
+def load_whisper_model(model_name: str, device: Optional[str] = None) -> Any:
+    whisper = load_backend("whisper")
+    torch = load_backend("torch")
+    # Whisper runs on CUDA or CPU (MPS lacks some ops it needs)
+    if device is None:
+        device = "cuda" if torch and torch.cuda.is_available() else "cpu"
+    return MODEL_MANAGER.get(
+        "whisper",
+        model_name,
+        device,
+        lambda: whisper.load_model(model_name, device=device),
+    )
+
+
+def load_summarizer(summary_model: str) -> Tuple[Any, Any]:
+    """Return a shared (tokenizer, summarization pipeline) pair."""
+    transformers = load_backend("transformers")
+    device = _torch_device()
+    tok = MODEL_MANAGER.get(
+        "tokenizer",
+        summary_model,
+        "cpu",
+        lambda: transformers.AutoTokenizer.from_pretrained(summary_model),
+    )
+    summarizer = MODEL_MANAGER.get(
+        "summarizer",
+        summary_model,
+        device,
+        lambda: transformers.pipeline(
+            "summarization",
+            model=summary_model,
+            tokenizer=tok,
+            device=0 if device == "cuda" else ("mps" if device == "mps" else -1),
+        ),
+    )
+    return tok, summarizer
+
+
+def load_diarization_pipeline(model_name: str = DIARIZATION_MODEL) -> Any:
+    pyannote = load_backend("pyannote")
+    torch = load_backend("torch")
+    device = "cuda" if torch and torch.cuda.is_available() else "cpu"
+
+    def _load():
+        # Requires HF token
+        diar = pyannote.Pipeline.from_pretrained(
+            model_name, use_auth_token=os.getenv("HF_TOKEN")
+        )
+        if device == "cuda":
+            diar.to(torch.device("cuda"))
+        return diar
+
+    return MODEL_MANAGER.get("diarization", model_name, device, _load)
+
+
+# ---------------------------------------------------------------------------
+# Disk caches
+# ---------------------------------------------------------------------------
+
+
+def default_cache_dir() -> Path:
+    """YT_CACHE_DIR or ~/.cache/yt_transcribe, read now (.env may load later)."""
+    return Path(os.getenv("YT_CACHE_DIR") or Path.home() / ".cache" / "yt_transcribe")
+
+
+DEFAULT_CACHE_DIR = default_cache_dir()
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    writes: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class DiskCache:
+    """Content-addressed file cache with atomic writes and size-based LRU eviction.
+
+    Entries are stored as ``<root>/<hh>/<sha256>`` where the hash is taken over
+    the key parts. Reads refresh the file mtime, which eviction uses as recency.
+    Writes go to a temp file that is renamed into place, so concurrent workers
+    never observe partial entries.
+    """
+
+    def __init__(self, root: Path, max_bytes: Optional[int] = None):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.enabled = True
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        self._size: Optional[int] = None
+
+    @staticmethod
+    def key(*parts: Any) -> str:
+        raw = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / key
+
+    def get(self, key: str) -> Optional[bytes]:
+        if not self.enabled:
+            return None
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+        except OSError:
+            with self._lock:
+                self.stats.misses += 1
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        with self._lock:
+            self.stats.hits += 1
+        return data
+
+    def put(self, key: str, data: bytes):
+        if not self.enabled:
+            return
+        path = self._path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            old = path.stat().st_size if path.exists() else 0
+            fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                os.replace(tmp, path)
+            except BaseException:
+                # e.g. a full disk: don't leave the partial file behind
+                try:
+                    os.unlink(tmp)
+                except OSError:
+                    pass
+                raise
+        except OSError as e:
+            print(f"Cache write failed ({e}); continuing without caching.")
+            return
+        with self._lock:
+            self.stats.writes += 1
+            if self._size is not None:
+                self._size += len(data) - old
+        self.evict()
+
+    def _entries(self) -> List[Tuple[float, int, Path]]:
+        entries = []
+        for p in self.root.glob("??/*"):
+            if p.name.startswith(".tmp-"):
+                continue
+            try:
+                st = p.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, p))
+        return entries
+
+    def size(self) -> int:
+        with self._lock:
+            if self._size is None:
+                self._size = sum(size for _, size, _ in self._entries())
+            return self._size
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits max_bytes."""
+        if self.max_bytes is None or self.size() <= self.max_bytes:
+            return
+        with self._lock:
+            entries = sorted(self._entries())
+            total = sum(size for _, size, _ in entries)
+            for _, size, p in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    p.unlink()
+                except OSError:
+                    continue
+                total -= size
+                self.stats.evictions += 1
+            self._size = total
+
+    def clear(self):
+        with self._lock:
+            for _, _, p in self._entries():
+                try:
+                    p.unlink()
+                except OSError:
+                    pass
+            self._size = 0
+
+
+def _env_cache_budget(name: str, default_mb: float) -> Optional[int]:
+    mb = os.getenv(name)
+    try:
+        return int(float(mb) * 1024 * 1024) if mb else int(default_mb * 1024 * 1024)
+    except ValueError:
+        return int(default_mb * 1024 * 1024)
+
+
+TRANSCRIPT_CACHE = DiskCache(
+    DEFAULT_CACHE_DIR / "transcripts",
+    max_bytes=_env_cache_budget("YT_TRANSCRIPT_CACHE_MB", 1024),
+)
+# Partial (per chunk) and reduce-step summaries, keyed by text hash + model + params
+SUMMARY_CACHE = DiskCache(
+    DEFAULT_CACHE_DIR / "summaries",
+    max_bytes=_env_cache_budget("YT_SUMMARY_CACHE_MB", 256),
+)
+
+
+def configure_caches(cache_dir: Optional[Path] = None, enabled: bool = True):
+    """Point the disk caches at ``cache_dir`` and/or turn them off."""
+    # Re-read the budget in case it came from a .env file loaded after import
+    TRANSCRIPT_CACHE.max_bytes = _env_cache_budget("YT_TRANSCRIPT_CACHE_MB", 1024)
+    SUMMARY_CACHE.max_bytes = _env_cache_budget("YT_SUMMARY_CACHE_MB", 256)
+    for cache, sub in ((TRANSCRIPT_CACHE, "transcripts"), (SUMMARY_CACHE, "summaries")):
+        if cache_dir is not None:
+            cache.root = Path(cache_dir) / sub
+            cache._size = None
+        cache.enabled = enabled
+
+
+def segments_to_bytes(segments: Transcript) -> bytes:
+    """Compact columnar encoding of a transcript.
+
+    SegmentTable's compressed .npz when numpy is available, otherwise
+    gzip-compressed column JSON.
+    """
+    if np is not None:
+        return SegmentTable.from_segments(segments).to_bytes()
+    columns = list(zip(*segment_rows(segments))) or [(), (), (), ()]
+    payload = dict(zip(("start", "end", "text", "speaker"), map(list, columns)))
+    raw = json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+    return gzip.compress(raw.encode("utf-8"), compresslevel=6)
+
+
+def segments_from_bytes(data: bytes) -> Transcript:
+    if data[:2] == b"PK":  # .npz (zip) written by SegmentTable.to_bytes
+        if np is None:
+            raise ValueError("numpy is required to read this cache entry")
+        return SegmentTable.from_bytes(data)
+    payload = json.loads(gzip.decompress(data).decode("utf-8"))
+    if np is not None:
+        return SegmentTable.from_columns(
+            payload["start"], payload["end"], payload["text"], payload["speaker"]
+        )
+    return [
+        Segment(start=start, end=end, text=text, speaker=speaker)
+        for start, end, text, speaker in zip(
+            payload["start"], payload["end"], payload["text"], payload["speaker"]
+        )
+    ]
+
+
+def _transcript_cache_key(
+    video_id: str, lang: str, source: str, diarization: str
+) -> str:
+    return DiskCache.key("transcript", video_id, lang, source, diarization)
+
+
+def _cached_segments(key: str) -> Optional[Transcript]:
+    data = TRANSCRIPT_CACHE.get(key)
+    if data is None:
+        return None
+    try:
+        return segments_from_bytes(data)
+    except Exception:
+        # Corrupt or old-format entry; treat as a miss
+        return None
+
+
 def extract_video_id(url: str) -> str:
     # Supports common YouTube URL formats
     patterns = [
@@ -118,9 +1149,166 @@ def extract_video_id(url: str) -> str:
     raise ValueError("Could not parse YouTube video ID from URL")
 
 
-def fetch_captions(video_id: str, lang: str) -> Optional[List[Segment]]:
+# ---------------------------------------------------------------------------
+# Network layer
+# ---------------------------------------------------------------------------
+
+OEMBED_URL = os.getenv("YT_OEMBED_URL", "https://www.youtube.com/oembed")
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Thread-safe token bucket: ``rate`` requests/second with bursts of ``burst``."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.burst, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class HttpClient(requests.Session):
+    """requests.Session with a default timeout, rate limiting and retries.
+
+    Responses with a status in RETRY_STATUSES and connection errors are retried
+    with jittered exponential backoff (honouring ``Retry-After``), each wait
+    capped at ``max_backoff`` seconds. Clients built by get_http_session share
+    one connection pool and one rate limiter.
+    """
+
+    def __init__(
+        self,
+        limiter: Optional[TokenBucket] = None,
+        adapter: Optional[requests.adapters.HTTPAdapter] = None,
+        max_retries: int = 4,
+        backoff: float = 0.5,
+        timeout: float = 15,
+        max_backoff: float = 30.0,
+    ):
+        super().__init__()
+        self.limiter = limiter
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        if adapter is not None:
+            self.mount("http://", adapter)
+            self.mount("https://", adapter)
+
+    def _delay(self, attempt: int, response: Optional[requests.Response]) -> float:
+        if response is not None:
+            retry_after = response.headers.get("Retry-After", "")
+            # A server asking for an hour must not stall a worker for an hour
+            if retry_after.isdigit():
+                return min(float(retry_after), self.max_backoff)
+        delay = self.backoff * (2**attempt) * random.uniform(0.5, 1.5)
+        return min(delay, self.max_backoff)
+
+    def request(self, method, url, *args, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        attempt = 0
+        while True:
+            if self.limiter is not None:
+                self.limiter.acquire()
+            try:
+                response = super().request(method, url, *args, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= self.max_retries:
+                    raise
+                time.sleep(self._delay(attempt, None))
+                attempt += 1
+                continue
+            if (
+                response.status_code not in RETRY_STATUSES
+                or attempt >= self.max_retries
+            ):
+                return response
+            delay = self._delay(attempt, response)
+            response.close()
+            time.sleep(delay)
+            attempt += 1
+
+
+_http_local = threading.local()
+_http_shared: Dict[str, Any] = {}
+_http_lock = threading.Lock()
+
+
+def _configure_http_locked(
+    rate: float, burst: int, pool_size: int, client_kwargs: Dict[str, Any]
+):
+    _http_shared["limiter"] = TokenBucket(rate, burst)
+    _http_shared["adapter"] = requests.adapters.HTTPAdapter(
+        pool_connections=pool_size, pool_maxsize=pool_size
+    )
+    _http_shared["kwargs"] = client_kwargs
+    _http_shared["generation"] = _http_shared.get("generation", 0) + 1
+
+
+def configure_http(
+    rate: float = 10.0, burst: int = 10, pool_size: int = 32, **client_kwargs: Any
+):
+    """Set the shared rate limit (requests/s), pool size and HttpClient options."""
+    with _http_lock:
+        _configure_http_locked(rate, burst, pool_size, client_kwargs)
+
+
+def get_http_session() -> HttpClient:
+    """Per-thread HttpClient over the process-wide connection pool and limiter.
+
+    Sessions keep cookies, which is not thread-safe, so each thread gets its
+    own; the urllib3 pool behind the shared adapter is.
+    """
+    with _http_lock:
+        if not _http_shared:
+            _configure_http_locked(
+                float(os.getenv("YT_HTTP_RATE", "10")),
+                int(os.getenv("YT_HTTP_BURST", "10")),
+                32,
+                {},
+            )
+        shared = dict(_http_shared)
+    session = getattr(_http_local, "session", None)
+    if session is None or _http_local.generation != shared["generation"]:
+        session = HttpClient(shared["limiter"], shared["adapter"], **shared["kwargs"])
+        _http_local.session = session
+        _http_local.generation = shared["generation"]
+        _http_local.transcript_api = None
+    return session
+
+
+def _list_transcripts(video_id: str):
+    # One youtube-transcript-api client per thread, over our pooled,
+    # rate-limited session (needs youtube-transcript-api >= 1.0)
+    session = get_http_session()
+    api = getattr(_http_local, "transcript_api", None)
+    if api is None:
+        api = YouTubeTranscriptApi(http_client=session)
+        _http_local.transcript_api = api
+    return api.list(video_id)
+
+
+@instrumented("fetch_captions")
+def fetch_captions(video_id: str, lang: str) -> Optional[Transcript]:
     try:
-        transcript_list = YouTubeTranscriptApi.list_transcripts(video_id)
+        transcript_list = _list_transcripts(video_id)
         transcript = None
         # Try any transcript in requested language (manual or generated)
         try:
@@ -147,7 +1335,8 @@ def fetch_captions(video_id: str, lang: str) -> Optional[List[Segment]]:
                 # Translation might fail; use original language
                 pass
 
-        entries = transcript.fetch()
+        # FetchedTranscript of snippet objects; as plain dicts
+        entries = transcript.fetch().to_raw_data()
         segments = []
         for e in entries:
             text = e.get("text", "").strip()
@@ -155,65 +1344,797 @@ def fetch_captions(video_id: str, lang: str) -> Optional[List[Segment]]:
                 start = e.get("start", 0.0)
                 duration = e.get("duration", 0.0)
                 segments.append(Segment(start=start, end=start + duration, text=text))
-        return segments if segments else None
+        return to_segment_table(segments) if segments else None
     except (TranscriptsDisabled, NoTranscriptFound, CouldNotRetrieveTranscript):
         return None
     except Exception:
         return None
 
 
+AUDIO_SUFFIXES = {".mp3", ".m4a", ".webm", ".wav", ".opus", ".ogg", ".aac", ".mp4"}
+
+
+@instrumented("download_audio")
 def download_audio(url: str, out_dir: Path) -> Optional[Path]:
+    yt_dlp = load_backend("yt_dlp")
     if yt_dlp is None:
         return None
     out_path = out_dir / "%(id)s.%(ext)s"
     ydl_opts = {
         "format": "bestaudio/best",
         "outtmpl": str(out_path),
-        "postprocessors": [
-            {
-                "key": "FFmpegExtractAudio",
-                "preferredcodec": "mp3",
-                "preferredquality": "128",
-            }
-        ],
+        # Keep the native stream; decode_audio converts it to PCM in one pass
         "quiet": True,
         "noprogress": True,
     }
     try:
         with yt_dlp.YoutubeDL(ydl_opts) as ydl:
             info = ydl.extract_info(url, download=True)
-            # yt-dlp returns the file path after post-processing in info dict sometimes
             # We'll glob for the id-based filename
             vid = info.get("id")
             for p in out_dir.glob(f"{vid}.*"):
-                if p.suffix in {".mp3", ".m4a", ".webm", ".wav"}:
+                if p.suffix in AUDIO_SUFFIXES:
                     return p
     except Exception:
         return None
     return None
 
 
+SAMPLE_RATE = 16000
+# Decoded audio beyond this many seconds is spilled to a memory-mapped file
+MMAP_AUDIO_SECONDS = float(os.getenv("YT_AUDIO_MMAP_SECONDS", "3600"))
+
+AudioInput = Union[Path, "np.ndarray"]
+
+
+def decode_audio(
+    path: Path,
+    sample_rate: int = SAMPLE_RATE,
+    mmap_dir: Optional[Path] = None,
+    mmap_seconds: float = MMAP_AUDIO_SECONDS,
+) -> Optional["np.ndarray"]:
+    """Decode any audio/video file to a mono float32 buffer with one ffmpeg pass.
+
+    Output is read from ffmpeg's stdout; once it grows past ``mmap_seconds`` it
+    is streamed into a raw file in ``mmap_dir`` and returned as a memory map
+    instead, so very long audio does not have to fit in RAM. Returns None if
+    numpy or ffmpeg is unavailable.
+    """
+    if np is None or shutil.which("ffmpeg") is None:
+        return None
+    cmd = [
+        "ffmpeg",
+        "-nostdin",
+        "-loglevel",
+        "error",
+        "-i",
+        str(path),
+        "-f",
+        "f32le",
+        "-ac",
+        "1",
+        "-ar",
+        str(sample_rate),
+        "-",
+    ]
+    limit = int(mmap_seconds * sample_rate * 4) if mmap_dir is not None else None
+    buf = bytearray()
+    spill = None
+    spill_path = None
+    ok = False
+    # stderr goes to a file: a pipe nobody reads while stdout is drained can
+    # fill up and stall ffmpeg
+    err_file = tempfile.TemporaryFile()
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=err_file)
+    try:
+        while True:
+            block = proc.stdout.read(1 << 20)
+            if not block:
+                break
+            if spill is not None:
+                spill.write(block)
+                continue
+            buf += block
+            if limit is not None and len(buf) > limit:
+                # Unique name: files with the same stem may share mmap_dir
+                fd, name = tempfile.mkstemp(
+                    dir=mmap_dir, prefix=f"{Path(path).stem}-", suffix=".f32"
+                )
+                spill_path = Path(name)
+                spill = os.fdopen(fd, "wb")
+                spill.write(buf)
+                buf = bytearray()
+        if proc.wait() != 0:
+            err_file.seek(0)
+            err = err_file.read(64 * 1024).decode(errors="replace")
+            print(f"ffmpeg failed to decode {path}: {err}")
+            return None
+        ok = True
+    finally:
+        if spill is not None:
+            spill.close()
+        if proc.poll() is None:
+            proc.kill()
+        proc.stdout.close()
+        err_file.close()
+        if not ok and spill_path is not None:
+            spill_path.unlink(missing_ok=True)
+    if spill_path is not None:
+        # Copy-on-write so torch.from_numpy gets a writable, zero-copy view
+        return np.memmap(spill_path, dtype=np.float32, mode="c")
+    # bytearray-backed, so the array is writable without another copy
+    return np.frombuffer(buf, dtype=np.float32)
+
+
+# Parallel (windowed) Whisper for long audio on CPU
+WHISPER_WINDOW_SECONDS = 600.0
+WHISPER_WINDOW_OVERLAP = 2.0
+
+
+def split_on_silence(
+    audio: "np.ndarray",
+    window_s: float = WHISPER_WINDOW_SECONDS,
+    overlap_s: float = WHISPER_WINDOW_OVERLAP,
+    search_s: float = 30.0,
+    frame_ms: int = 30,
+    sample_rate: int = SAMPLE_RATE,
+) -> List[Tuple[int, int, int, int]]:
+    """Cut points near every ``window_s`` seconds, placed at the quietest frame.
+
+    Returns ``(lo, hi, own_lo, own_hi)`` sample ranges: each window spans
+    ``[lo, hi)`` including ``overlap_s`` of context past each cut, and owns
+    ``[own_lo, own_hi)``, the part between the cuts themselves.
+    """
+    n = len(audio)
+    window = int(window_s * sample_rate)
+    if n <= window:
+        return [(0, n, 0, n)]
+    frame = max(1, int(sample_rate * frame_ms / 1000))
+    search = int(search_s * sample_rate)
+    half_overlap = int(overlap_s * sample_rate / 2)
+    cuts = [0]
+    while n - cuts[-1] > window:
+        target = cuts[-1] + window
+        lo = max(cuts[-1] + frame, target - search)
+        hi = min(n - frame, target + search)
+        region = np.asarray(audio[lo:hi], dtype=np.float32)
+        frames = len(region) // frame
+        if frames == 0:
+            cuts.append(target)
+            continue
+        energy = np.square(region[: frames * frame].reshape(frames, frame)).mean(axis=1)
+        cuts.append(lo + int(np.argmin(energy)) * frame + frame // 2)
+    cuts.append(n)
+    windows = []
+    for a, b in zip(cuts, cuts[1:]):
+        windows.append((max(0, a - half_overlap), min(n, b + half_overlap), a, b))
+    return windows
+
+
+def _dedupe_boundary(prev: Segment, cur: Segment, max_words: int = 12) -> str:
+    """Drop words at the start of ``cur`` that repeat the end of ``prev``."""
+    tail = prev.text.split()[-max_words:]
+    words = cur.text.split()
+    norm = lambda w: re.sub(r"[^\w']", "", w).lower()  # noqa: E731
+    for k in range(min(len(tail), len(words)), 0, -1):
+        if [norm(w) for w in tail[-k:]] == [norm(w) for w in words[:k]]:
+            return " ".join(words[k:])
+    return cur.text
+
+
+def merge_window_segments(
+    windows: List[Tuple[float, float, float, List[Segment]]],
+) -> List[Segment]:
+    """Stitch per-window segments into one timeline.
+
+    Each entry is ``(offset_s, own_lo_s, own_hi_s, segments)`` with segment times
+    relative to the window start. Times are shifted by the offset, a segment is
+    kept only by the window owning its midpoint, and words repeated across a
+    window boundary are removed.
+    """
+    merged: List[Segment] = []
+    for offset, own_lo, own_hi, segs in windows:
+        _merge_window(merged, offset, own_lo, own_hi, segs)
+    return merged
+
+
+def _merge_window(
+    merged: List[Segment],
+    offset: float,
+    own_lo: float,
+    own_hi: float,
+    segs: List[Segment],
+) -> List[Segment]:
+    """Append one window's segments to ``merged``; returns the ones added."""
+    added: List[Segment] = []
+    for seg in segs:
+        start, end = seg.start + offset, seg.end + offset
+        mid = (start + end) / 2
+        if mid < own_lo or mid >= own_hi:
+            continue
+        cur = Segment(start=start, end=end, text=seg.text, speaker=seg.speaker)
+        if not added and merged:
+            cur.text = _dedupe_boundary(merged[-1], cur)
+            cur.start = max(cur.start, merged[-1].end)
+        if cur.text:
+            merged.append(cur)
+            added.append(cur)
+    return added
+
+
+_WORKER_MODEL_NAME = ""
+
+
+def _whisper_worker_init(model_name: str, threads: int, asr: Dict[str, Any]):
+    """Configure the parent's ASR backend on CPU and load its model once."""
+    global _WORKER_MODEL_NAME
+    # Windows are a CPU strategy; keep every worker off the GPU
+    os.environ["CUDA_VISIBLE_DEVICES"] = ""
+    for var in _THREAD_ENV_VARS:
+        os.environ[var] = str(threads)
+    torch = load_backend("torch")
+    if torch is not None and threads > 0:
+        torch.set_num_threads(threads)
+    configure_asr(**asr)
+    _WORKER_MODEL_NAME = model_name
+    asr_backend().load(model_name, ASR)
+
+
+def _whisper_worker_transcribe(audio: "np.ndarray") -> List[Tuple[float, float, str]]:
+    segments = asr_backend().transcribe(audio, _WORKER_MODEL_NAME, ASR)
+    return [(s.start, s.end, s.text) for s in segments]
+
+
+def transcribe_parallel(
+    audio: "np.ndarray",
+    model_name: str = "medium",
+    workers: int = 2,
+    window_s: float = WHISPER_WINDOW_SECONDS,
+    overlap_s: float = WHISPER_WINDOW_OVERLAP,
+) -> Optional[Transcript]:
+    """Transcribe long audio as silence-aligned windows in a process pool.
+
+    Each worker process loads the configured ASR backend's model once (with
+    the same AsrSettings as this process, on CPU) and gets an equal share of
+    the CPU threads. Results are merged with merge_window_segments.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    import multiprocessing
+
+    windows = split_on_silence(audio, window_s, overlap_s)
+    workers = max(1, min(workers, len(windows)))
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    # spawn: forked children would inherit torch's thread pool state
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=ctx,
+        initializer=_whisper_worker_init,
+        initargs=(model_name, threads, asdict(ASR)),
+    ) as ex:
+        futures = [
+            ex.submit(_whisper_worker_transcribe, np.ascontiguousarray(audio[lo:hi]))
+            for lo, hi, _, _ in windows
+        ]
+        results = [f.result() for f in futures]
+    stitched = merge_window_segments(
+        [
+            (
+                lo / SAMPLE_RATE,
+                own_lo / SAMPLE_RATE,
+                own_hi / SAMPLE_RATE,
+                [Segment(start=s, end=e, text=t) for s, e, t in segs if t],
+            )
+            for (lo, _, own_lo, own_hi), segs in zip(windows, results)
+        ]
+    )
+    return to_segment_table(stitched) if stitched else None
+
+
+# ---------------------------------------------------------------------------
+# Speech recognition backends
+# ---------------------------------------------------------------------------
+
+
+@dataclass
+class AsrSettings:
+    """Which engine transcribes audio and how; set from the CLI by configure_asr."""
+
+    backend: str = "whisper"
+    # whisper: float16 or float32; faster-whisper: int8 (default), int8_float16,
+    # int16, float16, float32
+    compute_type: Optional[str] = None
+    # None keeps the engine's default decoding (greedy with fallback for whisper)
+    beam_size: Optional[int] = None
+    # Audio windows decoded together (faster-whisper's batched pipeline)
+    batch_size: int = 1
+
+    def cache_tag(self, model_name: str) -> str:
+        """Model label for transcript cache keys and journal fingerprints.
+
+        Default whisper settings keep the plain model name, so existing cache
+        entries stay valid.
+        """
+        if replace(self, batch_size=1) == AsrSettings():
+            return model_name
+        parts = [self.backend, model_name, self.compute_type or "default"]
+        return ":".join(parts + [f"beam{self.beam_size or 0}"])
+
+
+def _whisper_result_segments(result: Dict[str, Any]) -> List[Segment]:
+    segments = []
+    for seg in result.get("segments", []):
+        text = seg.get("text", "").strip()
+        if text:
+            segments.append(
+                Segment(start=seg.get("start", 0.0), end=seg.get("end", 0.0), text=text)
+            )
+    return segments
+
+
+class AsrBackend:
+    """A speech recognition engine; every engine returns plain Segment lists."""
+
+    name = ""
+    # load_backend() name of the library the engine needs
+    module = ""
+    # Whether transcribe_parallel (windows in a process pool) can run this engine
+    parallel_windows = False
+    # compute_type used when none is given (None: the library decides)
+    default_compute_type: Optional[str] = None
+    # compute_type values the engine honours; others are rejected by configure_asr
+    compute_types: Tuple[str, ...] = ()
+
+    def available(self) -> bool:
+        return load_backend(self.module) is not None
+
+    def load(self, model_name: str, settings: AsrSettings) -> Any:
+        raise NotImplementedError
+
+    def transcribe(
+        self, audio: AudioInput, model_name: str, settings: AsrSettings
+    ) -> List[Segment]:
+        raise NotImplementedError
+
+
+class WhisperAsr(AsrBackend):
+    """openai-whisper (PyTorch); fp32 on CPU, fp16 on CUDA."""
+
+    name = "whisper"
+    module = "whisper"
+    parallel_windows = True
+    # fp16 or not is all openai-whisper offers; there is no int8 path
+    compute_types = ("float16", "float32")
+
+    def load(self, model_name: str, settings: AsrSettings) -> Any:
+        return load_whisper_model(model_name)
+
+    def transcribe(self, audio, model_name, settings):
+        model = self.load(model_name, settings)
+        kwargs: Dict[str, Any] = {}
+        if settings.beam_size:
+            kwargs["beam_size"] = settings.beam_size
+        if settings.compute_type:
+            kwargs["fp16"] = settings.compute_type == "float16"
+        # Whisper decodes paths with ffmpeg itself; buffers are used as-is
+        source = (
+            audio if np is not None and isinstance(audio, np.ndarray) else str(audio)
+        )
+        return _whisper_result_segments(
+            model.transcribe(source, verbose=False, **kwargs)
+        )
+
+
+class FasterWhisperAsr(AsrBackend):
+    """faster-whisper: Whisper on CTranslate2, int8-quantized by default.
+
+    With ``batch_size`` > 1 the audio is cut into speech windows that are
+    decoded as one batch (BatchedInferencePipeline, faster-whisper >= 1.1).
+    """
+
+    name = "faster-whisper"
+    module = "faster_whisper"
+    parallel_windows = True
+    default_compute_type = "int8"
+    compute_types = (
+        "auto",
+        "int8",
+        "int8_float32",
+        "int8_float16",
+        "int8_bfloat16",
+        "int16",
+        "float16",
+        "bfloat16",
+        "float32",
+    )
+
+    def load(self, model_name: str, settings: AsrSettings) -> Any:
+        fw = load_backend("faster_whisper")
+        compute_type = settings.compute_type or self.default_compute_type
+        return MODEL_MANAGER.get(
+            "whisper",
+            f"faster-whisper:{model_name}:{compute_type}",
+            "auto",
+            lambda: fw.WhisperModel(
+                model_name, device="auto", compute_type=compute_type
+            ),
+        )
+
+    def transcribe(self, audio, model_name, settings):
+        fw = load_backend("faster_whisper")
+        model = self.load(model_name, settings)
+        source = (
+            audio if np is not None and isinstance(audio, np.ndarray) else str(audio)
+        )
+        beam_size = settings.beam_size or 5
+        if settings.batch_size > 1 and hasattr(fw, "BatchedInferencePipeline"):
+            pipeline = fw.BatchedInferencePipeline(model=model)
+            segments, _ = pipeline.transcribe(
+                source, beam_size=beam_size, batch_size=settings.batch_size
+            )
+        else:
+            segments, _ = model.transcribe(source, beam_size=beam_size)
+        # Segments are produced lazily while iterating
+        return [
+            Segment(start=seg.start, end=seg.end, text=seg.text.strip())
+            for seg in segments
+            if seg.text.strip()
+        ]
+
+
+ASR_BACKENDS: Dict[str, AsrBackend] = {
+    backend.name: backend for backend in (WhisperAsr(), FasterWhisperAsr())
+}
+ASR = AsrSettings()
+
+
+def configure_asr(
+    backend: str = "whisper",
+    compute_type: Optional[str] = None,
+    beam_size: Optional[int] = None,
+    batch_size: int = 1,
+):
+    """Select the engine used by transcribe_with_whisper and the streaming API."""
+    global ASR
+    if backend not in ASR_BACKENDS:
+        raise ValueError(
+            f"Unknown ASR backend {backend!r}; choose from {', '.join(ASR_BACKENDS)}"
+        )
+    engine = ASR_BACKENDS[backend]
+    if compute_type and compute_type not in engine.compute_types:
+        raise ValueError(
+            f"{backend} does not support compute type {compute_type!r}; "
+            f"choose from {', '.join(engine.compute_types)}"
+        )
+    compute_type = compute_type or engine.default_compute_type
+    ASR = AsrSettings(backend, compute_type, beam_size, max(1, batch_size))
+
+
+def asr_backend() -> AsrBackend:
+    return ASR_BACKENDS[ASR.backend]
+
+
+# ---------------------------------------------------------------------------
+# Voice activity detection
+# ---------------------------------------------------------------------------
+
+VAD_MODES = ("off", "energy", "silero")
+VAD_FRAME_MS = 30
+# A frame is voiced this far above the noise floor (10th percentile frame level)
+VAD_THRESHOLD_DB = 12.0
+# Frames quieter than this (dBFS) are never voiced
+VAD_MIN_LEVEL_DB = -55.0
+# Speech level swings from syllable to syllable; sound that stays steadier
+# than this over VAD_MODULATION_SECONDS (music beds, hum) is skipped. 0 keeps it.
+VAD_MIN_MODULATION_DB = 3.0
+VAD_MODULATION_SECONDS = 1.0
+VAD_MIN_SPEECH_SECONDS = 0.25
+# Pauses shorter than this stay in the audio
+VAD_MIN_SILENCE_SECONDS = 0.6
+VAD_PAD_SECONDS = 0.2
+# Silence put between kept regions, so the model hears a pause at every cut
+VAD_JOIN_SECONDS = 0.1
+# Audio is measured in blocks of about this many seconds (memory-mapped input)
+_VAD_BLOCK_SECONDS = 600
+
+
+@dataclass
+class VadSettings:
+    """How audio is trimmed to speech before ASR; set from the CLI by configure_vad."""
+
+    mode: str = "off"
+    threshold_db: float = VAD_THRESHOLD_DB
+    min_modulation_db: float = VAD_MIN_MODULATION_DB
+
+    def cache_tag(self) -> str:
+        """Suffix for transcript cache keys; empty when audio is not trimmed."""
+        if self.mode == "off":
+            return ""
+        if self.mode == "energy":
+            return f":vad-energy-{self.threshold_db:g}-{self.min_modulation_db:g}"
+        return f":vad-{self.mode}"
+
+
+class TimeMap:
+    """Maps times in trimmed audio back to the original recording.
+
+    Kept region ``i`` starts at ``starts[i]`` seconds in the trimmed audio and
+    at ``sources[i]`` in the original, and lasts ``lengths[i]`` seconds.
+    """
+
+    def __init__(
+        self,
+        starts: "np.ndarray",
+        sources: "np.ndarray",
+        lengths: "np.ndarray",
+        total_seconds: float,
+    ):
+        self.starts = starts
+        self.sources = sources
+        self.lengths = lengths
+        self.total_seconds = total_seconds
+
+    @property
+    def kept_seconds(self) -> float:
+        return float(self.lengths.sum())
+
+    @property
+    def skipped_fraction(self) -> float:
+        if not self.total_seconds:
+            return 0.0
+        return 1.0 - self.kept_seconds / self.total_seconds
+
+    def to_source(self, times: Sequence[float], end: bool = False) -> "np.ndarray":
+        """Original times for trimmed ``times``.
+
+        A time inside the silence inserted at a cut moves to the next region's
+        start, or with ``end`` to the previous region's end.
+        """
+        t = np.asarray(times, dtype=np.float64)
+        last = len(self.starts) - 1
+        i = np.searchsorted(self.starts, t, side="left" if end else "right") - 1
+        i = np.clip(i, 0, last)
+        offset = np.maximum(t - self.starts[i], 0.0)
+        if not end:
+            past = (offset > self.lengths[i]) & (i < last)
+            i = np.where(past, i + 1, i)
+            offset = np.where(past, 0.0, offset)
+        return self.sources[i] + np.minimum(offset, self.lengths[i])
+
+    def restore(self, segments: Transcript) -> Transcript:
+        """``segments`` with their times moved back to the original recording."""
+        if isinstance(segments, SegmentTable):
+            return SegmentTable(
+                self.to_source(segments.start),
+                self.to_source(segments.end, end=True),
+                segments.speaker_ids,
+                segments.speakers,
+                segments.text,
+                segments.offsets,
+            )
+        starts = self.to_source([s.start for s in segments])
+        ends = self.to_source([s.end for s in segments], end=True)
+        return [
+            Segment(start=float(a), end=float(b), text=s.text, speaker=s.speaker)
+            for s, a, b in zip(segments, starts, ends)
+        ]
+
+
+def _frame_levels(audio: "np.ndarray", frame: int) -> "np.ndarray":
+    """Level of every ``frame`` samples in dBFS."""
+    frames = len(audio) // frame
+    levels = np.empty(frames, dtype=np.float32)
+    step = max(1, int(_VAD_BLOCK_SECONDS * SAMPLE_RATE) // frame)
+    for lo in range(0, frames, step):
+        hi = min(frames, lo + step)
+        block = np.asarray(audio[lo * frame : hi * frame], dtype=np.float32)
+        power = np.square(block).reshape(hi - lo, frame).mean(axis=1)
+        levels[lo:hi] = 10.0 * np.log10(power + 1e-10)
+    return levels
+
+
+def _energy_speech_frames(
+    audio: "np.ndarray", settings: VadSettings, frame: int
+) -> "np.ndarray":
+    """Boolean mask of frames that look like speech."""
+    levels = _frame_levels(audio, frame)
+    if not len(levels):
+        return np.zeros(0, dtype=bool)
+    floor = float(np.percentile(levels, 10))
+    voiced = levels > max(floor + settings.threshold_db, VAD_MIN_LEVEL_DB)
+    if settings.min_modulation_db > 0:
+        # Moving standard deviation of the level, centred on each frame
+        width = max(1, int(VAD_MODULATION_SECONDS * SAMPLE_RATE / frame))
+        kernel = np.full(width, 1.0 / width)
+        mean = np.convolve(levels, kernel, mode="same")
+        spread = np.convolve(np.square(levels, dtype=np.float64), kernel, "same")
+        deviation = np.sqrt(np.maximum(spread - np.square(mean), 0.0))
+        voiced &= deviation >= settings.min_modulation_db
+    return voiced
+
+
+def _mask_regions(
+    mask: "np.ndarray", frame: int, n: int
+) -> Tuple["np.ndarray", "np.ndarray"]:
+    """Sample ranges of the runs in a frame mask, cleaned up.
+
+    Short pauses are bridged, short bursts dropped, and what is left padded.
+    """
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1) * frame
+    ends = np.flatnonzero(edges == -1) * frame
+    if len(starts) > 1:
+        keep = starts[1:] - ends[:-1] >= VAD_MIN_SILENCE_SECONDS * SAMPLE_RATE
+        starts = starts[np.concatenate(([True], keep))]
+        ends = ends[np.concatenate((keep, [True]))]
+    long_enough = ends - starts >= VAD_MIN_SPEECH_SECONDS * SAMPLE_RATE
+    starts, ends = starts[long_enough], ends[long_enough]
+    pad = int(VAD_PAD_SECONDS * SAMPLE_RATE)
+    starts = np.maximum(starts - pad, 0)
+    ends = np.minimum(ends + pad, n)
+    if len(starts) > 1:
+        apart = starts[1:] > ends[:-1]
+        starts = starts[np.concatenate(([True], apart))]
+        ends = ends[np.concatenate((apart, [True]))]
+    return starts, ends
+
+
+def _silero_regions(audio: "np.ndarray") -> Tuple["np.ndarray", "np.ndarray"]:
+    vad = load_backend("silero_vad")
+    options = vad.VadOptions(
+        min_speech_duration_ms=int(VAD_MIN_SPEECH_SECONDS * 1000),
+        min_silence_duration_ms=int(VAD_MIN_SILENCE_SECONDS * 1000),
+        speech_pad_ms=int(VAD_PAD_SECONDS * 1000),
+    )
+    stamps = vad.get_speech_timestamps(np.asarray(audio, dtype=np.float32), options)
+    starts = np.array([s["start"] for s in stamps], dtype=np.int64)
+    ends = np.array([s["end"] for s in stamps], dtype=np.int64)
+    return starts, ends
+
+
+def speech_regions(
+    audio: "np.ndarray", settings: Optional[VadSettings] = None
+) -> Tuple["np.ndarray", "np.ndarray"]:
+    """``(starts, ends)`` sample ranges of speech in a 16 kHz buffer.
+
+    ``energy`` compares frame levels with the recording's noise floor and skips
+    steady sound; ``silero`` runs the Silero VAD model (needs faster-whisper).
+    """
+    settings = settings or VAD
+    if settings.mode == "silero":
+        if load_backend("silero_vad") is not None:
+            return _silero_regions(audio)
+        print("faster-whisper not installed; using energy voice detection.")
+    frame = int(SAMPLE_RATE * VAD_FRAME_MS / 1000)
+    mask = _energy_speech_frames(audio, settings, frame)
+    return _mask_regions(mask, frame, len(audio))
+
+
+def trim_silence(
+    audio: "np.ndarray",
+    settings: Optional[VadSettings] = None,
+    mmap_dir: Optional[Path] = None,
+) -> Tuple["np.ndarray", Optional[TimeMap]]:
+    """Cut a decoded buffer down to its speech regions.
+
+    Returns the trimmed audio and the TimeMap that restores segment times, or
+    the input and None when nothing would be cut (VAD off, all speech, or no
+    speech found). With ``mmap_dir``, speech cut from a memory-mapped input is
+    written to a raw file there and returned as a memory map; the caller owns
+    (and deletes) that directory.
+    """
+    settings = settings or VAD
+    if settings.mode == "off" or not len(audio):
+        return audio, None
+    starts, ends = speech_regions(audio, settings)
+    total = len(audio) / SAMPLE_RATE
+    if not len(starts):
+        print("Voice activity detection found no speech; transcribing everything.")
+        return audio, None
+    lengths = ends - starts
+    if lengths.sum() >= len(audio):
+        return audio, None
+    join = int(VAD_JOIN_SECONDS * SAMPLE_RATE)
+    positions = np.concatenate(([0], np.cumsum(lengths + join)[:-1]))
+    size = int(positions[-1] + lengths[-1])
+    spill_path = None
+    if mmap_dir is not None and isinstance(audio, np.memmap) and audio.filename:
+        # Spilled input stays out of RAM: so does its speech
+        src = Path(audio.filename)
+        fd, name = tempfile.mkstemp(
+            dir=mmap_dir, prefix=f"{src.stem}-speech-", suffix=".f32"
+        )
+        os.close(fd)
+        spill_path = Path(name)
+        trimmed = np.memmap(spill_path, dtype=np.float32, mode="w+", shape=(size,))
+    else:
+        trimmed = np.zeros(size, dtype=np.float32)
+    for pos, lo, hi in zip(positions, starts, ends):
+        trimmed[pos : pos + hi - lo] = audio[lo:hi]
+    if spill_path is not None:
+        trimmed.flush()
+        del trimmed
+        # Copy-on-write, like decode_audio's memory maps
+        trimmed = np.memmap(spill_path, dtype=np.float32, mode="c")
+    timemap = TimeMap(
+        positions / SAMPLE_RATE, starts / SAMPLE_RATE, lengths / SAMPLE_RATE, total
+    )
+    skipped = total - timemap.kept_seconds
+    print(
+        f"Voice activity: skipping {skipped:.0f}s of {total:.0f}s "
+        f"({timemap.skipped_fraction:.0%}) as non-speech."
+    )
+    METRICS.add(skipped_seconds=skipped)
+    return trimmed, timemap
+
+
+VAD = VadSettings()
+
+
+def configure_vad(
+    mode: str = "off",
+    threshold_db: float = VAD_THRESHOLD_DB,
+    min_modulation_db: float = VAD_MIN_MODULATION_DB,
+):
+    """Select how transcribe_with_whisper trims audio before recognition."""
+    global VAD
+    if mode not in VAD_MODES:
+        raise ValueError(
+            f"Unknown VAD mode {mode!r}; choose from {', '.join(VAD_MODES)}"
+        )
+    VAD = VadSettings(mode, threshold_db, min_modulation_db)
+
+
+def _audio_seconds(audio: AudioInput, segments: Optional[Transcript]) -> float:
+    # Exact for decoded buffers; the transcript's end time otherwise
+    if np is not None and isinstance(audio, np.ndarray):
+        return len(audio) / SAMPLE_RATE
+    return float(segments[-1].end) if segments else 0.0
+
+
+@instrumented("transcribe_with_whisper")
 def transcribe_with_whisper(
-    audio_path: Path, model_name: str = "medium"
-) -> Optional[List[Segment]]:
-    if whisper is None:
-        print("Whisper library not installed. Can't transcribe.")
+    audio: AudioInput, model_name: str = "medium", workers: int = 1
+) -> Optional[Transcript]:
+    """Transcribe a file path or a decoded 16 kHz float32 buffer.
+
+    Uses the configured ASR backend (configure_asr). Decoded buffers are first
+    trimmed to speech when voice activity detection is on (configure_vad), and
+    segment times are mapped back to the full recording. With ``workers`` > 1,
+    decoded audio longer than one window is transcribed in parallel by
+    transcribe_parallel, with the same backend and settings.
+    """
+    backend = asr_backend()
+    if not backend.available():
+        print(f"{backend.name} library not installed. Can't transcribe.")
         return None
     try:
-        # Use CUDA if available, otherwise CPU
-        device = "cuda" if torch and torch.cuda.is_available() else "cpu"
-        model = whisper.load_model(model_name, device=device)
-        result = model.transcribe(str(audio_path), verbose=False)
-        segments = []
-        for seg in result.get("segments", []):
-            text = seg.get("text", "").strip()
-            if text:
-                segments.append(
-                    Segment(
-                        start=seg.get("start", 0.0), end=seg.get("end", 0.0), text=text
-                    )
+        is_buffer = np is not None and isinstance(audio, np.ndarray)
+        # Speech trimmed from a memory-mapped recording is spilled here, and
+        # deleted with the directory once it has been transcribed
+        with tempfile.TemporaryDirectory(prefix="yt_speech_") as spill_dir:
+            speech, timemap = (
+                trim_silence(audio, mmap_dir=Path(spill_dir))
+                if is_buffer
+                else (audio, None)
+            )
+            if (
+                workers > 1
+                and backend.parallel_windows
+                and is_buffer
+                and len(speech) > WHISPER_WINDOW_SECONDS * SAMPLE_RATE
+            ):
+                transcript = transcribe_parallel(
+                    speech, model_name, workers, window_s=WHISPER_WINDOW_SECONDS
                 )
-        return segments if segments else None
+            else:
+                segments = backend.transcribe(speech, model_name, ASR)
+                transcript = to_segment_table(segments) if segments else None
+            del speech
+        if timemap is not None and transcript:
+            transcript = timemap.restore(transcript)
+        METRICS.add(audio_seconds=_audio_seconds(audio, transcript))
+        return transcript
     except RuntimeError as e:
         print(f"Whisper runtime error: {e}")
         return None
@@ -221,49 +2142,288 @@ def transcribe_with_whisper(
         return None
 
 
-def add_diarization(audio_path: Path, segments: List[Segment]) -> List[Segment]:
-    """Add speaker labels to segments using pyannote.audio."""
-    if Pipeline is None:
+def _sweep_overlaps(
+    seg_starts: Sequence[float],
+    seg_ends: Sequence[float],
+    turn_starts: Sequence[float],
+    turn_ends: Sequence[float],
+) -> List[List[Tuple[int, float, float]]]:
+    """For each segment, the (turn index, start, end) pieces of overlapping turns.
+
+    Turns and segments are each sorted once and scanned in a single sweep, so the
+    cost is O((S + T) log(S + T) + overlaps) rather than O(S * T).
+    """
+    seg_order = sorted(range(len(seg_starts)), key=lambda i: seg_starts[i])
+    turn_order = sorted(range(len(turn_starts)), key=lambda j: turn_starts[j])
+    result: List[List[Tuple[int, float, float]]] = [[] for _ in seg_starts]
+    active: List[int] = []
+    nxt = 0
+    for i in seg_order:
+        s, e = float(seg_starts[i]), float(seg_ends[i])
+        # Admit every turn that starts before this segment ends
+        while nxt < len(turn_order) and turn_starts[turn_order[nxt]] < e:
+            active.append(turn_order[nxt])
+            nxt += 1
+        # Segments arrive in start order, so turns ending before s are done
+        active = [j for j in active if turn_ends[j] > s]
+        for j in active:
+            lo = max(s, float(turn_starts[j]))
+            hi = min(e, float(turn_ends[j]))
+            if hi > lo:
+                result[i].append((j, lo, hi))
+    return result
+
+
+def align_speakers(
+    seg_starts: Sequence[float],
+    seg_ends: Sequence[float],
+    turn_starts: Sequence[float],
+    turn_ends: Sequence[float],
+    turn_labels: Sequence[str],
+) -> List[Optional[str]]:
+    """Speaker with the largest total overlap for each segment (None if no overlap)."""
+    speakers: List[Optional[str]] = []
+    for pieces in _sweep_overlaps(seg_starts, seg_ends, turn_starts, turn_ends):
+        totals: Dict[str, float] = {}
+        for j, lo, hi in pieces:
+            label = turn_labels[j]
+            totals[label] = totals.get(label, 0.0) + (hi - lo)
+        speakers.append(max(totals, key=totals.get) if totals else None)
+    return speakers
+
+
+def _speaker_runs(
+    seg: Segment, pieces: List[Tuple[int, float, float]], turn_labels: Sequence[str]
+) -> List[Tuple[str, float, float]]:
+    """Non-overlapping (label, start, end) runs covering the diarized part of seg."""
+    bounds = sorted(
+        {seg.start, seg.end} | {t for _, lo, hi in pieces for t in (lo, hi)}
+    )
+    runs: List[Tuple[str, float, float]] = []
+    for lo, hi in zip(bounds, bounds[1:]):
+        if hi <= seg.start or lo >= seg.end:
+            continue
+        # Attribute each elementary interval to the covering turn that is longest
+        best = None
+        for j, plo, phi in pieces:
+            if plo <= lo and phi >= hi and (best is None or phi - plo > best[1]):
+                best = (turn_labels[j], phi - plo)
+        if best is None:
+            continue
+        if runs and runs[-1][0] == best[0]:
+            runs[-1] = (best[0], runs[-1][1], hi)
+        else:
+            runs.append((best[0], lo, hi))
+    return runs
+
+
+def _split_at_speaker_changes(
+    seg: Segment, runs: List[Tuple[str, float, float]]
+) -> List[Segment]:
+    """Split seg into one segment per speaker run, dividing words by duration."""
+    words = seg.text.split()
+    total = sum(hi - lo for _, lo, hi in runs)
+    if len(runs) < 2 or len(words) < len(runs) or total <= 0:
+        return [seg]
+    out = []
+    taken = 0
+    elapsed = 0.0
+    for k, (label, lo, hi) in enumerate(runs):
+        elapsed += hi - lo
+        if k == len(runs) - 1:
+            upto = len(words)
+        else:
+            upto = round(len(words) * elapsed / total)
+            # Leave at least one word for each remaining run
+            upto = min(max(upto, taken + 1), len(words) - (len(runs) - k - 1))
+        text = " ".join(words[taken:upto])
+        taken = upto
+        start = seg.start if k == 0 else lo
+        end = seg.end if k == len(runs) - 1 else hi
+        out.append(Segment(start=start, end=end, text=text, speaker=label))
+    return out
+
+
+def assign_speakers(
+    segments: Transcript,
+    turn_starts: Sequence[float],
+    turn_ends: Sequence[float],
+    turn_labels: Sequence[str],
+    split: bool = False,
+) -> Transcript:
+    """Label segments with the maximum-overlap speaker from diarization turns.
+
+    With ``split`` set, segments spanning a speaker change are split into one
+    segment per speaker instead. A SegmentTable comes back as a SegmentTable.
+    """
+    is_table = isinstance(segments, SegmentTable)
+    if is_table:
+        seg_starts, seg_ends = segments.start.tolist(), segments.end.tolist()
+    else:
+        seg_starts = [s.start for s in segments]
+        seg_ends = [s.end for s in segments]
+    if not split:
+        labels = align_speakers(
+            seg_starts, seg_ends, turn_starts, turn_ends, turn_labels
+        )
+        if is_table:
+            # Only the speaker column changes; times and text are shared
+            return segments.with_speakers(
+                [
+                    old if label is None else label
+                    for label, old in zip(labels, segments.speaker_labels())
+                ]
+            )
+        for seg, label in zip(segments, labels):
+            if label is not None:
+                seg.speaker = label
+        return segments
+    out: List[Segment] = []
+    overlaps = _sweep_overlaps(seg_starts, seg_ends, turn_starts, turn_ends)
+    for seg, pieces in zip(segments, overlaps):
+        runs = _speaker_runs(seg, pieces, turn_labels)
+        if not runs:
+            out.append(seg)
+        elif len(runs) == 1:
+            seg.speaker = runs[0][0]
+            out.append(seg)
+        else:
+            out.extend(_split_at_speaker_changes(seg, runs))
+    return SegmentTable.from_segments(out) if is_table else out
+
+
+@instrumented("add_diarization")
+def add_diarization(
+    audio: AudioInput, segments: Transcript, split_speakers: bool = False
+) -> Transcript:
+    """Add speaker labels to segments using pyannote.audio.
+
+    ``audio`` is a file path or a decoded 16 kHz float32 buffer; buffers are
+    handed to pyannote as an in-memory waveform without copying.
+    """
+    if load_backend("pyannote") is None:
         print("Pyannote not installed. Skipping diarization.")
         return segments
     try:
-        # Load pipeline (requires HF token)
-        pipeline = Pipeline.from_pretrained(
-            "pyannote/speaker-diarization-3.1", use_auth_token=os.getenv("HF_TOKEN")
-        )
-        # Move to GPU if available
-        if torch and torch.cuda.is_available():
-            pipeline.to(torch.device("cuda"))
+        diar_pipeline = load_diarization_pipeline()
         # Run diarization
-        diarization = pipeline(str(audio_path))
-        # Assign speakers to segments
-        for seg in segments:
-            # Find overlapping speaker
-            speakers = []
-            for turn, _, speaker in diarization.itertracks(yield_label=True):
-                if turn.start < seg.end and turn.end > seg.start:
-                    speakers.append(speaker)
-            # Take the most overlapping or first
-            if speakers:
-                seg.speaker = speakers[0]  # Simple: assign first overlapping speaker
-        return segments
+        if np is not None and isinstance(audio, np.ndarray):
+            waveform = load_backend("torch").from_numpy(audio).unsqueeze(0)
+            diarization = diar_pipeline(
+                {"waveform": waveform, "sample_rate": SAMPLE_RATE}
+            )
+        else:
+            diarization = diar_pipeline(str(audio))
+        turn_starts, turn_ends, turn_labels = [], [], []
+        for turn, _, speaker in diarization.itertracks(yield_label=True):
+            turn_starts.append(turn.start)
+            turn_ends.append(turn.end)
+            turn_labels.append(speaker)
+        METRICS.add(audio_seconds=_audio_seconds(audio, segments))
+        return assign_speakers(
+            segments, turn_starts, turn_ends, turn_labels, split=split_speakers
+        )
     except Exception as e:
         print(f"Diarization failed: {e}. Continuing without speakers.")
         return segments
 
 
-def get_transcript(
-    video_url_or_id: str,
+def _whisper_cache_key(
+    video_id: str,
+    lang: str,
+    whisper_model: str,
+    use_diarization: bool,
+    split_speakers: bool,
+) -> str:
+    diarization = (
+        ("split" if split_speakers else "speakers") if use_diarization else "none"
+    )
+    return _transcript_cache_key(
+        video_id,
+        lang,
+        f"whisper:{ASR.cache_tag(whisper_model)}{VAD.cache_tag()}",
+        diarization,
+    )
+
+
+def _transcript_without_audio(
+    video_id: str,
     lang: str,
     whisper_model: str = "medium",
     use_diarization: bool = False,
-) -> Optional[List[Segment]]:
-    """Get transcript segments from captions or Whisper fallback."""
-    video_id = extract_video_id(video_url_or_id)
+    split_speakers: bool = False,
+    refresh: bool = False,
+) -> Optional[Transcript]:
+    """Cached transcript or official captions; None means audio is needed."""
     if not use_diarization:
+        caption_key = _transcript_cache_key(video_id, lang, "captions", "none")
+        segments = None if refresh else _cached_segments(caption_key)
+        if segments:
+            return segments
         segments = fetch_captions(video_id, lang)
         if segments:
+            TRANSCRIPT_CACHE.put(caption_key, segments_to_bytes(segments))
             return segments
+    if refresh:
+        return None
+    return _cached_segments(
+        _whisper_cache_key(
+            video_id, lang, whisper_model, use_diarization, split_speakers
+        )
+    )
+
+
+def _transcribe_downloaded(
+    audio_path: Path,
+    video_id: str,
+    lang: str,
+    whisper_model: str = "medium",
+    use_diarization: bool = False,
+    split_speakers: bool = False,
+    whisper_workers: int = 1,
+    audio: Optional[AudioInput] = None,
+) -> Optional[Transcript]:
+    """Whisper (plus optional diarization) on downloaded audio, then cache it."""
+    # Decode once and share the buffer; fall back to the file if decoding fails
+    if audio is None:
+        audio = decode_audio(audio_path, mmap_dir=audio_path.parent)
+    if audio is None:
+        audio = audio_path
+    segments = transcribe_with_whisper(audio, whisper_model, whisper_workers)
+    if not segments:
+        print("Local Whisper transcription failed.")
+        return None
+    if use_diarization:
+        segments = add_diarization(audio, segments, split_speakers)
+    TRANSCRIPT_CACHE.put(
+        _whisper_cache_key(
+            video_id, lang, whisper_model, use_diarization, split_speakers
+        ),
+        segments_to_bytes(segments),
+    )
+    return segments
+
+
+def get_transcript(
+    video_url_or_id: str,
+    lang: str,
+    whisper_model: str = "medium",
+    use_diarization: bool = False,
+    split_speakers: bool = False,
+    refresh: bool = False,
+    whisper_workers: int = 1,
+) -> Optional[Transcript]:
+    """Get transcript segments from captions or Whisper fallback.
+
+    Results are cached on disk per (video, lang, source, diarization); pass
+    ``refresh`` to ignore cached entries and overwrite them.
+    """
+    video_id = extract_video_id(video_url_or_id)
+    segments = _transcript_without_audio(
+        video_id, lang, whisper_model, use_diarization, split_speakers, refresh
+    )
+    if segments:
+        return segments
     print(
         "No official captions found or diarization requested. Attempting local Whisper transcription…"
     )
@@ -272,13 +2432,15 @@ def get_transcript(
         if not audio_path:
             print("Failed to download audio; cannot transcribe.")
             return None
-        segments = transcribe_with_whisper(audio_path, whisper_model)
-        if not segments:
-            print("Local Whisper transcription failed.")
-            return None
-        if use_diarization:
-            segments = add_diarization(audio_path, segments)
-    return segments
+        return _transcribe_downloaded(
+            audio_path,
+            video_id,
+            lang,
+            whisper_model,
+            use_diarization,
+            split_speakers,
+            whisper_workers,
+        )
 
 
 def chunk_text(text: str, max_len: int = 6000) -> List[str]:
@@ -300,247 +2462,3340 @@ def chunk_text(text: str, max_len: int = 6000) -> List[str]:
     return chunks
 
 
-def summarize_transcript(
-    segments: List[Segment], summary_model: str = "facebook/bart-large-cnn"
-) -> Summary:
-    """Summarize using a local transformers model. Falls back to LexRank if transformers unavailable."""
-    transcript = " ".join([s.text for s in segments])
-    # ... rest same as before
-    """Summarize using a local transformers model. Falls back to LexRank if transformers unavailable."""
-    if pipeline is None:
-        from sumy.parsers.plaintext import PlaintextParser
-        from sumy.nlp.tokenizers import Tokenizer
-        from sumy.summarizers.lex_rank import LexRankSummarizer
-
-        parser = PlaintextParser.from_string(transcript, Tokenizer("english"))
-        lex = LexRankSummarizer()
-        sentences = lex(parser.document, 7)
-        detailed = "\n\n".join([str(s) for s in sentences]) or transcript[:1200]
-        tldr = detailed.split(". ")[0][:200]
-        return Summary(tldr=tldr.strip(), detailed=detailed.strip())
-
-    # Initialize summarizer pipeline (batching through chunks)
-    tok = AutoTokenizer.from_pretrained(summary_model)
-    max_input = getattr(tok, "model_max_length", 1024)
-    # Provide a safety cap
-    if max_input > 4096:
-        max_input = 4096
-
-    # Split text into token-length chunks
-    # Rough split by characters approximating tokens (~4 chars per token heuristic)
-    approx_char_per_token = 4
-    est_tokens = len(transcript) / approx_char_per_token
-    if est_tokens <= max_input * 0.9:
-        chunks = [transcript]
-    else:
-        target_chars = int(max_input * approx_char_per_token * 0.85)
-        paragraphs = re.split(r"\n{2,}", transcript)
-        chunks = []
-        buf = []
-        length = 0
-        for para in paragraphs:
-            if length + len(para) > target_chars and buf:
-                chunks.append("\n\n".join(buf))
-                buf = [para]
-                length = len(para)
-            else:
-                buf.append(para)
-                length += len(para)
-        if buf:
-            chunks.append("\n\n".join(buf))
-
-    summarizer = pipeline(
-        "summarization",
-        model=summary_model,
-        tokenizer=tok,
-        device=(
-            0
-            if torch.cuda.is_available()
-            else ("mps" if torch.backends.mps.is_available() else -1)
-        ),
-    )
-    partials = []
-    for c in chunks:
-        # HuggingFace summarizers often have a 1024 or 2048 token limit; enforce truncation
-        if len(c) > max_input * approx_char_per_token:
-            c = c[: int(max_input * approx_char_per_token)]
-        res = summarizer(c, max_length=300, min_length=60, do_sample=False)
-        partials.append(res[0]["summary_text"].strip())
-
-    combined = "\n\n".join(partials)
-
-    # If multiple partials, produce a meta summary
-    if len(partials) > 1:
-        meta_input = combined
-        if len(meta_input) > max_input * approx_char_per_token:
-            meta_input = meta_input[: int(max_input * approx_char_per_token)]
-        meta = summarizer(meta_input, max_length=250, min_length=60, do_sample=False)[
-            0
-        ]["summary_text"].strip()
-    else:
-        meta = combined
+@dataclass
+class Chunk:
+    text: str
+    start: float
+    end: float
+    n_tokens: int
+    # Index (into the segments passed to chunk_segments) of the first segment
+    first_segment: int = 0
 
-    # TLTR heuristic: first sentence up to ~30 words
-    sentences = re.split(r"(?<=[.!?])\s+", meta)
-    first = sentences[0] if sentences else meta
-    words = first.split()
-    if len(words) > 30:
-        first = " ".join(words[:30]) + "…"
-    return Summary(tldr=first.strip(), detailed=meta.strip())
 
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+")
+# ~4 chars per token heuristic, only used when no tokenizer is available
+APPROX_CHARS_PER_TOKEN = 4
 
-def _gpu_available() -> bool:
-    if torch is None:
-        return False
-    return torch.cuda.is_available() or torch.backends.mps.is_available()
 
+def _token_lengths(texts: List[str], tokenizer: Any = None) -> List[int]:
+    """Token counts for ``texts`` in one batched tokenizer call."""
+    if not texts:
+        return []
+    if tokenizer is None:
+        return [max(1, math.ceil(len(t) / APPROX_CHARS_PER_TOKEN)) for t in texts]
+    enc = tokenizer(texts, add_special_tokens=False)["input_ids"]
+    return [len(ids) for ids in enc]
 
-def ensure_env_loaded():
-    # Still load .env in case user wants to store custom config variables
-    load_dotenv(override=False)
 
+def _split_oversized(
+    seg: Segment, n_tokens: int, max_tokens: int, tokenizer: Any = None
+) -> List[Tuple[str, float, float, int]]:
+    """Split a segment that exceeds ``max_tokens`` into sentence-sized pieces.
 
-def write_markdown(
-    out_path: Path,
-    title: str,
-    video_url: str,
-    summary: Summary,
-    segments: List[Segment],
-):
-    md = []
-    md.append(f"# {title}\n")
-    md.append(f"Source: {video_url}\n")
-    md.append("\n## TLTR\n")
-    md.append(f"{summary.tldr}\n")
-    md.append("\n## Detailed summary\n")
-    md.append(f"{summary.detailed}\n")
-    md.append("\n## Full transcript\n")
-    md.append("<details>\n<summary>Show transcript</summary>\n\n")
-    transcript_text = " ".join([s.text for s in segments])
-    md.append(transcript_text.strip())
-    md.append("\n\n</details>\n")
-    # Timestamped transcript
-    if any(s.start is not None for s in segments):
-        md.append("\n## Timestamped transcript\n")
-        md.append("<details>\n<summary>Show timestamped transcript</summary>\n\n")
-        for seg in segments:
-            start_str = f"{int(seg.start // 60):02d}:{seg.start % 60:05.2f}"
-            speaker = f" [{seg.speaker}]" if seg.speaker else ""
-            md.append(f"**{start_str}{speaker}:** {seg.text}\n")
-        md.append("\n</details>\n")
-    out_path.write_text("\n".join(md), encoding="utf-8")
+    Piece timestamps are interpolated by character position within the segment.
+    Sentences that are still too long are cut into equal word runs.
+    """
+    sentences = [x for x in _SENTENCE_SPLIT.split(seg.text) if x]
+    lengths = _token_lengths(sentences, tokenizer)
+    texts: List[str] = []
+    counts: List[int] = []
+    for sent, n in zip(sentences, lengths):
+        if n <= max_tokens:
+            texts.append(sent)
+            counts.append(n)
+            continue
+        words = sent.split()
+        parts = math.ceil(n / max_tokens) + 1
+        step = max(1, math.ceil(len(words) / parts))
+        for i in range(0, len(words), step):
+            texts.append(" ".join(words[i : i + step]))
+            counts.append(math.ceil(n * min(step, len(words) - i) / len(words)))
+    total_chars = max(1, sum(len(t) + 1 for t in texts))
+    duration = seg.end - seg.start
+    pieces = []
+    pos = 0
+    for text, n in zip(texts, counts):
+        start = seg.start + duration * pos / total_chars
+        pos += len(text) + 1
+        pieces.append((text, start, seg.start + duration * pos / total_chars, n))
+    return pieces
 
 
-def generate_content(
-    video_id: str, title: str, summary: Summary, segments: List[Segment]
-) -> dict:
-    """Generate structured content dictionary for export."""
-    # Convert segments to text for transcript
-    transcript_text = " ".join([s.text for s in segments])
-    # Also include segments for timestamped output
-    segment_dicts = [
-        {"start": s.start, "end": s.end, "text": s.text, "speaker": s.speaker}
-        for s in segments
-    ]
-    return {
-        "title": title,
-        "url": f"https://www.youtube.com/watch?v={video_id}",
-        "tldr": summary.tldr,
-        "detailed": summary.detailed,
-        "transcript": transcript_text,
-        "segments": segment_dicts,
-    }
+def chunk_segments(
+    segments: Transcript,
+    tokenizer: Any = None,
+    max_tokens: int = 1024,
+    overlap_tokens: int = 0,
+) -> List[Chunk]:
+    """Pack whole segments into chunks that fill ``max_tokens``.
+
+    All segment texts are tokenized in a single batched pass; segments larger
+    than the window are split at sentence boundaries. Consecutive chunks share
+    up to ``overlap_tokens`` tokens of trailing context. Each chunk keeps the
+    start/end time of the material it covers.
+    """
+    if tokenizer is not None:
+        # Leave room for BOS/EOS and the like
+        max_tokens -= tokenizer.num_special_tokens_to_add(pair=False)
+    max_tokens = max(1, max_tokens)
+    overlap_tokens = max(0, min(overlap_tokens, max_tokens // 2))
+
+    # Plain (start, end, text) rows; no per-segment objects for table input
+    indexed = [
+        (i, row) for i, row in enumerate(segment_rows(segments)) if row[2].strip()
+    ]
+    lengths = _token_lengths([row[2] for _, row in indexed], tokenizer)
+    # (text, start, end, n_tokens, segment index)
+    pieces: List[Tuple[str, float, float, int, int]] = []
+    for (i, (start, end, text, _)), n in zip(indexed, lengths):
+        if n > max_tokens:
+            seg = Segment(start=start, end=end, text=text)
+            pieces.extend(
+                piece + (i,)
+                for piece in _split_oversized(seg, n, max_tokens, tokenizer)
+            )
+        else:
+            pieces.append((text, start, end, n, i))
+
+    chunks: List[Chunk] = []
+    buf: List[Tuple[str, float, float, int, int]] = []
+    used = 0
+
+    def _emit():
+        chunks.append(
+            Chunk(
+                text=" ".join(p[0] for p in buf),
+                start=buf[0][1],
+                end=buf[-1][2],
+                n_tokens=used,
+                first_segment=buf[0][4],
+            )
+        )
+
+    for piece in pieces:
+        n = piece[3]
+        if buf and used + n > max_tokens:
+            _emit()
+            # Carry trailing pieces forward as overlap
+            carry: List[Tuple[str, float, float, int, int]] = []
+            carried = 0
+            for prev in reversed(buf):
+                if (
+                    carried + prev[3] > overlap_tokens
+                    or carried + prev[3] + n > max_tokens
+                ):
+                    break
+                carry.insert(0, prev)
+                carried += prev[3]
+            buf, used = carry, carried
+        buf.append(piece)
+        used += n
+    if buf:
+        _emit()
+    return chunks
+
+
+# Generation settings for the map (per chunk) and reduce (meta summary) passes
+MAP_GENERATION = {"max_length": 300, "min_length": 60, "do_sample": False}
+REDUCE_GENERATION = {"max_length": 250, "min_length": 60, "do_sample": False}
+
+
+# Extractive fallback when transformers is not installed: LexRank-style
+# centrality over a sparse TF-IDF cosine graph that keeps only each sentence's
+# top-k neighbours, so the cost stays near-linear in the number of sentences
+EXTRACTIVE_SENTENCES = 7
+EXTRACTIVE_NEIGHBORS = 10
+EXTRACTIVE_MIN_SIMILARITY = 0.1
+EXTRACTIVE_DAMPING = 0.85
+EXTRACTIVE_MMR_LAMBDA = 0.7  # 1.0 keeps pure centrality order (no redundancy removal)
+# Candidates this similar to a picked sentence are repeats and never picked
+EXTRACTIVE_DUPLICATE_SIMILARITY = 0.95
+# Term pairs compared per sentence; the most frequent terms are left out of the
+# similarity product beyond this budget (they still count towards the norms)
+EXTRACTIVE_PAIR_BUDGET = 200
+# Auto-generated captions are often unpunctuated; longer runs are cut up
+_MAX_SENTENCE_WORDS = 40
+# Any script; text is casefolded first, so "Straße" and "STRASSE" match
+_WORD_RE = re.compile(r"\w+(?:'\w+)?")
+_STOPWORDS = frozenset("""
+    a about above after again against all also am an and any are as at be
+    because been before being below between both but by can could did do does
+    doing down during each few for from further get got had has have having he
+    her here hers herself him himself his how i if in into is it its itself
+    just let me more most my myself no nor not now of off on once only or other
+    our ours ourselves out over own same she should so some such than that the
+    their theirs them themselves then there these they this those through to
+    too under until up very was we were what when where which while who whom
+    why will with would you your yours yourself yourselves i'm it's that's
+    don't you're we're they're i've can't gonna wanna yeah okay ok um uh oh like
+    really actually know mean thing things kind sort lot going right well
+    """.split())
+
+
+def _words(text: str) -> List[str]:
+    """Casefolded words of ``text``, for the extractive summarizer and the index."""
+    return _WORD_RE.findall(text.casefold())
+
+
+def _split_sentences(text: str) -> List[str]:
+    sentences = []
+    for sentence in re.split(r"(?<=[.!?])\s+", text):
+        words = sentence.split()
+        if not words:
+            continue
+        pieces = -(-len(words) // _MAX_SENTENCE_WORDS)
+        size = -(-len(words) // pieces)
+        for i in range(0, len(words), size):
+            sentences.append(" ".join(words[i : i + size]))
+    return sentences
+
+
+def _tfidf_rows(sentences: List[str]):
+    """L2-normalised sublinear TF-IDF rows as CSR arrays (indptr, indices, data)."""
+    vocab: Dict[str, int] = {}
+    term_ids: List[int] = []
+    lengths = []
+    for sentence in sentences:
+        ids = [
+            vocab.setdefault(word, len(vocab))
+            for word in _words(sentence)
+            if len(word) > 1 and word not in _STOPWORDS
+        ]
+        term_ids.extend(ids)
+        lengths.append(len(ids))
+    n, v = len(sentences), len(vocab)
+    if not v:
+        return None
+    rows = np.repeat(np.arange(n, dtype=np.int64), lengths)
+    keys, counts = np.unique(
+        rows * v + np.asarray(term_ids, dtype=np.int64), return_counts=True
+    )
+    rows, indices = keys // v, keys % v
+    df = np.bincount(indices, minlength=v)
+    idf = np.log((1.0 + n) / (1.0 + df)) + 1.0
+    data = (1.0 + np.log(counts)) * idf[indices]
+    data /= np.sqrt(np.bincount(rows, weights=data * data, minlength=n))[rows]
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=n), out=indptr[1:])
+    return indptr, indices, data, v
+
+
+def _similarity_pairs(indptr, indices, data, v: int):
+    """Sparse cosine similarities (rows, cols, values) between sentences.
+
+    Terms are admitted rarest first until the number of sentence pairs they
+    generate reaches the budget, so common words cannot make this quadratic.
+    """
+    n = len(indptr) - 1
+    df = np.bincount(indices, minlength=v)
+    order = np.argsort(df, kind="stable")
+    budget = max(EXTRACTIVE_PAIR_BUDGET * n, 2_000_000)
+    admitted = np.zeros(v, dtype=bool)
+    admitted[order[np.cumsum(df[order].astype(np.int64) ** 2) <= budget]] = True
+    keep = admitted[indices]
+    rows = np.repeat(np.arange(n, dtype=np.int64), np.diff(indptr))[keep]
+    cols, vals = indices[keep], data[keep]
+
+    sparse = load_backend("scipy")
+    if sparse is not None:
+        x = sparse.csr_matrix((vals, (rows, cols)), shape=(n, v))
+        sims = (x @ x.T).tocoo()
+        return sims.row.astype(np.int64), sims.col.astype(np.int64), sims.data
+
+    # NumPy only: expand every (sentence, term) entry over the term's postings
+    by_term = np.argsort(cols, kind="stable")
+    post_rows, post_vals = rows[by_term], vals[by_term]
+    starts = np.zeros(v + 1, dtype=np.int64)
+    np.cumsum(np.bincount(cols, minlength=v), out=starts[1:])
+    lens = starts[cols + 1] - starts[cols]
+    entry = np.repeat(np.arange(len(cols)), lens)
+    pos = (
+        starts[cols][entry]
+        + np.arange(len(entry))
+        - np.repeat(np.cumsum(lens) - lens, lens)
+    )
+    keys, inverse = np.unique(rows[entry] * n + post_rows[pos], return_inverse=True)
+    sums = np.bincount(inverse, weights=vals[entry] * post_vals[pos])
+    return keys // n, keys % n, sums
+
+
+def _neighbor_graph(rows, cols, sims, n: int):
+    """Symmetric top-k similarity graph as edge arrays (src, dst, weight)."""
+    mask = (rows != cols) & (sims >= EXTRACTIVE_MIN_SIMILARITY)
+    rows, cols, sims = rows[mask], cols[mask], sims[mask]
+    # Rank each sentence's neighbours by similarity and keep the first k
+    # (similarities are in (0, 1], so 2 * row - sim orders by row, then by sim)
+    order = np.argsort(2.0 * rows - sims)
+    rows, cols, sims = rows[order], cols[order], sims[order]
+    first = np.searchsorted(rows, rows)
+    top = np.arange(len(rows)) - first < EXTRACTIVE_NEIGHBORS
+    rows, cols, sims = rows[top], cols[top], sims[top]
+    # A kept edge is kept in both directions
+    keys, index = np.unique(
+        np.concatenate([rows * n + cols, cols * n + rows]), return_index=True
+    )
+    return keys // n, keys % n, np.concatenate([sims, sims])[index]
+
+
+def _centrality(src, dst, weight, n: int) -> "np.ndarray":
+    """PageRank-style power iteration over the weighted sentence graph."""
+    degree = np.bincount(src, weights=weight, minlength=n)
+    share = weight / degree[src] if len(src) else weight
+    dangling = degree == 0
+    scores = np.full(n, 1.0 / n)
+    for _ in range(100):
+        spread = np.bincount(dst, weights=share * scores[src], minlength=n)
+        # bincount of an empty edge list is integer-typed; add out of place
+        spread = spread + scores[dangling].sum() / n
+        updated = (1.0 - EXTRACTIVE_DAMPING) / n + EXTRACTIVE_DAMPING * spread
+        converged = np.abs(updated - scores).sum() < 1e-8
+        scores = updated
+        if converged:
+            break
+    return scores
+
+
+def _mmr_select(scores, indptr, indices, data, count: int) -> List[int]:
+    """Pick ``count`` central sentences, penalising near-duplicates (MMR)."""
+    candidates = np.argsort(-scores, kind="stable")[: count * 10]
+    # Dense rows for the few candidates, over just the terms they use
+    spans = [(indptr[i], indptr[i + 1]) for i in candidates]
+    terms = np.unique(np.concatenate([indices[a:b] for a, b in spans]))
+    dense = np.zeros((len(candidates), len(terms)))
+    for row, (a, b) in enumerate(spans):
+        dense[row, np.searchsorted(terms, indices[a:b])] = data[a:b]
+    sims = dense @ dense.T
+    relevance = scores[candidates] / scores[candidates].max()
+    chosen = [0]
+    while len(chosen) < min(count, len(candidates)):
+        penalty = sims[:, chosen].max(axis=1)
+        mmr = EXTRACTIVE_MMR_LAMBDA * relevance - (1 - EXTRACTIVE_MMR_LAMBDA) * penalty
+        mmr[chosen] = -np.inf
+        mmr[penalty >= EXTRACTIVE_DUPLICATE_SIMILARITY] = -np.inf
+        best = int(np.argmax(mmr))
+        if mmr[best] == -np.inf:
+            break
+        chosen.append(best)
+    return [int(candidates[i]) for i in chosen]
+
+
+def extractive_sentences(text: str, count: int = EXTRACTIVE_SENTENCES) -> List[str]:
+    """The ``count`` most central sentences of ``text``, in transcript order."""
+    sentences = _split_sentences(text)
+    if len(sentences) <= count or np is None:
+        return list(dict.fromkeys(sentences))[:count]
+    tfidf = _tfidf_rows(sentences)
+    if tfidf is None:
+        return sentences[:count]
+    indptr, indices, data, v = tfidf
+    n = len(sentences)
+    src, dst, weight = _neighbor_graph(*_similarity_pairs(indptr, indices, data, v), n)
+    scores = _centrality(src, dst, weight, n)
+    picked = _mmr_select(scores, indptr, indices, data, count)
+    return [sentences[i] for i in sorted(picked)]
+
+
+def _extractive_summary(transcript: str) -> Summary:
+    sentences = extractive_sentences(transcript)
+    detailed = "\n\n".join(sentences) or transcript[:1200]
+    # Whole first sentence ("?" and "!" end it too), capped at a word boundary
+    tldr = _tldr(sentences[0] if sentences else detailed)
+    return Summary(tldr=tldr, detailed=detailed.strip())
+
+
+def _tldr(meta: str) -> str:
+    # TLTR heuristic: first sentence up to ~30 words
+    sentences = re.split(r"(?<=[.!?])\s+", meta)
+    first = sentences[0] if sentences else meta
+    words = first.split()
+    if len(words) > 30:
+        first = " ".join(words[:30]) + "…"
+    return first.strip()
+
+
+def _summary_cache_key(model: str, text: str, generation: Dict[str, Any]) -> str:
+    digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    return DiskCache.key("summary", model, digest, generation)
+
+
+def _run_summarizer(
+    summarizer: Any,
+    texts: List[str],
+    batch_size: int,
+    generation: Dict[str, Any],
+    model_name: Optional[str] = None,
+) -> List[str]:
+    """Summarize ``texts`` in batches, returning results in input order.
+
+    With ``model_name`` set, results are memoized in SUMMARY_CACHE so unchanged
+    chunks (and duplicate texts within the call) are only summarized once.
+    """
+    if not texts:
+        return []
+    results: List[Optional[str]] = [None] * len(texts)
+    keys: List[Optional[str]] = [None] * len(texts)
+    todo: Dict[str, List[int]] = {}
+    for i, text in enumerate(texts):
+        if model_name is not None:
+            keys[i] = _summary_cache_key(model_name, text, generation)
+            cached = SUMMARY_CACHE.get(keys[i])
+            if cached is not None:
+                results[i] = cached.decode("utf-8")
+                continue
+        todo.setdefault(text, []).append(i)
+    generated: List[str] = []
+    if todo:
+        pending = list(todo)
+        # Batch similar lengths together to keep padding low
+        pending.sort(key=len, reverse=True)
+        outputs = summarizer(
+            pending,
+            batch_size=batch_size,
+            truncation=True,
+            **generation,
+        )
+        for text, out in zip(pending, outputs):
+            # Pipelines return a list per input when given a list
+            if isinstance(out, list):
+                out = out[0]
+            summary = out["summary_text"].strip()
+            generated.append(summary)
+            for i in todo[text]:
+                results[i] = summary
+            if model_name is not None:
+                SUMMARY_CACHE.put(keys[todo[text][0]], summary.encode("utf-8"))
+    if METRICS.count_tokens and generated:
+        # Pipelines carry their tokenizer; cache hits generated nothing
+        tok = getattr(summarizer, "tokenizer", None)
+        METRICS.add(tokens_generated=sum(_token_lengths(generated, tok)))
+    return [r or "" for r in results]
+
+
+def _group_for_reduce(lengths: List[int], max_tokens: int) -> List[List[int]]:
+    """Group consecutive partial summaries so each group fits in ``max_tokens``.
+
+    Every group holds at least two partials (when available), so each reduce
+    level strictly shrinks the number of partials.
+    """
+    groups: List[List[int]] = []
+    cur: List[int] = []
+    used = 0
+    for i, n in enumerate(lengths):
+        if len(cur) >= 2 and used + n > max_tokens:
+            groups.append(cur)
+            cur, used = [], 0
+        cur.append(i)
+        used += n
+    if cur:
+        if len(cur) == 1 and groups:
+            groups[-1].append(cur[0])
+        else:
+            groups.append(cur)
+    return groups
+
+
+# Single-video calls go through here too, so all summarization is one stage
+@instrumented("summarize_transcript")
+def summarize_batch(
+    transcripts: List[Transcript],
+    summary_model: str = "facebook/bart-large-cnn",
+    batch_size: int = 8,
+    chunk_overlap: int = 0,
+) -> List[Summary]:
+    """Hierarchical map-reduce summarization of several transcripts at once.
+
+    Chunks from all transcripts share the same inference batches. Partial
+    summaries are then reduced level by level, each level batched across
+    videos, until a single summary per video remains.
+    """
+    if load_backend("transformers") is None:
+        return [
+            _extractive_summary(transcript_text(segments)) for segments in transcripts
+        ]
+
+    # Shared tokenizer + summarizer pipeline (loaded once per process)
+    tok, summarizer = load_summarizer(summary_model)
+    max_input = _summary_window(tok)
+
+    # Map: token-accurate chunks of whole segments from every video
+    owners: List[int] = []
+    texts: List[str] = []
+    for v, segments in enumerate(transcripts):
+        for c in chunk_segments(segments, tok, max_input, overlap_tokens=chunk_overlap):
+            owners.append(v)
+            texts.append(c.text)
+    partials: List[List[str]] = [[] for _ in transcripts]
+    for v, text in zip(
+        owners,
+        _run_summarizer(summarizer, texts, batch_size, MAP_GENERATION, summary_model),
+    ):
+        partials[v].append(text)
+
+    summaries = []
+    for meta in _reduce_partials(
+        partials, tok, summarizer, max_input, batch_size, summary_model
+    ):
+        summaries.append(Summary(tldr=_tldr(meta), detailed=meta.strip()))
+    return summaries
+
+
+def _summary_window(tok: Any) -> int:
+    max_input = getattr(tok, "model_max_length", 1024)
+    # Provide a safety cap
+    if max_input > 4096:
+        max_input = 4096
+    return max_input
+
+
+def _reduce_partials(
+    partials: List[List[str]],
+    tok: Any,
+    summarizer: Any,
+    max_input: int,
+    batch_size: int,
+    summary_model: str,
+) -> List[str]:
+    """Reduce each video's partial summaries to one, batched across videos."""
+    partials = [list(p) for p in partials]
+    budget = max_input - tok.num_special_tokens_to_add(pair=False)
+    # Merge groups of partials that fit in one window, level by level
+    while any(len(p) > 1 for p in partials):
+        pending = [v for v, p in enumerate(partials) if len(p) > 1]
+        lengths = _token_lengths([x for v in pending for x in partials[v]], tok)
+        jobs: List[Tuple[int, str]] = []
+        pos = 0
+        for v in pending:
+            n = len(partials[v])
+            for group in _group_for_reduce(lengths[pos : pos + n], budget):
+                jobs.append((v, "\n\n".join(partials[v][i] for i in group)))
+            pos += n
+        reduced = _run_summarizer(
+            summarizer,
+            [text for _, text in jobs],
+            batch_size,
+            REDUCE_GENERATION,
+            summary_model,
+        )
+        for v in pending:
+            partials[v] = []
+        for (v, _), text in zip(jobs, reduced):
+            partials[v].append(text)
+    return [p[0] if p else "" for p in partials]
+
+
+def summarize_transcript(
+    segments: Transcript,
+    summary_model: str = "facebook/bart-large-cnn",
+    chunk_overlap: int = 0,
+    batch_size: int = 8,
+) -> Summary:
+    """Summarize using a local transformers model. Falls back to an extractive summary if transformers is unavailable."""
+    return summarize_batch(
+        [segments], summary_model, batch_size=batch_size, chunk_overlap=chunk_overlap
+    )[0]
+
+
+# ---------------------------------------------------------------------------
+# Streaming API
+# ---------------------------------------------------------------------------
+
+# Shorter windows than batch mode so the first segments show up quickly
+STREAM_WINDOW_SECONDS = 120.0
+# Queue sentinel shared by the streaming and pipeline workers
+_STOP = object()
+
+
+@dataclass
+class SegmentsEvent:
+    segments: Transcript
+
+
+@dataclass
+class PartialSummaryEvent:
+    index: int
+    start: float
+    end: float
+    text: str
+
+
+@dataclass
+class SummaryEvent:
+    summary: Summary
+
+
+StreamEvent = Union[SegmentsEvent, PartialSummaryEvent, SummaryEvent]
+
+
+def format_timestamp(seconds: float) -> str:
+    return f"{int(seconds // 60):02d}:{seconds % 60:05.2f}"
+
+
+def iter_transcript(
+    video_url_or_id: str,
+    lang: str,
+    whisper_model: str = "medium",
+    use_diarization: bool = False,
+    split_speakers: bool = False,
+    refresh: bool = False,
+    whisper_workers: int = 1,
+) -> Iterator[List[Segment]]:
+    """Like get_transcript, but yields segment batches as they are produced.
+
+    Captions and cached transcripts arrive in one batch. Whisper output is
+    yielded window by window (STREAM_WINDOW_SECONDS, cut at silence) when the
+    audio could be decoded; diarization and parallel transcription need the
+    whole file, so those yield once at the end.
+    """
+    video_id = extract_video_id(video_url_or_id)
+    segments = _transcript_without_audio(
+        video_id, lang, whisper_model, use_diarization, split_speakers, refresh
+    )
+    if segments:
+        yield segments
+        return
+    print(
+        "No official captions found or diarization requested. Attempting local Whisper transcription…"
+    )
+    with tempfile.TemporaryDirectory() as td:
+        audio_path = download_audio(video_url_or_id, Path(td))
+        if not audio_path:
+            print("Failed to download audio; cannot transcribe.")
+            return
+        audio = decode_audio(audio_path, mmap_dir=Path(td))
+        if (
+            audio is None
+            or not asr_backend().available()
+            or use_diarization
+            or whisper_workers > 1
+        ):
+            segments = _transcribe_downloaded(
+                audio_path,
+                video_id,
+                lang,
+                whisper_model,
+                use_diarization,
+                split_speakers,
+                whisper_workers,
+                audio=audio,
+            )
+            if segments:
+                yield segments
+            return
+        backend = asr_backend()
+        # Windows are cut from the trimmed audio; merging works in its time
+        # base, and only what is yielded or cached is mapped back
+        speech, timemap = trim_silence(audio, mmap_dir=Path(td))
+        merged: List[Segment] = []
+        for lo, hi, own_lo, own_hi in split_on_silence(speech, STREAM_WINDOW_SECONDS):
+            window = backend.transcribe(speech[lo:hi], whisper_model, ASR)
+            added = _merge_window(
+                merged,
+                lo / SAMPLE_RATE,
+                own_lo / SAMPLE_RATE,
+                own_hi / SAMPLE_RATE,
+                window,
+            )
+            if added:
+                yield timemap.restore(added) if timemap is not None else added
+        if not merged:
+            print("Local Whisper transcription failed.")
+            return
+        if timemap is not None:
+            merged = timemap.restore(merged)
+        TRANSCRIPT_CACHE.put(
+            _whisper_cache_key(video_id, lang, whisper_model, False, False),
+            segments_to_bytes(merged),
+        )
+
+
+def stream_video(
+    video_url_or_id: str,
+    lang: str,
+    whisper_model: str = "medium",
+    summary_model: str = "facebook/bart-large-cnn",
+    use_diarization: bool = False,
+    split_speakers: bool = False,
+    refresh: bool = False,
+    whisper_workers: int = 1,
+    chunk_overlap: int = 0,
+    batch_size: int = 8,
+) -> Iterator[StreamEvent]:
+    """Transcribe and summarize one video, yielding events as results appear.
+
+    Transcription runs in a background thread. Each time the transcript so far
+    fills a summarization window, that chunk is summarized right away, so
+    partial summaries arrive while transcription continues. Yields nothing
+    further after the segments if no transcript could be produced.
+    """
+    batches: "queue.Queue" = queue.Queue()
+    # Spans from the transcription thread belong to the caller's video
+    video_id = METRICS.video_id
+
+    def _produce():
+        METRICS.video_id = video_id
+        try:
+            for batch in iter_transcript(
+                video_url_or_id,
+                lang,
+                whisper_model,
+                use_diarization,
+                split_speakers,
+                refresh,
+                whisper_workers,
+            ):
+                batches.put(batch)
+        except Exception as e:
+            batches.put(e)
+        finally:
+            batches.put(_STOP)
+
+    threading.Thread(target=_produce, name="transcribe", daemon=True).start()
+
+    tok = summarizer = None
+    max_input = 0
+    if load_backend("transformers") is not None:
+        tok, summarizer = load_summarizer(summary_model)
+        max_input = _summary_window(tok)
+
+    segments: List[Segment] = []
+    pending: List[Segment] = []
+    partials: List[str] = []
+
+    def _summarize(chunks: List[Chunk]) -> Iterator[PartialSummaryEvent]:
+        texts = _run_summarizer(
+            summarizer,
+            [c.text for c in chunks],
+            batch_size,
+            MAP_GENERATION,
+            summary_model,
+        )
+        for c, text in zip(chunks, texts):
+            partials.append(text)
+            yield PartialSummaryEvent(len(partials) - 1, c.start, c.end, text)
+
+    while True:
+        item = batches.get()
+        if item is _STOP:
+            break
+        if isinstance(item, Exception):
+            raise item
+        segments.extend(item)
+        yield SegmentsEvent(item)
+        if summarizer is None:
+            continue
+        pending.extend(item)
+        chunks = chunk_segments(pending, tok, max_input, overlap_tokens=chunk_overlap)
+        if len(chunks) > 1:
+            # Every chunk but the last is final; the last may still grow
+            yield from _summarize(chunks[:-1])
+            pending = pending[chunks[-1].first_segment :]
+
+    if not segments:
+        return
+    if summarizer is None:
+        yield SummaryEvent(_extractive_summary(transcript_text(segments)))
+        return
+    yield from _summarize(
+        chunk_segments(pending, tok, max_input, overlap_tokens=chunk_overlap)
+    )
+    meta = _reduce_partials(
+        [partials], tok, summarizer, max_input, batch_size, summary_model
+    )[0]
+    yield SummaryEvent(Summary(tldr=_tldr(meta), detailed=meta.strip()))
+
+
+def _gpu_available() -> bool:
+    torch = load_backend("torch")
+    if torch is None:
+        return False
+    return torch.cuda.is_available() or torch.backends.mps.is_available()
+
+
+def ensure_env_loaded():
+    # Still load .env in case user wants to store custom config variables
+    load_dotenv(override=False)
+
+
+EXPORT_FORMATS = ("md", "html", "json", "pdf")
+
+
+def _markdown_blocks(content_dict: dict) -> Iterator[str]:
+    """Markdown for a content dict, one self-contained block at a time.
+
+    Blocks are joined with a newline, and every block is separated from the
+    next by a blank line, so each renders to HTML on its own.
+    """
+    yield f"# {content_dict['title']}\n"
+    yield f"Source: {content_dict['url']}\n"
+    yield "\n## TLTR\n"
+    yield f"{content_dict['tldr']}\n"
+    yield "\n## Detailed summary\n"
+    yield f"{content_dict['detailed']}\n"
+    yield "\n## Full transcript\n"
+    yield "<details>\n<summary>Show transcript</summary>\n\n"
+    yield content_dict["transcript"].strip()
+    yield "\n\n</details>\n"
+    # Timestamped transcript
+    segments = content_dict.get("segments") or []
+    started = False
+    for start, _, text, speaker in segment_rows(segments):
+        if not started:
+            if start is None:
+                break
+            yield "\n## Timestamped transcript\n"
+            yield "<details>\n<summary>Show timestamped transcript</summary>\n\n"
+            started = True
+        speaker = f" [{speaker}]" if speaker else ""
+        yield f"**{format_timestamp(start or 0.0)}{speaker}:** {text}\n"
+    if started:
+        yield "\n</details>\n"
+
+
+class _MarkdownSink:
+    def __init__(self, fh):
+        self.fh = fh
+        self.first = True
+
+    def block(self, md: str):
+        if not self.first:
+            self.fh.write("\n")
+        self.fh.write(md)
+        self.first = False
+
+    def close(self):
+        pass
+
+
+class _HtmlSink:
+    """Renders each Markdown block as it arrives (raw Markdown without markdown-it)."""
+
+    def __init__(self, fh):
+        self.fh = fh
+        self.parser = MarkdownIt("commonmark") if MarkdownIt is not None else None
+        self.raw = _MarkdownSink(fh) if self.parser is None else None
+
+    def block(self, md: str):
+        if self.raw is not None:
+            # Fallback: return MD as-is (use browser raw view or something)
+            self.raw.block(md)
+        else:
+            self.fh.write(self.parser.render(md))
+
+    def close(self):
+        pass
+
+
+class _PdfSink(_HtmlSink):
+    """Streams HTML to a temp file next to the target, then runs WeasyPrint."""
+
+    def __init__(self, path: Path):
+        weasyprint = load_backend("weasyprint")
+        if weasyprint is None:
+            raise ImportError(
+                "WeasyPrint not available. Install with 'pip install weasyprint'."
+            )
+        self.weasyprint = weasyprint
+        self.path = Path(path)
+        fd, self.tmp = tempfile.mkstemp(
+            dir=self.path.parent, prefix=f".{self.path.stem}-", suffix=".html"
+        )
+        super().__init__(os.fdopen(fd, "w", encoding="utf-8"))
+
+    def close(self):
+        self.fh.close()
+        try:
+            self.weasyprint.HTML(filename=self.tmp).write_pdf(str(self.path))
+        finally:
+            os.unlink(self.tmp)
+
+
+def _write_json_table(table: SegmentTable, fh):
+    # Same layout json.dump(indent=2) gives a list of segment dicts one level deep
+    dumps = json.dumps
+    if not len(table):
+        fh.write("[]")
+        return
+    sep = "[\n    "
+    for start, end, text, speaker in table.rows():
+        fh.write(
+            f'{sep}{{\n      "start": {dumps(start)},\n      "end": {dumps(end)},'
+            f'\n      "text": {dumps(text, ensure_ascii=False)},'
+            f'\n      "speaker": {dumps(speaker, ensure_ascii=False)}\n    }}'
+        )
+        sep = ",\n    "
+    fh.write("\n  ]")
+
+
+def _write_json(content_dict: dict, fh):
+    """Stream ``content_dict`` as indent=2 JSON, segment tables row by row."""
+    if not content_dict:
+        fh.write("{}")
+        return
+    encoder = json.JSONEncoder(indent=2, ensure_ascii=False)
+    sep = "{\n  "
+    for key, value in content_dict.items():
+        fh.write(f"{sep}{json.dumps(str(key), ensure_ascii=False)}: ")
+        sep = ",\n  "
+        if isinstance(value, SegmentTable):
+            _write_json_table(value, fh)
+            continue
+        # Newlines only ever appear between tokens, so re-indent them one level
+        for piece in encoder.iterencode(value):
+            fh.write(piece.replace("\n", "\n  "))
+    fh.write("\n}")
+
+
+def _partial_path(path: Path) -> Path:
+    """Unused hidden name next to ``path``, for an atomic os.replace later."""
+    # Not created here (unlike mkstemp) so the file gets the usual umask mode
+    return path.with_name(f".{path.name}.{os.urandom(4).hex()}.part")
+
+
+@instrumented("export_content")
+def render_content(content_dict: dict, outputs: Dict[str, Path]):
+    """Write ``content_dict`` to several formats in one pass.
+
+    ``outputs`` maps a format in EXPORT_FORMATS to its output path. The Markdown
+    is produced once, block by block, and fanned out to the md/html/pdf sinks
+    as it is generated, so no format is built up as one big string.
+
+    Every format is written to a temp file beside its target and renamed into
+    place only once all of them succeeded, so a crash or error never leaves a
+    half-written export behind.
+    """
+    for fmt in outputs:
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Unsupported format: {fmt}")
+    partial = {fmt: _partial_path(Path(path)) for fmt, path in outputs.items()}
+    handles = []
+    sinks = []
+    try:
+        try:
+            for fmt, path in partial.items():
+                if fmt == "json":
+                    with open(path, "w", encoding="utf-8") as fh:
+                        _write_json(content_dict, fh)
+                elif fmt == "pdf":
+                    sinks.append(_PdfSink(path))
+                    handles.append(sinks[-1].fh)
+                else:
+                    fh = open(path, "w", encoding="utf-8")
+                    handles.append(fh)
+                    sinks.append(_MarkdownSink(fh) if fmt == "md" else _HtmlSink(fh))
+            if sinks:
+                for md in _markdown_blocks(content_dict):
+                    for sink in sinks:
+                        sink.block(md)
+        finally:
+            for fh in handles:
+                if not fh.closed:
+                    fh.close()
+        for sink in sinks:
+            sink.close()
+        for fmt, path in partial.items():
+            os.replace(path, outputs[fmt])
+    finally:
+        for path in partial.values():
+            if path.exists():
+                path.unlink()
+
+
+def write_markdown(
+    out_path: Path,
+    title: str,
+    video_url: str,
+    summary: Summary,
+    segments: Transcript,
+):
+    content = {
+        "title": title,
+        "url": video_url,
+        "tldr": summary.tldr,
+        "detailed": summary.detailed,
+        "transcript": transcript_text(segments),
+        "segments": segments,
+    }
+    render_content(content, {"md": out_path})
+
+
+def generate_content(
+    video_id: str, title: str, summary: Summary, segments: Transcript
+) -> dict:
+    """Generate structured content dictionary for export.
+
+    ``segments`` is kept as a SegmentTable (read it with segment_rows); without
+    numpy it falls back to a list of segment dicts.
+    """
+    table = to_segment_table(segments)
+    if not isinstance(table, SegmentTable):
+        table = [
+            {"start": s.start, "end": s.end, "text": s.text, "speaker": s.speaker}
+            for s in segments
+        ]
+    return {
+        "title": title,
+        "url": f"https://www.youtube.com/watch?v={video_id}",
+        "tldr": summary.tldr,
+        "detailed": summary.detailed,
+        "transcript": transcript_text(segments),
+        "segments": table,
+    }
 
 
 def markdown_to_html(content_dict: dict) -> str:
     """Convert content dict to HTML using markdown-it."""
-    md = []
-    md.append(f"# {content_dict['title']}\n")
-    md.append(f"Source: {content_dict['url']}\n")
-    md.append("\n## TLTR\n")
-    md.append(f"{content_dict['tldr']}\n")
-    md.append("\n## Detailed summary\n")
-    md.append(f"{content_dict['detailed']}\n")
-    md.append("\n## Full transcript\n")
-    md.append("<details>\n<summary>Show transcript</summary>\n\n")
-    md.append(content_dict["transcript"].strip())
-    md.append("\n\n</details>\n")
-    # Timestamped transcript
-    segments = content_dict.get("segments", [])
-    if segments and any(s.get("start") is not None for s in segments):
-        md.append("\n## Timestamped transcript\n")
-        md.append("<details>\n<summary>Show timestamped transcript</summary>\n\n")
-        for seg in segments:
-            start = seg.get("start", 0.0)
-            start_str = f"{int(start // 60):02d}:{start % 60:05.2f}"
-            speaker = f" [{seg.get('speaker')}]" if seg.get("speaker") else ""
-            text = seg.get("text", "")
-            md.append(f"**{start_str}{speaker}:** {text}\n")
-        md.append("\n</details>\n")
-    md_text = "\n".join(md)
-    if MarkdownIt is None:
-        # Fallback: return MD as-is (use browser raw view or something)
-        return md_text
-    md_parser = MarkdownIt("commonmark")
-    html = md_parser.render(md_text)
-    return html
+    out = io.StringIO()
+    sink = _HtmlSink(out)
+    for md in _markdown_blocks(content_dict):
+        sink.block(md)
+    return out.getvalue()
+
+
+@instrumented("fetch_video_title")
+def fetch_video_title(video_id: str) -> str:
+    # Try oEmbed (no API key required)
+    try:
+        r = get_http_session().get(
+            OEMBED_URL,
+            params={
+                "url": f"https://www.youtube.com/watch?v={video_id}",
+                "format": "json",
+            },
+        )
+        if r.ok:
+            return r.json().get("title") or f"YouTube Video {video_id}"
+        print(f"Title lookup for {video_id} failed: HTTP {r.status_code}")
+    except Exception as e:
+        print(f"Title lookup for {video_id} failed: {e}")
+    return f"YouTube Video {video_id}"
+
+
+def fetch_metadata_batch(
+    video_ids: List[str],
+    lang: str,
+    max_workers: int = 8,
+    transcript: Optional[Callable[[str], Optional[Transcript]]] = None,
+) -> Dict[str, Tuple[str, Optional[Transcript]]]:
+    """Resolve (title, caption segments) for many videos concurrently.
+
+    ``transcript`` replaces the caption lookup (default: fetch_captions in
+    ``lang``), e.g. to go through the transcript cache first. Requests share
+    the pooled, rate-limited HTTP session of each thread.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    def _one(video_id: str) -> Tuple[str, Optional[Transcript]]:
+        with video_context(video_id):
+            segments = (
+                transcript(video_id)
+                if transcript is not None
+                else fetch_captions(video_id, lang)
+            )
+            return fetch_video_title(video_id), segments
+
+    unique = list(dict.fromkeys(video_ids))
+    if len(unique) <= 1 or max_workers <= 1:
+        return {video_id: _one(video_id) for video_id in unique}
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(unique))) as ex:
+        return dict(zip(unique, ex.map(_one, unique)))
+
+
+def export_content(content_dict: dict, path: Path, fmt: str):
+    """Export content dict to specified format (md, json, html, pdf)."""
+    render_content(content_dict, {fmt: path})
+
+
+def render_bytes(content_dict: dict, fmt: str) -> bytes:
+    """Export content dict to ``fmt`` in memory, without touching the disk."""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported format: {fmt}")
+    out = io.StringIO()
+    if fmt == "json":
+        _write_json(content_dict, out)
+        return out.getvalue().encode("utf-8")
+    sink = _MarkdownSink(out) if fmt == "md" else _HtmlSink(out)
+    for md in _markdown_blocks(content_dict):
+        sink.block(md)
+    if fmt != "pdf":
+        return out.getvalue().encode("utf-8")
+    weasyprint = load_backend("weasyprint")
+    if weasyprint is None:
+        raise ImportError(
+            "WeasyPrint not available. Install with 'pip install weasyprint'."
+        )
+    # write_pdf() with no target returns the document as bytes
+    return weasyprint.HTML(string=out.getvalue()).write_pdf()
+
+
+# ---------------------------------------------------------------------------
+# Search index
+# ---------------------------------------------------------------------------
+
+# Runs are not merged beyond this many postings (a merge loads both runs)
+INDEX_MAX_MERGE_POSTINGS = 50_000_000
+_INDEX_SEGMENT_DTYPE = [
+    ("video", "<u4"),
+    ("speaker", "<i4"),
+    ("start", "<f8"),
+    ("end", "<f8"),
+    ("text", "<u8"),
+    ("length", "<u4"),
+]
+# Postings run files: sorted term hashes, per-term offsets, then per posting
+# its position key (video slot << 32 | word position) and segment row
+_INDEX_RUN_PARTS = ("terms", "offsets", "keys", "segments")
+_QUERY_RE = re.compile(r'"([^"]*)"|(\S+)')
+
+
+def default_index_dir(cache_dir: Optional[Path] = None) -> Path:
+    """Where --index and --search keep the index: ``<cache dir>/index``."""
+    return Path(cache_dir or default_cache_dir()) / "index"
+
+
+@dataclass
+class SearchHit:
+    video_id: str
+    title: str
+    start: float
+    end: float
+    speaker: Optional[str]
+    text: str
+    score: float
+
+    @property
+    def url(self) -> str:
+        """Deep link that starts playback at the segment."""
+        return f"https://www.youtube.com/watch?v={self.video_id}&t={int(self.start)}"
+
+
+def _term_hashes(terms: Sequence[str]) -> "np.ndarray":
+    return np.array(
+        [
+            int.from_bytes(
+                hashlib.blake2b(t.encode("utf-8"), digest_size=8).digest(), "little"
+            )
+            for t in terms
+        ],
+        dtype=np.uint64,
+    )
+
+
+def _save_npy(path: Path, array: "np.ndarray"):
+    tmp = _partial_path(path)
+    with open(tmp, "wb") as fh:
+        np.save(fh, array)
+    os.replace(tmp, path)
+
+
+def _append_at(path: Path, offset: int, data: bytes):
+    """Write ``data`` at ``offset``, dropping anything after it (a torn append)."""
+    with open(path, "r+b" if path.exists() else "wb") as fh:
+        fh.seek(offset)
+        fh.write(data)
+        fh.truncate()
+        fh.flush()
+        os.fsync(fh.fileno())
+
+
+class TranscriptIndex:
+    """Persistent inverted index of transcript words, for timestamped search.
+
+    Files under ``root``:
+
+    - ``manifest.json``: committed sizes of the other files and the list of
+      postings runs. It is replaced atomically after everything else is
+      written, so a crash mid-flush leaves the previous state.
+    - ``videos.jsonl``: one line per indexed video (ID, title, speakers,
+      segment range). Indexing a video again supersedes its older entry.
+    - ``segments.bin`` / ``text.bin``: fixed-size segment records and their
+      UTF-8 text.
+    - ``run-N.{terms,offsets,keys,segments}.npy``: immutable postings runs.
+      Terms are sorted 64-bit word hashes. Each term's postings are position
+      keys (video slot << 32 | word position, ascending) and segment rows.
+      Each flush appends a run for the new videos and merges trailing runs
+      of similar size.
+
+    Everything except the video list is memory-mapped, so a query only reads
+    the postings of its words and the segments it returns. Single writer.
+    """
+
+    def __init__(self, root: Path, flush_every: int = 32):
+        if np is None:
+            raise ImportError("The search index requires numpy.")
+        self.root = Path(root)
+        self.flush_every = max(1, flush_every)
+        self._lock = threading.RLock()
+        self._pending: List[Tuple[str, str, List[Tuple]]] = []
+        self._load()
+
+    def _load(self):
+        path = self.root / "manifest.json"
+        try:
+            self._mtime = path.stat().st_mtime_ns
+            self.manifest = json.loads(path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            self._mtime = None
+            self.manifest = {
+                "videos_bytes": 0,
+                "segments": 0,
+                "text_bytes": 0,
+                "runs": [],
+                "next_run": 0,
+            }
+        m = self.manifest
+        self.videos: List[Dict[str, Any]] = []
+        if m["videos_bytes"]:
+            with open(self.root / "videos.jsonl", "rb") as fh:
+                self.videos = [
+                    json.loads(line) for line in fh.read(m["videos_bytes"]).splitlines()
+                ]
+        self._slots = {
+            video["video_id"]: slot for slot, video in enumerate(self.videos)
+        }
+        self._alive = np.zeros(len(self.videos), dtype=bool)
+        self._alive[list(self._slots.values())] = True
+        self._segments = (
+            np.memmap(
+                self.root / "segments.bin",
+                dtype=_INDEX_SEGMENT_DTYPE,
+                mode="r",
+                shape=(m["segments"],),
+            )
+            if m["segments"]
+            else np.zeros(0, dtype=_INDEX_SEGMENT_DTYPE)
+        )
+        self._text = (
+            np.memmap(
+                self.root / "text.bin",
+                dtype=np.uint8,
+                mode="r",
+                shape=(m["text_bytes"],),
+            )
+            if m["text_bytes"]
+            else np.zeros(0, dtype=np.uint8)
+        )
+        self._runs = [self._open_run(run["name"]) for run in m["runs"]]
+
+    def _open_run(self, name: str):
+        return tuple(
+            np.load(self.root / f"{name}.{part}.npy", mmap_mode="r")
+            for part in _INDEX_RUN_PARTS
+        )
+
+    def _refresh(self):
+        # Pick up flushes made by another process since we last looked
+        try:
+            mtime = (self.root / "manifest.json").stat().st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if mtime != self._mtime:
+            self._load()
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def add(self, content: dict):
+        """Queue a generate_content() result; written by the next flush()."""
+        video_id = extract_video_id(content["url"])
+        rows = list(segment_rows(content["segments"]))
+        with self._lock:
+            self._pending.append((video_id, content["title"], rows))
+            if len(self._pending) >= self.flush_every:
+                self.flush()
+
+    def close(self):
+        self.flush()
+
+    def flush(self):
+        """Append the queued videos as a new run and commit them."""
+        with self._lock:
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, []
+            self._refresh()
+            self.root.mkdir(parents=True, exist_ok=True)
+            m = dict(self.manifest)
+            first_slot = len(self.videos)
+            n_segments = m["segments"]
+            text_bytes = m["text_bytes"]
+
+            lines, records, texts = [], [], []
+            words: List[str] = []
+            words_per_segment, words_per_video = [], []
+            for slot, (video_id, title, rows) in enumerate(pending, first_slot):
+                speakers: Dict[str, int] = {}
+                lo = n_segments + len(records)
+                video_words = 0
+                for start, end, text, speaker in rows:
+                    seg_words = _words(text)
+                    words += seg_words
+                    words_per_segment.append(len(seg_words))
+                    video_words += len(seg_words)
+                    data = text.encode("utf-8")
+                    records.append(
+                        (
+                            slot,
+                            (
+                                speakers.setdefault(speaker, len(speakers))
+                                if speaker
+                                else -1
+                            ),
+                            start or 0.0,
+                            end if end is not None else start or 0.0,
+                            text_bytes,
+                            len(data),
+                        )
+                    )
+                    texts.append(data)
+                    text_bytes += len(data)
+                words_per_video.append(video_words)
+                entry = {
+                    "video_id": video_id,
+                    "title": title,
+                    "speakers": list(speakers),
+                    "segments": [lo, n_segments + len(records)],
+                }
+                lines.append(json.dumps(entry, ensure_ascii=False) + "\n")
+
+            # Postings for the new videos, grouped by term in (video, pos) order
+            vocab: Dict[str, int] = {}
+            term_ids = np.array(
+                [vocab.setdefault(w, len(vocab)) for w in words], dtype=np.int64
+            )
+            hashes = _term_hashes(list(vocab))[term_ids]
+            slots = np.arange(first_slot, first_slot + len(pending), dtype=np.int64)
+            video_starts = np.cumsum(words_per_video) - words_per_video
+            keys = (np.repeat(slots, words_per_video) << 32) + (
+                np.arange(len(words)) - np.repeat(video_starts, words_per_video)
+            )
+            word_segments = np.repeat(
+                np.arange(n_segments, n_segments + len(records), dtype=np.uint32),
+                words_per_segment,
+            )
+            order = np.argsort(hashes, kind="stable")
+            run = (hashes[order], keys[order], word_segments[order])
+
+            _append_at(self.root / "text.bin", m["text_bytes"], b"".join(texts))
+            segments = np.array(records, dtype=_INDEX_SEGMENT_DTYPE)
+            itemsize = segments.dtype.itemsize
+            _append_at(
+                self.root / "segments.bin", m["segments"] * itemsize, segments.tobytes()
+            )
+            videos_blob = "".join(lines).encode("utf-8")
+            _append_at(self.root / "videos.jsonl", m["videos_bytes"], videos_blob)
+
+            alive = np.zeros(first_slot + len(pending), dtype=bool)
+            latest = {
+                **self._slots,
+                **{p[0]: s for s, p in enumerate(pending, first_slot)},
+            }
+            alive[list(latest.values())] = True
+            runs = list(m["runs"])
+            stale = []
+            runs.append(self._write_run(m, *run))
+            # Merge the newest runs while they are of similar size, so the
+            # number of runs grows logarithmically with the number of flushes
+            while (
+                len(runs) > 1
+                and runs[-2]["postings"] <= 2 * runs[-1]["postings"]
+                and runs[-2]["postings"] + runs[-1]["postings"]
+                <= INDEX_MAX_MERGE_POSTINGS
+            ):
+                older, newer = runs[-2], runs[-1]
+                run = self._merge(older["name"], newer["name"], alive)
+                stale += [older["name"], newer["name"]]
+                runs[-2:] = [self._write_run(m, *run)]
+
+            m.update(
+                videos_bytes=m["videos_bytes"] + len(videos_blob),
+                segments=m["segments"] + len(records),
+                text_bytes=text_bytes,
+                runs=runs,
+            )
+            tmp = _partial_path(self.root / "manifest.json")
+            tmp.write_text(json.dumps(m, indent=1), encoding="utf-8")
+            os.replace(tmp, self.root / "manifest.json")
+            for name in stale:
+                for part in _INDEX_RUN_PARTS:
+                    (self.root / f"{name}.{part}.npy").unlink(missing_ok=True)
+            self._load()
+
+    def _write_run(self, m: dict, hashes, keys, segments) -> Dict[str, Any]:
+        """Write postings sorted by term hash as the next run."""
+        name = f"run-{m['next_run']:06d}"
+        m["next_run"] += 1
+        terms, counts = np.unique(hashes, return_counts=True)
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        for part, array in zip(_INDEX_RUN_PARTS, (terms, offsets, keys, segments)):
+            _save_npy(self.root / f"{name}.{part}.npy", array)
+        return {"name": name, "postings": len(keys)}
+
+    def _merge(self, older: str, newer: str, alive):
+        """Postings of two adjacent runs combined, minus superseded videos."""
+        hashes, keys, segments = [], [], []
+        for name in (older, newer):
+            terms, offsets, run_keys, run_segments = self._open_run(name)
+            hashes.append(np.repeat(terms, np.diff(offsets)))
+            keys.append(run_keys)
+            segments.append(run_segments)
+        hashes, keys, segments = map(np.concatenate, (hashes, keys, segments))
+        keep = alive[keys >> 32]
+        # Stable, so the older run's postings stay first within each term
+        order = np.argsort(hashes[keep], kind="stable")
+        return hashes[keep][order], keys[keep][order], segments[keep][order]
+
+    def _spans(self, term_hash) -> List[Tuple["np.ndarray", "np.ndarray"]]:
+        """(keys, segments) slices of every run holding ``term_hash``."""
+        spans = []
+        for terms, offsets, keys, segments in self._runs:
+            i = int(np.searchsorted(terms, term_hash))
+            if i < len(terms) and terms[i] == term_hash:
+                lo, hi = offsets[i], offsets[i + 1]
+                spans.append((keys[lo:hi], segments[lo:hi]))
+        return spans
+
+    def _occurrences(self, words: List[str]) -> Tuple["np.ndarray", "np.ndarray"]:
+        """Position keys and segments where ``words`` occur in order.
+
+        The rarest word's postings are read in full; the other words are only
+        probed by binary search at the positions that could complete a match.
+        Postings are sorted by key within a run and runs hold ascending videos,
+        so both results come out sorted.
+        """
+        spans = [self._spans(h) for h in _term_hashes(words)]
+        sizes = [sum(len(keys) for keys, _ in span) for span in spans]
+        anchor = int(np.argmin(sizes))
+        if not sizes[anchor]:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.uint32)
+        keys = np.concatenate([np.asarray(k) for k, _ in spans[anchor]])
+        segments = np.concatenate([np.asarray(s) for _, s in spans[anchor]])
+        match = self._alive[keys >> 32]
+        for i, span in enumerate(spans):
+            if i == anchor:
+                continue
+            wanted = keys + (i - anchor)
+            found = np.zeros(len(keys), dtype=bool)
+            for run_keys, run_segments in span:
+                at = np.minimum(np.searchsorted(run_keys, wanted), len(run_keys) - 1)
+                hit = run_keys[at] == wanted
+                if i == 0:
+                    # Report the phrase at the segment of its first word
+                    segments = np.where(hit, run_segments[at], segments)
+                found |= hit
+            match &= found
+        return keys[match] - anchor, segments[match]
+
+    def search(self, query: str, limit: int = 20) -> List[SearchHit]:
+        """Segments matching ``query``, best first.
+
+        Words match anywhere in a segment; "quoted phrases" must appear in
+        order (they may run across a segment boundary, and are reported at the
+        segment where they start). A segment scores the sum over matched query
+        parts of idf x (1 + log occurrences).
+        """
+        units = []
+        for phrase, word in _QUERY_RE.findall(query):
+            words = _words(phrase or word)
+            if words:
+                units.append(words)
+        with self._lock:
+            self._refresh()
+            if not units or not self._slots:
+                return []
+            found, weights = [], []
+            for words in units:
+                keys, segments = self._occurrences(words)
+                if not len(keys):
+                    continue
+                videos = keys >> 32
+                n_videos = 1 + np.count_nonzero(videos[1:] != videos[:-1])
+                idf = math.log(1.0 + len(self._slots) / n_videos)
+                # Sorted, so runs of equal segments are the per-segment counts
+                starts = np.flatnonzero(np.r_[True, segments[1:] != segments[:-1]])
+                counts = np.diff(np.r_[starts, len(segments)])
+                found.append(segments[starts])
+                weights.append(idf * (1.0 + np.log(counts)))
+            if not found:
+                return []
+            segments, inverse = np.unique(np.concatenate(found), return_inverse=True)
+            scores = np.bincount(inverse, weights=np.concatenate(weights))
+            top = np.argsort(-scores, kind="stable")[:limit]
+            return [self._hit(int(segments[i]), float(scores[i])) for i in top]
+
+    def _hit(self, segment: int, score: float) -> SearchHit:
+        rec = self._segments[segment]
+        video = self.videos[int(rec["video"])]
+        start = int(rec["text"])
+        text = bytes(self._text[start : start + int(rec["length"])]).decode("utf-8")
+        return SearchHit(
+            video_id=video["video_id"],
+            title=video["title"],
+            start=float(rec["start"]),
+            end=float(rec["end"]),
+            speaker=video["speakers"][rec["speaker"]] if rec["speaker"] >= 0 else None,
+            text=text,
+            score=score,
+        )
+
+
+# Index that exported videos are added to (set by configure_index)
+SEARCH_INDEX: Optional[TranscriptIndex] = None
+
+
+def configure_index(root: Optional[Path], flush_every: int = 32):
+    """Add every exported video to the index at ``root`` (None turns it off)."""
+    global SEARCH_INDEX
+    if SEARCH_INDEX is not None:
+        SEARCH_INDEX.close()
+    SEARCH_INDEX = TranscriptIndex(root, flush_every) if root is not None else None
+
+
+def _index_content(content: dict):
+    if SEARCH_INDEX is not None:
+        SEARCH_INDEX.add(content)
+
+
+# ---------------------------------------------------------------------------
+# Bulk archive
+# ---------------------------------------------------------------------------
+
+ARCHIVE_FORMATS = ("jsonl", "parquet")
+# JSONL parts roll over to a new file past this size
+ARCHIVE_PART_BYTES = 256 * 1024 * 1024
+# gzip level of JSONL records (9 is several times slower for a few % less)
+ARCHIVE_GZIP_LEVEL = 6
+# Parquet row group size (segment rows); reading a video decodes only the
+# row groups it spans
+ARCHIVE_ROW_GROUP_ROWS = 16384
+# Parquet columns: one row per transcript segment, video fields repeated
+# (dictionary-encoded, so repeats cost almost nothing)
+ARCHIVE_VIDEO_COLUMNS = ("video_id", "title", "url", "tldr", "detailed")
+ARCHIVE_SEGMENT_COLUMNS = ("segment", "start", "end", "speaker", "text")
+# Also kept in the catalog, so reading them decompresses nothing
+_ARCHIVE_CATALOG_COLUMNS = ("video_id", "title", "url")
+
+
+def _archive_record(content: dict) -> Dict[str, Any]:
+    """A generate_content() result as plain JSON values, without the transcript.
+
+    The transcript is the segment texts joined by spaces, so the reader
+    rebuilds it instead of storing the text twice.
+    """
+    return {
+        "video_id": extract_video_id(content["url"]),
+        "title": content["title"],
+        "url": content["url"],
+        "tldr": content["tldr"],
+        "detailed": content["detailed"],
+        "segments": [
+            {"start": start, "end": end, "text": text, "speaker": speaker}
+            for start, end, text, speaker in segment_rows(content["segments"])
+        ],
+    }
+
+
+def _archive_content_dict(record: Dict[str, Any]) -> dict:
+    """Inverse of _archive_record: rebuilt by generate_content() itself."""
+    segments = [
+        Segment(s["start"], s["end"], s["text"], s.get("speaker"))
+        for s in record["segments"]
+    ]
+    summary = Summary(tldr=record["tldr"], detailed=record["detailed"])
+    return generate_content(record["video_id"], record["title"], summary, segments)
+
+
+def _read_catalog(path: Path) -> Tuple[Dict[str, Dict[str, Any]], int]:
+    """Latest catalog entry per video, and the size of the complete lines."""
+    try:
+        data = path.read_bytes()
+    except FileNotFoundError:
+        return {}, 0
+    # A line torn by a crash is not committed
+    size = data.rfind(b"\n") + 1
+    entries: Dict[str, Dict[str, Any]] = {}
+    for line in data[:size].splitlines():
+        entry = json.loads(line)
+        entries[entry["video_id"]] = entry
+    return entries, size
+
+
+class ArchiveWriter:
+    """Appends generate_content() results to a bulk archive under ``root``.
+
+    Meant for large batches, where one pretty-printed file per video is too
+    many files and too many bytes. Files:
+
+    - ``catalog.jsonl``: one line per archived video (ID, title, URL, and
+      where its data is). A video archived again supersedes its older line.
+      Only videos in the catalog are committed.
+    - ``jsonl``: ``part-NNNNN.jsonl.gz``, one JSON object per video, each its
+      own gzip member. The parts are plain gzipped JSON lines for other
+      tools, and a single video can be read with one seek.
+    - ``parquet``: ``part-NNNNN.parquet``, one file per flush, with a row per
+      transcript segment (ARCHIVE_VIDEO_COLUMNS + ARCHIVE_SEGMENT_COLUMNS).
+
+    Videos are buffered and written every ``flush_every``. A flush writes
+    and fsyncs the data, then appends to the catalog. A crash loses only the
+    buffered videos; a torn append is cut off when the archive is reopened.
+    Single writer.
+
+    Superseded records stay in their parts until compact() rewrites the
+    archive.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        fmt: str = "jsonl",
+        flush_every: int = 64,
+        part_bytes: int = ARCHIVE_PART_BYTES,
+    ):
+        if fmt not in ARCHIVE_FORMATS:
+            raise ValueError(
+                f"Unknown archive format {fmt!r}; choose from "
+                f"{', '.join(ARCHIVE_FORMATS)}"
+            )
+        if fmt == "parquet" and load_backend("parquet") is None:
+            raise ImportError(
+                "Parquet archives require pyarrow. Install with 'pip install pyarrow'."
+            )
+        self.root = Path(root)
+        self.fmt = fmt
+        self.flush_every = max(1, flush_every)
+        self.part_bytes = part_bytes
+        self._lock = threading.RLock()
+        self._pending: List[Dict[str, Any]] = []
+        self.entries, self._catalog_bytes = _read_catalog(self.root / "catalog.jsonl")
+        parts = [self.root / e["part"] for e in self.entries.values()]
+        self._next_part = 1 + max(
+            (int(p.name.split(".")[0].split("-")[1]) for p in parts), default=-1
+        )
+        # Resume the newest JSONL part, without any uncommitted tail
+        self._part: Optional[Path] = None
+        self._part_bytes = 0
+        jsonl_parts = [e for e in self.entries.values() if "offset" in e]
+        if fmt == "jsonl" and jsonl_parts:
+            last = max(e["part"] for e in jsonl_parts)
+            ends = [e["offset"] + e["length"] for e in jsonl_parts if e["part"] == last]
+            self._part, self._part_bytes = self.root / last, max(ends)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, video_id: str) -> bool:
+        return video_id in self.entries
+
+    def add(self, content: dict):
+        """Queue a generate_content() result; written by the next flush()."""
+        record = _archive_record(content)
+        with self._lock:
+            self._pending.append(record)
+            if len(self._pending) >= self.flush_every:
+                self.flush()
+
+    def close(self):
+        self.flush()
+
+    def flush(self):
+        with self._lock:
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, []
+            self.root.mkdir(parents=True, exist_ok=True)
+            if self.fmt == "jsonl":
+                entries = self._write_jsonl(pending)
+            else:
+                entries = self._write_parquet(pending)
+            blob = "".join(
+                json.dumps(entry, ensure_ascii=False) + "\n" for entry in entries
+            ).encode("utf-8")
+            _append_at(self.root / "catalog.jsonl", self._catalog_bytes, blob)
+            self._catalog_bytes += len(blob)
+            self.entries.update((entry["video_id"], entry) for entry in entries)
+
+    def compact(self):
+        """Rewrite the current record of every video into new parts.
+
+        Drops superseded records and deletes the old parts. The new parts are
+        synced before the catalog is replaced, so a crash leaves the old
+        archive readable; parts left over from it are deleted by the next
+        compact(). Reads and rewrites the whole archive, so run it between
+        batches rather than after each one.
+        """
+        with self._lock:
+            self.flush()
+            reader = ArchiveReader(self.root)
+            old = list(self.entries.values())
+            self._part, self._part_bytes = None, 0
+            entries: List[Dict[str, Any]] = []
+            for i in range(0, len(old), self.flush_every):
+                records = [reader._record(e) for e in old[i : i + self.flush_every]]
+                if self.fmt == "jsonl":
+                    entries += self._write_jsonl(records)
+                else:
+                    entries += self._write_parquet(records)
+            blob = "".join(
+                json.dumps(entry, ensure_ascii=False) + "\n" for entry in entries
+            ).encode("utf-8")
+            catalog = self.root / "catalog.jsonl"
+            tmp = _partial_path(catalog)
+            _append_at(tmp, 0, blob)
+            os.replace(tmp, catalog)
+            self._catalog_bytes = len(blob)
+            self.entries = {entry["video_id"]: entry for entry in entries}
+            live = {entry["part"] for entry in entries}
+            for part in self.root.glob("part-*"):
+                if part.name not in live:
+                    part.unlink(missing_ok=True)
+
+    def _new_part(self, suffix: str) -> Path:
+        path = self.root / f"part-{self._next_part:05d}.{suffix}"
+        self._next_part += 1
+        return path
+
+    def _catalog_entry(self, record: Dict[str, Any], part: Path, **where: int):
+        entry = {key: record[key] for key in _ARCHIVE_CATALOG_COLUMNS}
+        entry.update(part=part.name, segments=len(record["segments"]), **where)
+        return entry
+
+    def _write_jsonl(self, pending: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        entries = []
+        blobs: List[bytes] = []
+        start = self._part_bytes
+        for record in pending:
+            if self._part is None or self._part_bytes >= self.part_bytes:
+                if blobs:
+                    _append_at(self._part, start, b"".join(blobs))
+                    blobs = []
+                self._part, self._part_bytes = self._new_part("jsonl.gz"), 0
+                start = 0
+            line = json.dumps(record, ensure_ascii=False, separators=(",", ":"))
+            data = gzip.compress(
+                (line + "\n").encode("utf-8"), ARCHIVE_GZIP_LEVEL, mtime=0
+            )
+            entries.append(
+                self._catalog_entry(
+                    record, self._part, offset=self._part_bytes, length=len(data)
+                )
+            )
+            blobs.append(data)
+            self._part_bytes += len(data)
+        _append_at(self._part, start, b"".join(blobs))
+        return entries
+
+    def _write_parquet(self, pending: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        pa, pq = load_backend("pyarrow"), load_backend("parquet")
+        columns: Dict[str, List[Any]] = {
+            name: [] for name in ARCHIVE_VIDEO_COLUMNS + ARCHIVE_SEGMENT_COLUMNS
+        }
+        part = self._new_part("parquet")
+        entries = []
+        for record in pending:
+            # A video without segments still gets one row, with null segment fields
+            segments = record["segments"] or [{}]
+            entries.append(
+                self._catalog_entry(
+                    record, part, row=len(columns["video_id"]), rows=len(segments)
+                )
+            )
+            for name in ARCHIVE_VIDEO_COLUMNS:
+                columns[name] += [record[name]] * len(segments)
+            columns["segment"] += (
+                list(range(len(segments))) if record["segments"] else [None]
+            )
+            for name in ("start", "end", "speaker", "text"):
+                columns[name] += [seg.get(name) for seg in segments]
+        schema = pa.schema(
+            [(name, pa.string()) for name in ARCHIVE_VIDEO_COLUMNS]
+            + [
+                ("segment", pa.int32()),
+                ("start", pa.float64()),
+                ("end", pa.float64()),
+                ("speaker", pa.string()),
+                ("text", pa.string()),
+            ]
+        )
+        table = pa.table(columns, schema=schema)
+        tmp = _partial_path(part)
+        pq.write_table(
+            table, tmp, row_group_size=ARCHIVE_ROW_GROUP_ROWS, compression="zstd"
+        )
+        with open(tmp, "rb") as fh:
+            os.fsync(fh.fileno())
+        os.replace(tmp, part)
+        return entries
+
+
+class ArchiveReader:
+    """Reads an archive written by ArchiveWriter.
+
+    ``get`` decompresses one JSONL record, or the Parquet row groups holding
+    one video. ``column`` reads the catalog for video_id/title/url; other
+    Parquet columns are read on their own. JSONL stores whole records, so
+    other JSONL columns decompress every record.
+    """
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.entries, _ = _read_catalog(self.root / "catalog.jsonl")
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, video_id: str) -> bool:
+        return video_id in self.entries
+
+    def video_ids(self) -> List[str]:
+        return list(self.entries)
+
+    def get(self, video_id: str) -> Optional[dict]:
+        """The video's content in the generate_content() layout, or None."""
+        entry = self.entries.get(video_id)
+        if entry is None:
+            return None
+        return _archive_content_dict(self._record(entry))
+
+    def column(self, name: str) -> List[Any]:
+        """One value per video for video fields, per segment for segment fields."""
+        if name not in ARCHIVE_VIDEO_COLUMNS + ARCHIVE_SEGMENT_COLUMNS:
+            raise KeyError(f"Unknown archive column {name!r}")
+        if name in _ARCHIVE_CATALOG_COLUMNS:
+            return [entry[name] for entry in self.entries.values()]
+        per_video = name in ARCHIVE_VIDEO_COLUMNS
+        entries = list(self.entries.values())
+        chunks: List[List[Any]] = [[] for _ in entries]
+        # Part by part, so each file is opened and its column read once
+        by_part: Dict[str, List[int]] = {}
+        for i, entry in enumerate(entries):
+            by_part.setdefault(entry["part"], []).append(i)
+        for part, rows in by_part.items():
+            if part.endswith(".parquet"):
+                col = load_backend("parquet").read_table(
+                    self.root / part, columns=[name]
+                )[name]
+                for i in rows:
+                    entry = entries[i]
+                    if per_video:
+                        chunks[i] = [col[entry["row"]].as_py()]
+                    elif entry["segments"]:
+                        chunks[i] = col.slice(entry["row"], entry["rows"]).to_pylist()
+                continue
+            with open(self.root / part, "rb") as fh:
+                for i in sorted(rows, key=lambda i: entries[i]["offset"]):
+                    record = self._jsonl_record(entries[i], fh)
+                    if per_video:
+                        chunks[i] = [record[name]]
+                    elif name == "segment":
+                        chunks[i] = list(range(len(record["segments"])))
+                    else:
+                        chunks[i] = [seg[name] for seg in record["segments"]]
+        return [value for chunk in chunks for value in chunk]
+
+    def _record(self, entry: Dict[str, Any]) -> Dict[str, Any]:
+        if entry["part"].endswith(".parquet"):
+            return self._parquet_record(entry)
+        return self._jsonl_record(entry)
+
+    def _jsonl_record(self, entry: Dict[str, Any], fh: Any = None) -> Dict[str, Any]:
+        if fh is None:
+            with open(self.root / entry["part"], "rb") as fh:
+                return self._jsonl_record(entry, fh)
+        fh.seek(entry["offset"])
+        return json.loads(gzip.decompress(fh.read(entry["length"])))
+
+    def _parquet_record(self, entry: Dict[str, Any]) -> Dict[str, Any]:
+        pf = load_backend("parquet").ParquetFile(self.root / entry["part"])
+        lo, hi = entry["row"], entry["row"] + entry["rows"]
+        groups, first, row = [], None, 0
+        for i in range(pf.metadata.num_row_groups):
+            n = pf.metadata.row_group(i).num_rows
+            if row < hi and row + n > lo:
+                groups.append(i)
+                first = row if first is None else first
+            row += n
+        rows = pf.read_row_groups(groups).slice(lo - first, hi - lo).to_pylist()
+        record = {name: rows[0][name] for name in ARCHIVE_VIDEO_COLUMNS}
+        record["segments"] = [
+            {name: r[name] for name in ("start", "end", "text", "speaker")}
+            for r in rows
+            if r["segment"] is not None
+        ]
+        return record
+
+
+# Archive that exported videos are appended to (set by configure_archive)
+ARCHIVE: Optional[ArchiveWriter] = None
+
+
+def configure_archive(
+    root: Optional[Path],
+    fmt: str = "jsonl",
+    flush_every: int = 64,
+    part_bytes: int = ARCHIVE_PART_BYTES,
+):
+    """Append every exported video to the archive at ``root`` (None turns it off)."""
+    global ARCHIVE
+    if ARCHIVE is not None:
+        ARCHIVE.close()
+    ARCHIVE = (
+        ArchiveWriter(root, fmt, flush_every, part_bytes) if root is not None else None
+    )
+
+
+def _archive_content(content: dict):
+    if ARCHIVE is not None:
+        ARCHIVE.add(content)
+
+
+# ---------------------------------------------------------------------------
+# Batch pipeline
+# ---------------------------------------------------------------------------
+
+
+@dataclass
+class VideoJob:
+    url: str
+    video_id: str = ""
+    title: str = ""
+    segments: Optional[List[Segment]] = None
+    audio_path: Optional[Path] = None
+    audio_dir: Optional[str] = None
+    summary: Optional[Summary] = None
+    out_paths: Dict[str, Path] = field(default_factory=dict)
+    error: Optional[str] = None
+
+
+@dataclass
+class PipelineOptions:
+    lang: str = "en"
+    whisper_model: str = "medium"
+    summary_model: str = "facebook/bart-large-cnn"
+    use_diarization: bool = False
+    split_speakers: bool = False
+    refresh: bool = False
+    whisper_workers: int = 1
+    chunk_overlap: int = 0
+    summary_batch_size: int = 8
+    formats: List[str] = field(default_factory=lambda: ["md"])
+    output: Optional[str] = None
+    is_batch: bool = False
+
+
+@dataclass
+class Stage:
+    name: str
+    fn: Callable[[List[VideoJob]], None]
+    workers: int = 1
+    # Max jobs handed to fn at once; extra jobs are only taken if already queued
+    batch: int = 1
+    # Jobs for which this stage is skipped (e.g. captions already found)
+    applies: Callable[[VideoJob], bool] = lambda job: True
+
+
+# Default worker counts; network stages overlap, model stages stay serial
+DEFAULT_STAGE_WORKERS = {
+    "metadata": 4,
+    "download": 2,
+    "whisper": 1,
+    "summarize": 1,
+    "export": 2,
+}
+
+
+def run_pipeline(jobs: List[VideoJob], stages: List[Stage], queue_size: int = 0):
+    """Push jobs through ``stages`` connected by bounded queues.
+
+    Every stage runs its own worker threads, so a slow stage applies
+    backpressure to the ones feeding it instead of buffering the whole batch.
+    A failing job is marked with ``error`` and skips the remaining stages
+    without affecting other jobs.
+    """
+    queues = [
+        queue.Queue(maxsize=queue_size or max(2, 2 * st.workers * st.batch))
+        for st in stages
+    ]
+    done: List[VideoJob] = []
+    done_lock = threading.Lock()
+
+    def _forward(job: VideoJob, after: int):
+        if job.error is None:
+            for k in range(after + 1, len(stages)):
+                if stages[k].applies(job):
+                    queues[k].put(job)
+                    return
+        with done_lock:
+            done.append(job)
+
+    def _worker(i: int):
+        st, q = stages[i], queues[i]
+        while True:
+            item = q.get()
+            if item is _STOP:
+                return
+            batch = [item]
+            stop_seen = False
+            while len(batch) < st.batch:
+                try:
+                    more = q.get_nowait()
+                except queue.Empty:
+                    break
+                if more is _STOP:
+                    stop_seen = True
+                    break
+                batch.append(more)
+            try:
+                st.fn(batch)
+            except Exception as e:
+                for job in batch:
+                    if job.error is None:
+                        job.error = f"{st.name}: {e}"
+            for job in batch:
+                _forward(job, i)
+            if stop_seen:
+                return
+
+    threads = []
+    for i, st in enumerate(stages):
+        threads.append(
+            [
+                threading.Thread(
+                    target=_worker, args=(i,), name=f"{st.name}-{w}", daemon=True
+                )
+                for w in range(max(1, st.workers))
+            ]
+        )
+        for t in threads[-1]:
+            t.start()
+
+    for job in jobs:
+        _forward(job, -1)
+    # Jobs only move forward, so once every stage before i has drained no more
+    # work can reach stage i and its workers can be stopped.
+    for i, st in enumerate(stages):
+        for _ in threads[i]:
+            queues[i].put(_STOP)
+        for t in threads[i]:
+            t.join()
+    return done
+
+
+def read_manifest(lines: Iterable[str]) -> Tuple[List[str], List[str]]:
+    """Video IDs from manifest lines, normalized and deduplicated in order.
+
+    Each line holds a URL or ID (only its first field is used; the rest, e.g.
+    CSV columns, is ignored). Blank lines and ``#`` comments are skipped.
+    Returns (video_ids, problems) where problems describe unparseable lines.
+    """
+    ids: Dict[str, None] = {}
+    problems = []
+    for n, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        first = re.split(r"[\s,;]+", line, maxsplit=1)[0]
+        try:
+            ids.setdefault(extract_video_id(first), None)
+        except ValueError:
+            problems.append(f"line {n}: cannot parse a video ID from {first!r}")
+    return list(ids), problems
+
+
+class Journal:
+    """Append-only JSON-lines log of per-video batch progress.
+
+    Each line records one finished stage for one video: ``metadata`` (title),
+    ``transcript`` (saved next to the journal, so resuming does not depend on
+    the transcript cache), ``summary`` and ``exported`` (output paths). Entries
+    carry a fingerprint of the processing options, and entries written with
+    different options are ignored. A torn last line from a crash is skipped.
+    """
+
+    def __init__(self, path: Path, opts: PipelineOptions, resume: bool = True):
+        self.path = Path(path)
+        self.transcript_dir = self.path.with_name(self.path.name + ".d")
+        self.fingerprint = self.options_fingerprint(opts)
+        self._lock = threading.Lock()
+        self.state: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        if resume and self.path.exists():
+            with open(self.path, encoding="utf-8") as fh:
+                for line in fh:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    if entry.get("opts") == self.fingerprint:
+                        self.state.setdefault(entry["video_id"], {})[
+                            entry["stage"]
+                        ] = entry
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._fh = open(self.path, "a", encoding="utf-8")
+
+    @staticmethod
+    def options_fingerprint(opts: PipelineOptions) -> str:
+        # Only what changes the transcript or the summary; formats and output
+        # are checked per video through the recorded paths
+        keys = (
+            "lang",
+            "whisper_model",
+            "summary_model",
+            "use_diarization",
+            "split_speakers",
+            "chunk_overlap",
+        )
+        values = [getattr(opts, k) for k in keys]
+        # The ASR engine, its settings and audio trimming change the transcript
+        values[keys.index("whisper_model")] = (
+            ASR.cache_tag(opts.whisper_model) + VAD.cache_tag()
+        )
+        blob = json.dumps(values)
+        return hashlib.sha256(blob.encode("utf-8")).hexdigest()[:16]
+
+    def close(self):
+        with self._lock:
+            self._fh.close()
+
+    def get(self, video_id: str, stage: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self.state.get(video_id, {}).get(stage)
+
+    def record(self, video_id: str, stage: str, **data: Any):
+        entry = {
+            "video_id": video_id,
+            "stage": stage,
+            "opts": self.fingerprint,
+            "ts": time.time(),
+            **data,
+        }
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._fh.write(line)
+            self._fh.flush()
+            os.fsync(self._fh.fileno())
+            self.state.setdefault(video_id, {})[stage] = entry
+
+    def save_transcript(self, video_id: str, segments: Transcript):
+        self.transcript_dir.mkdir(parents=True, exist_ok=True)
+        name = f"{video_id}-{self.fingerprint}.seg"
+        tmp = _partial_path(self.transcript_dir / name)
+        tmp.write_bytes(segments_to_bytes(segments))
+        os.replace(tmp, self.transcript_dir / name)
+        self.record(video_id, "transcript", file=name, segments=len(segments))
+
+    def load_transcript(self, video_id: str) -> Optional[Transcript]:
+        entry = self.get(video_id, "transcript")
+        if entry is None:
+            return None
+        try:
+            return segments_from_bytes(
+                (self.transcript_dir / entry["file"]).read_bytes()
+            )
+        except Exception:
+            return None
+
+    def summary(self, video_id: str) -> Optional[Summary]:
+        entry = self.get(video_id, "summary")
+        return Summary(entry["tldr"], entry["detailed"]) if entry else None
+
+    def exported(self, video_id: str, formats: Sequence[str]) -> bool:
+        """True if every format was exported and the files are still there."""
+        entry = self.get(video_id, "exported")
+        if entry is None:
+            return False
+        paths = entry.get("paths", {})
+        return all(fmt in paths and Path(paths[fmt]).exists() for fmt in formats)
+
+
+def _output_paths(title: str, video_id: str, opts: PipelineOptions) -> Dict[str, Path]:
+    """Output path per requested format.
+
+    A single-video ``--output`` is used as given for one format; with several
+    formats its suffix is swapped per format.
+    """
+    safe_title = re.sub(r"[^\w\-]+", "_", title).strip("_")[:80]
+    stem = safe_title or video_id
+    if opts.is_batch:
+        out_dir = Path(opts.output) if opts.output else Path.cwd()
+        return {fmt: out_dir / f"{stem}.{fmt}" for fmt in opts.formats}
+    if opts.output and len(opts.formats) == 1:
+        return {opts.formats[0]: Path(opts.output)}
+    base = Path(opts.output) if opts.output else Path(stem)
+    return {fmt: base.with_name(f"{base.stem}.{fmt}") for fmt in opts.formats}
+
+
+def _export_job(job: VideoJob, opts: PipelineOptions, log: Any = None):
+    content = generate_content(job.video_id, job.title, job.summary, job.segments)
+    job.out_paths = _output_paths(job.title, job.video_id, opts)
+    render_content(content, job.out_paths)
+    _index_content(content)
+    _archive_content(content)
+    for fmt, path in job.out_paths.items():
+        print(f"Wrote {path.resolve()} ({fmt.upper()})", file=log)
+
+
+def _resume_job(job: VideoJob, journal: Journal):
+    """Fill in what a previous run recorded: title, transcript and summary."""
+    entry = journal.get(job.video_id, "metadata")
+    if entry is not None:
+        job.title = entry["title"]
+    job.segments = journal.load_transcript(job.video_id)
+    if job.segments:
+        # A summary is only reusable together with its transcript
+        job.summary = journal.summary(job.video_id)
+
+
+def build_stages(
+    opts: PipelineOptions,
+    workers: Optional[Dict[str, int]] = None,
+    journal: Optional[Journal] = None,
+) -> List[Stage]:
+    """The metadata → download → whisper → summarize → export stages.
+
+    With a ``journal``, every finished stage is recorded there, and stages a
+    previous run already finished for a video are skipped.
+    """
+    workers = {**DEFAULT_STAGE_WORKERS, **(workers or {})}
+
+    def metadata(batch: List[VideoJob]):
+        todo: List[VideoJob] = []
+        for job in batch:
+            try:
+                job.video_id = extract_video_id(job.url)
+            except Exception as e:
+                job.error = str(e)
+                continue
+            if journal is not None:
+                with video_context(job.video_id):
+                    _resume_job(job, journal)
+            if not job.title or job.segments is None:
+                todo.append(job)
+        if not todo:
+            return
+        errors: Dict[str, Exception] = {}
+
+        def transcript(video_id: str) -> Optional[Transcript]:
+            # One video's failure must not fail the rest of the batch
+            try:
+                return _transcript_without_audio(
+                    video_id,
+                    opts.lang,
+                    opts.whisper_model,
+                    opts.use_diarization,
+                    opts.split_speakers,
+                    opts.refresh,
+                )
+            except Exception as e:
+                errors[video_id] = e
+                return None
+
+        found = fetch_metadata_batch(
+            [job.video_id for job in todo],
+            opts.lang,
+            max_workers=len(todo),
+            transcript=transcript,
+        )
+        for job in todo:
+            title, segments = found[job.video_id]
+            if job.video_id in errors:
+                job.error = f"metadata: {errors[job.video_id]}"
+                continue
+            if not job.title:
+                job.title = title
+                if journal is not None:
+                    journal.record(job.video_id, "metadata", title=job.title)
+            if job.segments is None:
+                job.segments = segments
+                if segments and journal is not None:
+                    journal.save_transcript(job.video_id, segments)
+
+    def download(batch: List[VideoJob]):
+        for job in batch:
+            job.audio_dir = tempfile.mkdtemp(prefix="yt_audio_")
+            with video_context(job.video_id):
+                job.audio_path = download_audio(job.url, Path(job.audio_dir))
+            if not job.audio_path:
+                shutil.rmtree(job.audio_dir, ignore_errors=True)
+                job.error = "Failed to download audio; cannot transcribe."
+
+    def transcribe(batch: List[VideoJob]):
+        for job in batch:
+            try:
+                with video_context(job.video_id):
+                    job.segments = _transcribe_downloaded(
+                        job.audio_path,
+                        job.video_id,
+                        opts.lang,
+                        opts.whisper_model,
+                        opts.use_diarization,
+                        opts.split_speakers,
+                        opts.whisper_workers,
+                    )
+            finally:
+                shutil.rmtree(job.audio_dir, ignore_errors=True)
+                job.audio_path = job.audio_dir = None
+            if job.segments is None:
+                job.error = "Transcription failed."
+            elif journal is not None:
+                journal.save_transcript(job.video_id, job.segments)
+
+    def summarize_jobs(batch: List[VideoJob]) -> List[Summary]:
+        # One span covers the whole batch, tagged with every video in it
+        with video_context(",".join(job.video_id for job in batch)):
+            return summarize_batch(
+                [job.segments for job in batch],
+                opts.summary_model,
+                batch_size=opts.summary_batch_size,
+                chunk_overlap=opts.chunk_overlap,
+            )
+
+    def summarize(batch: List[VideoJob]):
+        try:
+            summaries = summarize_jobs(batch)
+        except Exception:
+            if len(batch) == 1:
+                raise
+            # Retry one by one so only the video that fails is marked
+            summaries = []
+            for job in batch:
+                try:
+                    summaries.extend(summarize_jobs([job]))
+                except Exception as e:
+                    job.error = f"summarize: {e}"
+                    summaries.append(None)
+        for job, summary in zip(batch, summaries):
+            if summary is None:
+                continue
+            job.summary = summary
+            if journal is not None:
+                journal.record(
+                    job.video_id,
+                    "summary",
+                    tldr=summary.tldr,
+                    detailed=summary.detailed,
+                )
+
+    def export(batch: List[VideoJob]):
+        for job in batch:
+            with video_context(job.video_id):
+                _export_job(job, opts)
+            if journal is not None:
+                paths = {fmt: str(p.resolve()) for fmt, p in job.out_paths.items()}
+                journal.record(job.video_id, "exported", paths=paths)
+
+    needs_audio = lambda job: job.segments is None  # noqa: E731
+    return [
+        # Videos queued together have their titles and captions fetched at once
+        Stage("metadata", metadata, workers["metadata"], batch=8),
+        Stage("download", download, workers["download"], applies=needs_audio),
+        Stage("whisper", transcribe, workers["whisper"], applies=needs_audio),
+        # Drain several ready videos at once so their chunks share batches
+        Stage(
+            "summarize",
+            summarize,
+            workers["summarize"],
+            batch=8,
+            applies=lambda job: job.summary is None,
+        ),
+        Stage("export", export, workers["export"]),
+    ]
+
+
+# ---------------------------------------------------------------------------
+# Multi-process batch executor
+# ---------------------------------------------------------------------------
+
+# Read by torch, OpenMP, BLAS and CTranslate2 when their thread pools start
+_THREAD_ENV_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS")
+# Per-process state of a pool worker (stages, core group, options)
+_POOL_WORKER: Dict[str, Any] = {}
+
+
+def available_cpus() -> List[int]:
+    """CPU ids this process may run on (honours taskset and cgroup limits)."""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def partition_cores(workers: int, cpus: Optional[List[int]] = None) -> List[List[int]]:
+    """Split ``cpus`` into ``workers`` contiguous groups of near-equal size."""
+    cpus = available_cpus() if cpus is None else cpus
+    workers = max(1, min(workers, len(cpus)))
+    size, extra = divmod(len(cpus), workers)
+    groups, start = [], 0
+    for i in range(workers):
+        end = start + size + (1 if i < extra else 0)
+        groups.append(cpus[start:end])
+        start = end
+    return groups
+
+
+def _pool_settings(
+    opts: PipelineOptions, workers: int, journal_path: Optional[Path] = None
+) -> Dict[str, Any]:
+    """Module configuration a spawned worker needs to behave like this process."""
+    get_http_session()
+    with _http_lock:
+        rate = _http_shared["limiter"].rate
+    return {
+        "opts": opts,
+        "journal": journal_path,
+        # --refresh: workers record progress but must not resume from it
+        "refresh": opts.refresh,
+        "cache_dir": TRANSCRIPT_CACHE.root.parent,
+        "cache": TRANSCRIPT_CACHE.enabled,
+        # The YouTube rate limit is shared out between the workers
+        "http_rate": rate / workers,
+        "asr": asdict(ASR),
+        "vad": asdict(VAD),
+        "whisper_window": WHISPER_WINDOW_SECONDS,
+        "model_budget": MODEL_MANAGER.max_bytes,
+        "metrics": getattr(METRICS.jsonl, "name", None),
+        "count_tokens": METRICS.count_tokens,
+    }
+
+
+def _pool_worker_init(
+    slots: Any,
+    threads: int,
+    settings: Dict[str, Any],
+    started: Any = None,
+    barrier: Any = None,
+):
+    """Pin this worker to the next free core group and configure it."""
+    global WHISPER_WINDOW_SECONDS
+    cpus = slots.get()
+    threads = threads or len(cpus)
+    for var in _THREAD_ENV_VARS:
+        os.environ[var] = str(threads)
+    if hasattr(os, "sched_setaffinity"):
+        try:
+            os.sched_setaffinity(0, cpus)
+        except OSError:
+            pass
+    torch = load_backend("torch")
+    if torch is not None:
+        torch.set_num_threads(threads)
+        try:
+            torch.set_num_interop_threads(1)
+        except RuntimeError:
+            pass
+    configure_caches(settings["cache_dir"], enabled=settings["cache"])
+    rate = settings["http_rate"]
+    configure_http(rate=rate, burst=max(1, int(rate)))
+    configure_asr(**settings["asr"])
+    configure_vad(**settings["vad"])
+    WHISPER_WINDOW_SECONDS = settings["whisper_window"]
+    MODEL_MANAGER.max_bytes = settings["model_budget"]
+    METRICS.configure(settings["metrics"], count_tokens=settings["count_tokens"])
+    journal = None
+    if settings["journal"] is not None:
+        journal = Journal(
+            settings["journal"], settings["opts"], resume=not settings["refresh"]
+        )
+    _POOL_WORKER.update(
+        cpus=cpus,
+        threads=threads,
+        opts=settings["opts"],
+        stages=build_stages(settings["opts"], journal=journal),
+        started=started,
+        barrier=barrier,
+    )
 
 
-def fetch_video_title(video_id: str) -> str:
-    # Try oEmbed (no API key required)
+def _pool_process(job: VideoJob, key: Optional[int] = None) -> VideoJob:
+    """Run one video through the batch stages, back to back, in a pool worker.
+
+    ``key`` is flagged in the shared ``started`` array before any work starts,
+    so the parent knows which videos were in flight if this worker dies.
+    """
+    if key is not None and _POOL_WORKER.get("started") is not None:
+        _POOL_WORKER["started"][key] = 1
+    for stage in _POOL_WORKER["stages"]:
+        if job.error is None and stage.applies(job):
+            try:
+                stage.fn([job])
+            except Exception as e:
+                job.error = f"{stage.name}: {e}"
+    return job
+
+
+def _pool_executor(
+    workers: int,
+    threads: int,
+    settings: Dict[str, Any],
+    started: Any = None,
+    barrier: Any = None,
+):
+    from concurrent.futures import ProcessPoolExecutor
+    import multiprocessing
+
+    groups = partition_cores(workers)
+    # spawn: forked children would inherit torch's thread pool state
+    ctx = multiprocessing.get_context("spawn")
+    slots = ctx.Queue()
+    for group in groups:
+        slots.put(group)
+    return ProcessPoolExecutor(
+        max_workers=len(groups),
+        mp_context=ctx,
+        initializer=_pool_worker_init,
+        initargs=(slots, threads, settings, started, barrier),
+    )
+
+
+def run_process_pool(
+    jobs: List[VideoJob],
+    opts: PipelineOptions,
+    workers: int,
+    threads: int = 0,
+    journal_path: Optional[Path] = None,
+) -> List[VideoJob]:
+    """Process videos in ``workers`` processes, each pinned to its own cores.
+
+    The available CPUs are split into one group per worker, and ``threads``
+    (default: the group size) sets each worker's torch/OpenMP thread count,
+    so workers do not compete for cores. A worker loads its models once and
+    takes the next video from the shared queue as soon as it finishes one.
+
+    A worker that dies (e.g. killed for running out of memory) breaks the
+    whole executor, so a new one is started and every video without a result
+    is submitted again. The video the dead worker was running fails; when
+    several were in flight, they are rerun one at a time to find it.
+    """
+    from concurrent.futures import as_completed
+    from concurrent.futures.process import BrokenProcessPool
+    import multiprocessing
+
+    settings = _pool_settings(opts, workers, journal_path)
+    # Workers set a video's flag here before processing it
+    started = multiprocessing.get_context("spawn").RawArray("b", max(1, len(jobs)))
+    pending: Dict[int, VideoJob] = dict(enumerate(jobs))
+    # In flight when a worker died; each is rerun alone
+    suspects: List[int] = []
+    done: List[VideoJob] = []
+
+    def finish(key: int, job: VideoJob):
+        pending.pop(key)
+        if job.error is None and job.summary is not None:
+            # Workers have no index or archive; each has a single writer,
+            # this process
+            content = generate_content(
+                job.video_id, job.title, job.summary, job.segments
+            )
+            _index_content(content)
+            _archive_content(content)
+        done.append(job)
+
+    def outcome(key: int, future: Any) -> VideoJob:
+        try:
+            return future.result()
+        except BrokenProcessPool:
+            raise
+        except Exception as e:
+            # Raised outside the stages, e.g. the job could not be pickled
+            job = pending[key]
+            job.error = job.error or f"worker: {e!r}"
+            return job
+
+    while pending:
+        futures: Dict[Any, int] = {}
+        for key in pending:
+            started[key] = 0
+        with _pool_executor(workers, threads, settings, started) as ex:
+            try:
+                while suspects:
+                    key = suspects[0]
+                    future = ex.submit(_pool_process, pending[key], key)
+                    futures = {future: key}
+                    finish(key, outcome(key, future))
+                    suspects.pop(0)
+                futures = {
+                    ex.submit(_pool_process, job, key): key
+                    for key, job in pending.items()
+                }
+                for future in as_completed(futures):
+                    finish(futures[future], outcome(futures[future], future))
+            except BrokenProcessPool as e:
+                broken = e
+                # Results that arrived before the break still count
+                for future, key in futures.items():
+                    if (
+                        key in pending
+                        and future.done()
+                        and not isinstance(future.exception(), BrokenProcessPool)
+                    ):
+                        finish(key, outcome(key, future))
+                in_flight = [key for key in pending if started[key]]
+            else:
+                continue
+        if suspects:
+            # It was running alone, so it is the one that killed its worker
+            culprits = [suspects.pop(0)]
+        elif len(in_flight) == 1:
+            culprits = in_flight
+        elif in_flight:
+            suspects = in_flight
+            culprits = []
+        else:
+            # A worker died before taking a video (e.g. while loading models)
+            culprits = list(pending)
+        for key in culprits:
+            job = pending[key]
+            job.error = f"worker: process died ({broken})"
+            finish(key, job)
+    return done
+
+
+# Spawning a worker and importing the ML stack can be slow on a cold machine
+CALIBRATION_BARRIER_TIMEOUT = 600.0
+
+
+def _calibration_unit(audio_seconds: float) -> float:
+    """One Whisper + summarizer pass over synthetic input; returns seconds taken.
+
+    Waits on the pool's barrier first, so a round of one unit per worker puts
+    exactly one unit on each worker, all running at the same time.
+    """
+    opts = _POOL_WORKER["opts"]
+    if _POOL_WORKER.get("barrier") is not None:
+        _POOL_WORKER["barrier"].wait(timeout=CALIBRATION_BARRIER_TIMEOUT)
+    t0 = time.perf_counter()
+    rng = np.random.default_rng(0)
+    if asr_backend().available():
+        noise = rng.standard_normal(int(audio_seconds * SAMPLE_RATE)) * 0.05
+        asr_backend().transcribe(noise.astype(np.float32), opts.whisper_model, ASR)
+    # About as many words as the audio would hold at a speaking pace
+    words = rng.choice(["model", "audio", "speaker", "video", "data", "time"], 1000)
+    text = " ".join(words[: int(audio_seconds * 2.5)]) + "."
+    summarize_transcript(
+        [Segment(start=0.0, end=audio_seconds, text=text)], opts.summary_model
+    )
+    return time.perf_counter() - t0
+
+
+def calibrate_process_pool(
+    opts: PipelineOptions,
+    audio_seconds: float = 20.0,
+    max_workers: Optional[int] = None,
+) -> Tuple[int, int]:
+    """Pick (workers, threads per worker) by measuring throughput.
+
+    Each candidate split of the CPUs (1, 2, 4, ... workers) runs one
+    untimed warm-up and then one timed Whisper + summarizer unit on every
+    worker, all at once (a barrier keeps a fast worker from taking two). The split with the most units per second wins;
+    ties go to fewer workers, which use less memory.
+    """
+    import multiprocessing
+
+    cpus = available_cpus()
+    limit = min(len(cpus), max_workers or len(cpus))
+    candidates = [n for n in (1, 2, 4, 8, 16, 32, 64) if n <= limit]
+    settings = _pool_settings(opts, 1)
+    # Identical synthetic text would hit the summary cache after one run
+    settings["cache"] = False
+    best = (0.0, 1, len(cpus))
+    ctx = multiprocessing.get_context("spawn")
+    for workers in candidates:
+        threads = len(cpus) // workers
+        barrier = ctx.Barrier(workers)
+        with _pool_executor(workers, threads, settings, barrier=barrier) as ex:
+            # Warm-up loads the models in every worker
+            list(ex.map(_calibration_unit, [audio_seconds] * workers))
+            t0 = time.perf_counter()
+            list(ex.map(_calibration_unit, [audio_seconds] * workers))
+            throughput = workers / (time.perf_counter() - t0)
+        print(
+            f"Calibration: {workers} worker(s) x {threads} thread(s): "
+            f"{throughput * 60:.1f} units/min"
+        )
+        if throughput > best[0] * 1.05:
+            best = (throughput, workers, threads)
+    return best[1], best[2]
+
+
+def stream_to_console(url: str, opts: PipelineOptions) -> VideoJob:
+    """Run one video through stream_video, echoing events, then export it."""
+    job = VideoJob(url=url)
     try:
-        r = requests.get(
-            "https://www.youtube.com/oembed",
-            params={
-                "url": f"https://www.youtube.com/watch?v={video_id}",
-                "format": "json",
-            },
-            timeout=15,
+        job.video_id = extract_video_id(url)
+    except Exception as e:
+        job.error = str(e)
+        return job
+    with video_context(job.video_id):
+        return _stream_job(job, opts)
+
+
+def _stream_job(job: VideoJob, opts: PipelineOptions) -> VideoJob:
+    job.title = fetch_video_title(job.video_id)
+    print(f"# {job.title}", file=sys.stderr, flush=True)
+    job.segments = []
+    try:
+        for event in stream_video(
+            job.url,
+            opts.lang,
+            opts.whisper_model,
+            opts.summary_model,
+            opts.use_diarization,
+            opts.split_speakers,
+            opts.refresh,
+            opts.whisper_workers,
+            opts.chunk_overlap,
+            opts.summary_batch_size,
+        ):
+            if isinstance(event, SegmentsEvent):
+                job.segments.extend(event.segments)
+                for seg in event.segments:
+                    speaker = f" [{seg.speaker}]" if seg.speaker else ""
+                    print(
+                        f"{format_timestamp(seg.start)}{speaker} {seg.text}", flush=True
+                    )
+            elif isinstance(event, PartialSummaryEvent):
+                span = f"{format_timestamp(event.start)}-{format_timestamp(event.end)}"
+                print(f"[summary {span}] {event.text}", file=sys.stderr, flush=True)
+            else:
+                job.summary = event.summary
+        if job.summary is None:
+            job.error = "Transcription failed."
+            return job
+        _export_job(job, opts, log=sys.stderr)
+    except Exception as e:
+        # Same per-video isolation as the batch pipeline
+        job.error = str(e)
+    return job
+
+
+# ---------------------------------------------------------------------------
+# Job server
+# ---------------------------------------------------------------------------
+
+JOB_SERVER_PORT = 8765
+# Job states; the last three are final
+JOB_STATES = ("queued", "running", "done", "failed", "cancelled")
+_FINISHED = ("done", "failed", "cancelled")
+
+
+@dataclass
+class ServerJob:
+    id: str
+    url: str
+    video_id: str
+    options: PipelineOptions
+    priority: int = 0
+    state: str = "queued"
+    # Pipeline stage currently running (metadata, download, whisper, ...)
+    stage: Optional[str] = None
+    submitted_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    error: Optional[str] = None
+    title: str = ""
+    content: Optional[dict] = None
+    out_paths: Dict[str, Path] = field(default_factory=dict)
+    # How many submissions were folded into this job
+    submissions: int = 1
+    # Streamed while the job runs (stream_video events); segments are
+    # dropped once the content is built, partial summaries are kept
+    segments: List[Segment] = field(default_factory=list)
+    partials: List[Dict[str, Any]] = field(default_factory=list)
+
+    def status(self, progress: Optional[int] = None) -> Dict[str, Any]:
+        """Job status; with ``progress`` = N, also the streamed results so far.
+
+        The progress block has the last N transcript segments, the segment
+        count and every partial summary.
+        """
+        status = {
+            "id": self.id,
+            "url": self.url,
+            "video_id": self.video_id,
+            "title": self.title,
+            "priority": self.priority,
+            "state": self.state,
+            "stage": self.stage,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+            "out_paths": {fmt: str(p) for fmt, p in self.out_paths.items()},
+            "submissions": self.submissions,
+        }
+        if progress is not None:
+            tail = self.segments[-progress:] if progress > 0 else []
+            status["progress"] = {
+                "segment_count": len(self.segments),
+                "segments": [
+                    {"start": start, "end": end, "text": text, "speaker": speaker}
+                    for start, end, text, speaker in segment_rows(tail)
+                ],
+                "partials": list(self.partials),
+            }
+        return status
+
+
+def options_from_dict(data: Dict[str, Any], defaults: Optional[PipelineOptions] = None):
+    """PipelineOptions from JSON fields, on top of ``defaults``."""
+    names = {f.name for f in fields(PipelineOptions)}
+    unknown = sorted(set(data) - names)
+    if unknown:
+        raise ValueError(f"Unknown option(s): {', '.join(unknown)}")
+    values = asdict(defaults or PipelineOptions())
+    values.update(data)
+    if isinstance(values["formats"], str):
+        values["formats"] = _format_list(values["formats"])
+    bad = [f for f in values["formats"] if f not in EXPORT_FORMATS]
+    if bad:
+        raise ValueError(f"Unsupported format(s): {', '.join(bad)}")
+    return PipelineOptions(**values)
+
+
+class JobQueue:
+    """Priority queue of videos processed by worker threads in this process.
+
+    Models stay resident in MODEL_MANAGER between jobs. Submitting a video
+    with the same options as a queued or running job returns that job instead
+    of a new one. Higher ``priority`` runs first; ties run in submission order.
+    Finished jobs are kept (up to ``keep_finished``) so results can be fetched;
+    with ``reuse_done`` a submission matching a finished, successful job
+    returns it too, unless the options ask for a refresh.
+    """
+
+    def __init__(
+        self,
+        workers: int = 1,
+        defaults: Optional[PipelineOptions] = None,
+        keep_finished: int = 500,
+        reuse_done: bool = False,
+    ):
+        self.workers = max(1, workers)
+        # Server-side defaults: export only when a submission asks for formats
+        self.defaults = defaults or PipelineOptions(formats=[])
+        self.keep_finished = keep_finished
+        self.reuse_done = reuse_done
+        self.jobs: "OrderedDict[str, ServerJob]" = OrderedDict()
+        self._cond = threading.Condition()
+        self._heap: List[Tuple[int, int, str]] = []
+        self._seq = 0
+        self._inflight: Dict[Tuple[str, str], str] = {}
+        self._done: Dict[Tuple[str, str], str] = {}
+        self._threads: List[threading.Thread] = []
+        self._stopping = False
+
+    def start(self) -> "JobQueue":
+        with self._cond:
+            if self._threads:
+                return self
+            self._stopping = False
+            self._threads = [
+                threading.Thread(target=self._worker, name=f"job-{i}", daemon=True)
+                for i in range(self.workers)
+            ]
+        for t in self._threads:
+            t.start()
+        return self
+
+    def stop(self, wait: bool = True):
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if wait:
+            for t in self._threads:
+                t.join()
+        self._threads = []
+
+    def warm(self, whisper: bool = False):
+        """Load the default summarizer (and ASR model) before the first job."""
+        if load_backend("transformers") is not None:
+            load_summarizer(self.defaults.summary_model)
+        if whisper and asr_backend().available():
+            asr_backend().load(self.defaults.whisper_model, ASR)
+
+    @staticmethod
+    def _key(video_id: str, opts: PipelineOptions) -> Tuple[str, str]:
+        return video_id, json.dumps(asdict(opts), sort_keys=True, default=str)
+
+    def submit(
+        self,
+        url: str,
+        options: Optional[Dict[str, Any]] = None,
+        priority: int = 0,
+    ) -> Tuple[ServerJob, bool]:
+        """Queue ``url``; returns (job, True) if an in-flight job was reused.
+
+        Raises ValueError for an unparseable URL or invalid options.
+        """
+        video_id = extract_video_id(url)
+        opts = options_from_dict(options or {}, self.defaults)
+        key = self._key(video_id, opts)
+        with self._cond:
+            existing = self._inflight.get(key)
+            if existing is None and self.reuse_done and not opts.refresh:
+                existing = self._done.get(key)
+            if existing is not None and existing in self.jobs:
+                job = self.jobs[existing]
+                job.submissions += 1
+                if job.state == "queued" and priority > job.priority:
+                    # Re-push; the stale heap entry is skipped by _next
+                    job.priority = priority
+                    self._push(job)
+                return job, True
+            job = ServerJob(
+                id=hashlib.sha1(os.urandom(16)).hexdigest()[:12],
+                url=url,
+                video_id=video_id,
+                options=opts,
+                priority=priority,
+            )
+            self.jobs[job.id] = job
+            self._inflight[key] = job.id
+            self._push(job)
+            self._trim()
+            return job, False
+
+    def _push(self, job: ServerJob):
+        self._seq += 1
+        heapq.heappush(self._heap, (-job.priority, self._seq, job.id))
+        self._cond.notify()
+
+    def _trim(self):
+        finished = [j.id for j in self.jobs.values() if j.state in _FINISHED]
+        for job_id in finished[: max(0, len(finished) - self.keep_finished)]:
+            job = self.jobs.pop(job_id)
+            key = self._key(job.video_id, replace(job.options, refresh=False))
+            if self._done.get(key) == job_id:
+                del self._done[key]
+
+    def get(self, job_id: str) -> Optional[ServerJob]:
+        with self._cond:
+            return self.jobs.get(job_id)
+
+    def status(
+        self, job_id: str, progress: Optional[int] = None
+    ) -> Optional[Dict[str, Any]]:
+        """ServerJob.status() taken under the queue lock; None if unknown."""
+        with self._cond:
+            job = self.jobs.get(job_id)
+            return job.status(progress) if job else None
+
+    def wait(self, job_id: str, timeout: Optional[float] = None) -> Optional[ServerJob]:
+        """Block until the job finishes or ``timeout`` passes; returns the job."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                job = self.jobs.get(job_id)
+                if job is None or job.state in _FINISHED:
+                    return job
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return job
+                self._cond.wait(remaining)
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a queued job (running jobs are not interrupted)."""
+        with self._cond:
+            job = self.jobs.get(job_id)
+            if job is None or job.state != "queued":
+                return False
+            self._finish(job, "cancelled")
+            return True
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            states = dict.fromkeys(JOB_STATES, 0)
+            for job in self.jobs.values():
+                states[job.state] += 1
+        return {
+            "jobs": states,
+            "workers": self.workers,
+            "models": MODEL_MANAGER.stats(),
+        }
+
+    def _finish(self, job: ServerJob, state: str):
+        # Caller holds self._cond
+        job.state = state
+        job.stage = None
+        job.finished_at = time.time()
+        self._inflight.pop(self._key(job.video_id, job.options), None)
+        if state == "done":
+            # A refresh run's result also serves later normal submissions
+            fresh = replace(job.options, refresh=False)
+            self._done[self._key(job.video_id, fresh)] = job.id
+        self._cond.notify_all()
+
+    def _next(self) -> Optional[ServerJob]:
+        with self._cond:
+            while True:
+                while self._heap:
+                    neg_priority, _, job_id = heapq.heappop(self._heap)
+                    job = self.jobs.get(job_id)
+                    if job and job.state == "queued" and -neg_priority == job.priority:
+                        job.state = "running"
+                        job.started_at = time.time()
+                        return job
+                if self._stopping:
+                    return None
+                self._cond.wait()
+
+    def _worker(self):
+        while True:
+            job = self._next()
+            if job is None:
+                return
+            try:
+                with video_context(job.video_id):
+                    self._run(job)
+            except Exception as e:
+                job.error = f"{job.stage}: {e}" if job.stage else str(e)
+            with self._cond:
+                self._finish(job, "failed" if job.error else "done")
+
+    def _run(self, job: ServerJob):
+        opts = job.options
+        job.stage = "metadata"
+        job.title = fetch_video_title(job.video_id)
+        # Streamed, so clients can show segments and partial summaries early;
+        # "transcribe" covers both, as they overlap
+        job.stage = "transcribe"
+        summary = None
+        for event in stream_video(
+            job.url,
+            opts.lang,
+            opts.whisper_model,
+            opts.summary_model,
+            opts.use_diarization,
+            opts.split_speakers,
+            opts.refresh,
+            opts.whisper_workers,
+            opts.chunk_overlap,
+            opts.summary_batch_size,
+        ):
+            with self._cond:
+                if isinstance(event, SegmentsEvent):
+                    job.segments.extend(event.segments)
+                elif isinstance(event, PartialSummaryEvent):
+                    job.partials.append(asdict(event))
+                else:
+                    summary = event.summary
+        if summary is None:
+            job.error = "Transcription failed."
+            return
+        job.stage = "export"
+        job.content = generate_content(job.video_id, job.title, summary, job.segments)
+        with self._cond:
+            job.segments = []
+        if opts.formats:
+            job.out_paths = _output_paths(job.title, job.video_id, opts)
+            render_content(job.content, job.out_paths)
+        _index_content(job.content)
+        _archive_content(job.content)
+
+
+def _confine_output(
+    options: Optional[Dict[str, Any]], root: Path
+) -> Optional[Dict[str, Any]]:
+    """``options`` with ``output`` resolved under ``root``.
+
+    Relative paths are taken from ``root``; a path that leads outside it
+    raises ValueError, so clients cannot make the server write elsewhere.
+    """
+    if not isinstance(options, dict) or options.get("output") in (None, ""):
+        return options
+    root = root.resolve()
+    output = (root / str(options["output"])).resolve()
+    if output != root and root not in output.parents:
+        raise ValueError(f"output must be inside the server's export directory {root}")
+    return {**options, "output": str(output)}
+
+
+class _JobHandler(BaseHTTPRequestHandler):
+    """JSON API over a JobQueue (``self.server.jobs``).
+
+    POST /jobs                    {"url" or "urls", "priority", "options": {...}}
+    GET  /jobs                    status of every known job
+    GET  /jobs/<id>[?wait=SECS]   status, optionally waiting for it to finish;
+                                  &progress=N adds the last N streamed segments
+                                  and the partial summaries
+    GET  /jobs/<id>/result        content (title, summaries, segments) when done
+    DELETE /jobs/<id>             cancel a queued job
+    GET  /search?q=...&limit=N    ranked transcript hits (server started with --index)
+    GET  /health, GET /metrics    queue/model stats, Prometheus stage totals
+    """
+
+    def _send(self, code: int, body: Any, content_type: str = "application/json"):
+        if isinstance(body, str):
+            data = body.encode("utf-8")
+        else:
+            data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _route(self) -> Tuple[List[str], Dict[str, str]]:
+        path, _, query = self.path.partition("?")
+        params = dict(parse_qsl(query))
+        return [p for p in path.split("/") if p], params
+
+    def do_GET(self):
+        parts, params = self._route()
+        jobs: JobQueue = self.server.jobs
+        if parts == ["health"]:
+            return self._send(200, jobs.stats())
+        if parts == ["metrics"]:
+            return self._send(
+                200, METRICS.prometheus_text(), "text/plain; version=0.0.4"
+            )
+        if parts == ["search"]:
+            if SEARCH_INDEX is None:
+                return self._send(404, {"error": "Server has no search index"})
+            try:
+                limit = int(params.get("limit", 20))
+            except ValueError:
+                return self._send(400, {"error": "limit must be an integer"})
+            hits = SEARCH_INDEX.search(params.get("q", ""), limit)
+            return self._send(
+                200, {"hits": [{**asdict(h), "url": h.url} for h in hits]}
+            )
+        if parts == ["jobs"]:
+            with jobs._cond:
+                statuses = [job.status() for job in jobs.jobs.values()]
+            return self._send(200, {"jobs": statuses})
+        if len(parts) in (2, 3) and parts[0] == "jobs":
+            try:
+                wait = min(float(params.get("wait", 0)), 300.0)
+            except ValueError:
+                return self._send(400, {"error": "wait must be a number"})
+            job = jobs.wait(parts[1], wait) if wait > 0 else jobs.get(parts[1])
+            if job is None:
+                return self._send(404, {"error": f"No such job: {parts[1]}"})
+            if len(parts) == 2:
+                try:
+                    progress = params.get("progress")
+                    progress = None if progress is None else int(progress)
+                except ValueError:
+                    return self._send(400, {"error": "progress must be an integer"})
+                return self._send(200, jobs.status(job.id, progress) or job.status())
+            if parts[2] == "result":
+                if job.state != "done":
+                    return self._send(409, job.status())
+                out = io.StringIO()
+                _write_json(job.content, out)
+                return self._send(200, out.getvalue())
+        self._send(404, {"error": "Not found"})
+
+    def do_POST(self):
+        parts, _ = self._route()
+        if parts != ["jobs"]:
+            return self._send(404, {"error": "Not found"})
+        # Browsers send cross-origin form/text posts without asking; a JSON
+        # content type needs a CORS preflight, which this server never grants
+        content_type = self.headers.get("Content-Type", "").split(";")[0].strip()
+        if content_type.lower() != "application/json":
+            return self._send(415, {"error": "Content-Type must be application/json"})
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length) or b"{}")
+            urls = body.get("urls") or [body["url"]]
+            options = _confine_output(body.get("options"), self.server.export_root)
+            submitted = [
+                self.server.jobs.submit(url, options, int(body.get("priority", 0)))
+                for url in urls
+            ]
+        except (KeyError, TypeError, ValueError, argparse.ArgumentTypeError) as e:
+            return self._send(400, {"error": str(e)})
+        self._send(
+            202,
+            {"jobs": [{**job.status(), "deduplicated": dup} for job, dup in submitted]},
         )
-        if r.ok:
-            return r.json().get("title") or f"YouTube Video {video_id}"
-    except Exception:
+
+    def do_DELETE(self):
+        parts, _ = self._route()
+        if len(parts) == 2 and parts[0] == "jobs":
+            if self.server.jobs.cancel(parts[1]):
+                return self._send(200, self.server.jobs.get(parts[1]).status())
+            return self._send(409, {"error": "Only queued jobs can be cancelled"})
+        self._send(404, {"error": "Not found"})
+
+    def log_message(self, *args):
         pass
-    return f"YouTube Video {video_id}"
 
 
-def export_content(content_dict: dict, path: Path, fmt: str):
-    """Export content dict to specified format (md, json, html, pdf)."""
-    if fmt == "md":
-        title = content_dict["title"]
-        url = content_dict["url"]
-        summary = Summary(tldr=content_dict["tldr"], detailed=content_dict["detailed"])
-        segments = [
-            Segment(
-                start=s["start"], end=s["end"], text=s["text"], speaker=s.get("speaker")
-            )
-            for s in content_dict["segments"]
+def serve_jobs(
+    jobs: JobQueue,
+    host: str = "127.0.0.1",
+    port: int = JOB_SERVER_PORT,
+    export_root: Optional[Path] = None,
+) -> ThreadingHTTPServer:
+    """HTTP server for ``jobs`` (not yet serving; call serve_forever()).
+
+    Exports requested by clients are only written under ``export_root``
+    (default: the current directory).
+    """
+    server = ThreadingHTTPServer((host, port), _JobHandler)
+    server.daemon_threads = True
+    server.jobs = jobs
+    server.export_root = Path(export_root or Path.cwd()).resolve()
+    return server
+
+
+class JobClient:
+    """Thin client for a job server started with ``--serve``."""
+
+    def __init__(self, base_url: str, timeout: float = 30.0):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def _request(self, method: str, path: str, **kwargs) -> requests.Response:
+        kwargs.setdefault("timeout", self.timeout)
+        return self.session.request(method, self.base_url + path, **kwargs)
+
+    def submit(
+        self,
+        urls: Sequence[str],
+        options: Optional[Dict[str, Any]] = None,
+        priority: int = 0,
+    ) -> List[Dict[str, Any]]:
+        r = self._request(
+            "POST",
+            "/jobs",
+            json={"urls": list(urls), "options": options or {}, "priority": priority},
+        )
+        if r.status_code != 202:
+            raise ValueError(r.json().get("error", f"HTTP {r.status_code}"))
+        return r.json()["jobs"]
+
+    def status(
+        self, job_id: str, wait: float = 0.0, progress: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Job status; ``progress`` = N adds streamed results (ServerJob.status)."""
+        params: Dict[str, Any] = {}
+        if wait:
+            params["wait"] = wait
+        if progress is not None:
+            params["progress"] = progress
+        r = self._request(
+            "GET",
+            f"/jobs/{job_id}",
+            params=params or None,
+            timeout=self.timeout + wait,
+        )
+        r.raise_for_status()
+        return r.json()
+
+    def wait(self, job_id: str, poll: float = 30.0) -> Dict[str, Any]:
+        """Long-poll until the job is done, failed or cancelled."""
+        while True:
+            status = self.status(job_id, wait=poll)
+            if status["state"] in _FINISHED:
+                return status
+
+    def result(self, job_id: str) -> dict:
+        """Content dict of a finished job (segments as a list of dicts)."""
+        r = self._request("GET", f"/jobs/{job_id}/result")
+        if r.status_code == 409:
+            raise ValueError(f"Job {job_id} is {r.json()['state']}")
+        r.raise_for_status()
+        return r.json()
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a queued job; False if it already started or finished."""
+        return self._request("DELETE", f"/jobs/{job_id}").status_code == 200
+
+    def health(self) -> Dict[str, Any]:
+        r = self._request("GET", "/health")
+        r.raise_for_status()
+        return r.json()
+
+    def search(self, query: str, limit: int = 20) -> List[SearchHit]:
+        r = self._request("GET", "/search", params={"q": query, "limit": limit})
+        r.raise_for_status()
+        names = {f.name for f in fields(SearchHit)}
+        return [
+            SearchHit(**{k: v for k, v in hit.items() if k in names})
+            for hit in r.json()["hits"]
         ]
-        write_markdown(path, title, url, summary, segments)
-    elif fmt == "json":
-        path.write_text(
-            json.dumps(content_dict, indent=2, ensure_ascii=False), encoding="utf-8"
-        )
-    elif fmt == "html":
-        html = markdown_to_html(content_dict)
-        path.write_text(html, encoding="utf-8")
-    elif fmt == "pdf":
-        html = markdown_to_html(content_dict)
-        if HTML is None:
-            raise ImportError(
-                "WeasyPrint not available. Install with 'pip install weasyprint'."
-            )
-        HTML(string=html).write_pdf(str(path))
+
+
+def run_via_server(
+    server_url: str, urls: List[str], opts: PipelineOptions, priority: int = 0
+) -> List[VideoJob]:
+    """Submit ``urls`` to a job server and wait for them, like run_pipeline."""
+    client = JobClient(server_url)
+    options = asdict(opts)
+    # The server has its own working directory, so send absolute paths
+    if opts.output:
+        options["output"] = str(Path(opts.output).resolve())
     else:
-        raise ValueError(f"Unsupported format: {fmt}")
+        options.update(output=str(Path.cwd()), is_batch=True)
+    submitted = client.submit(urls, options, priority)
+    for status in submitted:
+        note = " (already in progress)" if status["deduplicated"] else ""
+        print(f"Submitted {status['url']} as job {status['id']}{note}")
+    done = []
+    for status in submitted:
+        final = client.wait(status["id"])
+        job = VideoJob(
+            url=final["url"],
+            video_id=final["video_id"],
+            title=final["title"],
+            out_paths={fmt: Path(p) for fmt, p in final["out_paths"].items()},
+            error=final["error"],
+        )
+        if final["state"] == "cancelled":
+            job.error = "Cancelled on the server."
+        for fmt, path in job.out_paths.items():
+            print(f"Wrote {path} ({fmt.upper()})")
+        done.append(job)
+    return done
+
+
+def _format_list(value: str) -> List[str]:
+    formats = list(dict.fromkeys(f.strip() for f in value.split(",") if f.strip()))
+    bad = [f for f in formats if f not in EXPORT_FORMATS]
+    if not formats or bad:
+        raise argparse.ArgumentTypeError(
+            f"invalid format(s) {', '.join(bad) or value!r}; "
+            f"choose from {', '.join(EXPORT_FORMATS)}"
+        )
+    return formats
+
+
+def _process_count(value: str) -> Union[int, str]:
+    if value == "auto":
+        return value
+    if not value.isdigit() or int(value) < 1:
+        raise argparse.ArgumentTypeError(
+            f"expected a positive number or 'auto', got {value!r}"
+        )
+    return int(value)
+
+
+def _parse_stage_workers(spec: Optional[str], jobs: Optional[int]) -> Dict[str, int]:
+    """``--jobs N`` sets the network/export stages; ``stage=N,...`` overrides."""
+    workers: Dict[str, int] = {}
+    if jobs:
+        for name in ("metadata", "download", "export"):
+            workers[name] = jobs
+    for part in (spec or "").split(","):
+        if not part.strip():
+            continue
+        name, _, count = part.partition("=")
+        name = name.strip()
+        if name not in DEFAULT_STAGE_WORKERS or not count.strip().isdigit():
+            raise ValueError(f"Invalid stage worker spec: {part!r}")
+        workers[name] = max(1, int(count))
+    return workers
 
 
 def main():
+    global WHISPER_WINDOW_SECONDS
     parser = argparse.ArgumentParser(
         description="Local GPU transcription (Whisper) + local summarization."
     )
     parser.add_argument(
-        "youtube_urls", nargs="+", help="YouTube video URL(s) or 11-char ID(s)"
+        "youtube_urls", nargs="*", help="YouTube video URL(s) or 11-char ID(s)"
     )
     parser.add_argument(
         "--output",
@@ -556,60 +5811,501 @@ def main():
         default="tiny",
         help="Whisper model size (tiny, base, small, medium, large)",
     )
+    parser.add_argument(
+        "--asr",
+        default="whisper",
+        choices=list(ASR_BACKENDS),
+        help="Speech recognition engine for videos without captions "
+        "(faster-whisper: CTranslate2, int8 by default, much faster on CPU)",
+    )
+    parser.add_argument(
+        "--compute-type",
+        default=None,
+        help="ASR precision: int8, int8_float16, int16, float16, float32 and other "
+        "CTranslate2 types (faster-whisper; default int8) or float16/float32 "
+        "(whisper)",
+    )
+    parser.add_argument(
+        "--beam-size",
+        type=int,
+        default=None,
+        help="ASR beam search width (default: the engine's own default)",
+    )
+    parser.add_argument(
+        "--asr-batch-size",
+        type=int,
+        default=1,
+        help="Audio windows decoded per batch (faster-whisper)",
+    )
+    parser.add_argument(
+        "--vad",
+        default="off",
+        choices=VAD_MODES,
+        help="Skip silence and music before transcription: energy (NumPy level "
+        "and modulation check) or silero (model bundled with faster-whisper)",
+    )
+    parser.add_argument(
+        "--vad-threshold",
+        type=float,
+        default=VAD_THRESHOLD_DB,
+        help="Energy VAD: dB above the noise floor that counts as voiced",
+    )
+    parser.add_argument(
+        "--whisper-workers",
+        type=int,
+        default=1,
+        help="Transcribe long audio as parallel windows in this many processes "
+        "(CPU; each process loads its own model)",
+    )
+    parser.add_argument(
+        "--whisper-window",
+        type=float,
+        default=WHISPER_WINDOW_SECONDS,
+        help="Window length in seconds for --whisper-workers (cut at silence)",
+    )
     parser.add_argument(
         "--summary-model",
         default="facebook/bart-large-cnn",
         help="HuggingFace summarization model",
     )
+    parser.add_argument(
+        "--chunk-overlap",
+        type=int,
+        default=0,
+        help="Tokens of context shared between consecutive summary chunks",
+    )
+    parser.add_argument(
+        "--summary-batch-size",
+        type=int,
+        default=8,
+        help="Chunks per summarization inference batch (shared across videos)",
+    )
     parser.add_argument(
         "--format",
         "-f",
-        default="md",
-        choices=["md", "pdf", "html", "json"],
-        help="Output format (md, pdf, html, json)",
+        default=None,
+        type=_format_list,
+        help="Output format(s), comma-separated, e.g. md,html,json "
+        "(md, pdf, html, json); all are rendered in one pass "
+        "(default: md, or none with --archive)",
     )
     parser.add_argument(
         "--diarization",
         action="store_true",
         help="Enable speaker diarization (requires HF_TOKEN)",
     )
+    parser.add_argument(
+        "--split-speakers",
+        action="store_true",
+        help="With --diarization, split segments at speaker changes",
+    )
+    parser.add_argument(
+        "--model-cache-mb",
+        type=float,
+        default=None,
+        help="Memory budget for resident models in MB; least recently used "
+        "models are evicted beyond it (default: unlimited, or $YT_MODEL_CACHE_MB)",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=None,
+        help=f"Directory for cached transcripts/summaries (default: {DEFAULT_CACHE_DIR})",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Do not read or write the transcript and summary caches",
+    )
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Recompute transcripts and overwrite cached entries",
+    )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=None,
+        help="Concurrent workers for the metadata, download and export stages",
+    )
+    parser.add_argument(
+        "--stage-workers",
+        default=None,
+        help="Per-stage worker counts, e.g. download=4,whisper=1 "
+        "(stages: metadata, download, whisper, summarize, export)",
+    )
+    parser.add_argument(
+        "--processes",
+        type=_process_count,
+        metavar="N|auto",
+        help="Process a batch in N worker processes, each pinned to its own "
+        "share of the CPU cores and keeping its models loaded; 'auto' picks N "
+        "from a short Whisper/summarizer calibration run",
+    )
+    parser.add_argument(
+        "--threads-per-process",
+        type=int,
+        default=0,
+        help="torch/OpenMP threads per --processes worker (default: its cores)",
+    )
+    parser.add_argument(
+        "--http-rate",
+        type=float,
+        default=None,
+        help="Max YouTube HTTP requests per second across all workers "
+        "(default: 10, or $YT_HTTP_RATE)",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Process videos one at a time, printing transcript segments to "
+        "stdout (and partial summaries to stderr) as they are produced",
+    )
+    parser.add_argument(
+        "--metrics",
+        type=Path,
+        help="Append per-stage spans (wall/CPU time, peak RSS, audio seconds, "
+        "tokens generated) to this JSON-lines file",
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        help="Serve per-stage totals in Prometheus text format on "
+        "http://127.0.0.1:PORT/metrics while running",
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const=".",
+        type=Path,
+        metavar="DIR",
+        help="Sample stacks during every stage and write the hottest stage as "
+        "collapsed stacks (flamegraph input) to DIR (default: current directory)",
+    )
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="Run a local job server (HTTP/JSON) that keeps models loaded; "
+        "the other options become defaults for submitted jobs",
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="Job server address")
+    parser.add_argument(
+        "--port", type=int, default=JOB_SERVER_PORT, help="Job server port"
+    )
+    parser.add_argument(
+        "--server-workers",
+        type=int,
+        default=1,
+        help="Jobs the server processes at once (default: 1)",
+    )
+    parser.add_argument(
+        "--warm",
+        action="store_true",
+        help="With --serve, load the summary and Whisper models before serving",
+    )
+    parser.add_argument(
+        "--server",
+        metavar="URL",
+        help="Submit the videos to a job server (e.g. http://127.0.0.1:8765) "
+        "instead of processing them here; defaults to $YT_JOB_SERVER",
+    )
+    parser.add_argument(
+        "--priority",
+        type=int,
+        default=0,
+        help="Job priority when using --server (higher runs first)",
+    )
+    parser.add_argument(
+        "--manifest",
+        type=Path,
+        metavar="FILE",
+        help="Read video URLs/IDs from FILE ('-' for stdin), one per line; "
+        "implies batch mode with a resumable journal",
+    )
+    parser.add_argument(
+        "--index",
+        nargs="?",
+        const="",
+        type=Path,
+        metavar="DIR",
+        help="Add processed videos to the transcript search index in DIR "
+        "(default: <cache dir>/index)",
+    )
+    parser.add_argument(
+        "--search",
+        metavar="QUERY",
+        help='Search the index (words, or "quoted phrases") and print ranked '
+        "hits with timestamped links; uses --server when given",
+    )
+    parser.add_argument(
+        "--limit", type=int, default=20, help="Number of --search hits to print"
+    )
+    parser.add_argument(
+        "--archive",
+        type=Path,
+        metavar="DIR",
+        help="Append every processed video to a bulk archive in DIR "
+        "(rolling compressed files plus a catalog)",
+    )
+    parser.add_argument(
+        "--archive-format",
+        default="jsonl",
+        choices=ARCHIVE_FORMATS,
+        help="jsonl: gzipped JSON lines, one video per line; parquet: one row "
+        "per segment (needs pyarrow)",
+    )
+    parser.add_argument(
+        "--archive-part-mb",
+        type=float,
+        default=ARCHIVE_PART_BYTES / (1024 * 1024),
+        help="Start a new JSONL archive file past this size",
+    )
+    parser.add_argument(
+        "--journal",
+        type=Path,
+        help="Progress journal for resuming a batch (default with --manifest: "
+        "<output dir>/<manifest name>.journal.jsonl)",
+    )
     args = parser.parse_args()
+    if (
+        not args.youtube_urls
+        and not args.serve
+        and args.manifest is None
+        and args.search is None
+    ):
+        parser.error(
+            "at least one YouTube URL is required "
+            "(or use --manifest / --serve / --search)"
+        )
 
     ensure_env_loaded()
+    if args.http_rate is not None:
+        configure_http(rate=args.http_rate, burst=max(1, int(args.http_rate)))
+    configure_caches(args.cache_dir, enabled=not args.no_cache)
+    WHISPER_WINDOW_SECONDS = args.whisper_window
+    try:
+        configure_asr(args.asr, args.compute_type, args.beam_size, args.asr_batch_size)
+    except ValueError as e:
+        parser.error(str(e))
+    configure_vad(args.vad, args.vad_threshold)
+    if args.model_cache_mb is not None:
+        MODEL_MANAGER.max_bytes = int(args.model_cache_mb * 1024 * 1024)
+    instrumenting = bool(args.metrics or args.metrics_port or args.profile)
+    METRICS.configure(args.metrics, count_tokens=instrumenting)
+    if args.metrics_port:
+        serve_metrics(args.metrics_port)
+    if args.profile:
+        METRICS.start_profiler()
+    # Bare --index, and --search without --index, use <cache dir>/index
+    index_dir = args.index
+    if (index_dir is not None and not str(index_dir)) or (
+        index_dir is None and args.search is not None
+    ):
+        index_dir = default_index_dir(args.cache_dir)
+    server_url = args.server or os.getenv("YT_JOB_SERVER")
+
+    if args.search is not None:
+        t0 = time.perf_counter()
+        if server_url:
+            hits = JobClient(server_url).search(args.search, args.limit)
+        else:
+            index = TranscriptIndex(index_dir)
+            if not len(index):
+                print(f"No videos indexed in {index.root} yet (see --index).")
+            hits = index.search(args.search, args.limit)
+        elapsed_ms = (time.perf_counter() - t0) * 1000
+        for hit in hits:
+            speaker = f" [{hit.speaker}]" if hit.speaker else ""
+            print(
+                f"{hit.score:6.2f}  {hit.title} @ {format_timestamp(hit.start)}{speaker}"
+            )
+            print(f"        {hit.text}")
+            print(f"        {hit.url}")
+        print(f"{len(hits)} hit(s) in {elapsed_ms:.0f} ms")
+        return
+    if index_dir is not None:
+        # The server flushes every video so results are searchable right away
+        configure_index(index_dir, flush_every=1 if args.serve else 32)
+    if args.archive is not None:
+        try:
+            configure_archive(
+                args.archive,
+                args.archive_format,
+                flush_every=1 if args.serve else 64,
+                part_bytes=int(args.archive_part_mb * 1024 * 1024),
+            )
+        except ImportError as e:
+            parser.error(str(e))
+    if args.format is None:
+        # The archive replaces per-video files unless formats are asked for
+        args.format = [] if args.archive is not None else ["md"]
 
-    urls = args.youtube_urls
-    is_batch = len(urls) > 1
+    if args.serve:
+        defaults = PipelineOptions(
+            lang=args.lang,
+            whisper_model=args.whisper_model,
+            summary_model=args.summary_model,
+            use_diarization=args.diarization,
+            split_speakers=args.split_speakers,
+            refresh=args.refresh,
+            whisper_workers=args.whisper_workers,
+            chunk_overlap=args.chunk_overlap,
+            summary_batch_size=args.summary_batch_size,
+            formats=[],
+        )
+        jobs = JobQueue(args.server_workers, defaults)
+        if args.warm:
+            print("Loading models…")
+            jobs.warm(whisper=True)
+        # With --serve, --output is the directory client exports must stay in
+        server = serve_jobs(jobs.start(), args.host, args.port, args.output)
+        print(f"Job server listening on http://{args.host}:{args.port}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            jobs.stop(wait=False)
+            configure_index(None)
+            configure_archive(None)
+        return
+
+    urls = list(args.youtube_urls)
+    if args.manifest is not None:
+        if str(args.manifest) == "-":
+            ids, problems = read_manifest(sys.stdin)
+        else:
+            with open(args.manifest, encoding="utf-8") as fh:
+                ids, problems = read_manifest(fh)
+        for problem in problems:
+            print(f"Manifest {problem}")
+        urls += [f"https://www.youtube.com/watch?v={vid}" for vid in ids]
+    # Same video given twice (any URL form) is processed once
+    videos: Dict[str, str] = {}
+    for url in urls:
+        try:
+            videos.setdefault(extract_video_id(url), url)
+        except ValueError:
+            videos.setdefault(url, url)
+    urls = list(videos.values())
+    is_batch = len(urls) > 1 or args.manifest is not None
     out_dir = Path(args.output) if args.output else Path.cwd()
     if is_batch and args.output and not out_dir.is_dir():
         out_dir.mkdir(parents=True, exist_ok=True)
 
-    for url in urls:
+    try:
+        stage_workers = _parse_stage_workers(args.stage_workers, args.jobs)
+    except ValueError as e:
+        parser.error(str(e))
+    opts = PipelineOptions(
+        lang=args.lang,
+        whisper_model=args.whisper_model,
+        summary_model=args.summary_model,
+        use_diarization=args.diarization,
+        split_speakers=args.split_speakers,
+        refresh=args.refresh,
+        whisper_workers=args.whisper_workers,
+        chunk_overlap=args.chunk_overlap,
+        summary_batch_size=args.summary_batch_size,
+        formats=args.format,
+        output=args.output,
+        is_batch=is_batch,
+    )
+    journal_path = args.journal
+    if journal_path is None and args.manifest is not None:
+        name = "stdin" if str(args.manifest) == "-" else args.manifest.stem
+        journal_path = out_dir / f"{name}.journal.jsonl"
+    if journal_path is not None and (server_url or args.stream):
+        print("Note: the journal only applies to the local batch pipeline.")
+        journal_path = None
+    if args.processes and (server_url or args.stream):
+        print("Note: --processes only applies to the local batch pipeline.")
+    if index_dir is not None and server_url:
+        print("Note: --index applies to local processing; start the server with it.")
+        configure_index(None)
+    if args.archive is not None and server_url:
+        print("Note: --archive applies to local processing; start the server with it.")
+        configure_archive(None)
+    if server_url:
+        done = run_via_server(server_url, urls, opts, args.priority)
+    elif args.stream:
+        done = [stream_to_console(url, opts) for url in urls]
+    else:
+        journal = None
+        if journal_path is not None:
+            # --refresh starts over but still records progress
+            journal = Journal(journal_path, opts, resume=not args.refresh)
+            # Archived videos count once the archive has committed them
+            finished = {
+                vid
+                for vid in videos
+                if journal.exported(vid, opts.formats)
+                and (ARCHIVE is None or vid in ARCHIVE)
+            }
+            if finished:
+                print(
+                    f"Resuming from {journal_path}: skipping {len(finished)} "
+                    f"already exported video(s)"
+                )
+            urls = [url for vid, url in videos.items() if vid not in finished]
         try:
-            video_id = extract_video_id(url)
-        except Exception as e:
-            print(f"Error with {url}: {e}")
-            continue
-
-        title = fetch_video_title(video_id)
+            if args.processes:
+                if args.processes == "auto":
+                    workers, threads = calibrate_process_pool(opts)
+                else:
+                    workers, threads = args.processes, args.threads_per_process
+                print(
+                    f"Processing in {workers} worker process(es), "
+                    f"{threads or 'all their'} thread(s) each"
+                )
+                done = run_process_pool(
+                    [VideoJob(url=url) for url in urls],
+                    opts,
+                    workers,
+                    threads,
+                    journal_path,
+                )
+            else:
+                done = run_pipeline(
+                    [VideoJob(url=url) for url in urls],
+                    build_stages(opts, stage_workers, journal),
+                )
+        finally:
+            if journal is not None:
+                journal.close()
+            # Commits buffered videos even when the run is interrupted
+            configure_archive(None)
+    # Writes whatever the last flush has not
+    configure_index(None)
+    configure_archive(None)
+    for job in done:
+        if job.error:
+            print(f"Error with {job.url}: {job.error}")
 
-        segments = get_transcript(url, args.lang, args.whisper_model, args.diarization)
-        if segments is None:
-            print(f"Transcription failed for {url}.")
-            continue
-        summary = summarize_transcript(segments, args.summary_model)
-        content = generate_content(video_id, title, summary, segments)
-
-        # Output path
-        safe_title = re.sub(r"[^\w\-]+", "_", title).strip("_")[:80]
-        fmt = args.format
-        if is_batch:
-            out_path = out_dir / f"{safe_title or video_id}.{fmt}"
-        else:
-            out_name = args.output or f"{safe_title or video_id}.{fmt}"
-            out_path = Path(out_name)
+    if args.profile:
+        METRICS.stop_profiler()
+        if METRICS.write_profile(args.profile) is None:
+            print("Profile: no stage ran long enough to be sampled.")
+    if instrumenting:
+        for line in METRICS.summary_lines():
+            print(f"Stage {line}")
 
-        export_content(content, out_path, fmt)
-        print(f"Wrote {out_path.resolve()} ({fmt.upper()})")
+    if is_batch and not server_url:
+        for name, cache in (
+            ("transcript", TRANSCRIPT_CACHE),
+            ("summary", SUMMARY_CACHE),
+        ):
+            if cache.enabled:
+                print(
+                    f"{name.capitalize()} cache: {cache.stats.hits} hits, "
+                    f"{cache.stats.misses} misses ({cache.stats.hit_rate:.0%} hit rate)"
+                )
+        for kind, st in MODEL_MANAGER.stats().items():
+            print(
+                f"Model cache [{kind}]: {st['hits']} hits, {st['misses']} misses, "
+                f"{st['evictions']} evictions, {st['load_seconds']:.1f}s loading"
+            )
 
 
 if __name__ == "__main__":